@@ -0,0 +1,556 @@
+import asyncio
+import datetime
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+import can
+
+from MX3_CAN.can_interface import CANInterface
+from MX3_CAN.config_yaml import (
+    CONTROLLER_MESSAGE_TYPE,
+    DISCOVERY_TIMEOUT,
+    MODULE_TYPE,
+    UID,
+)
+from MX3_CAN.error_report import create_error_reports
+from MX3_CAN.frame_recorder import create_frame_recorder
+from MX3_CAN.instrumentation import create_instrumentation
+from MX3_CAN.messages import SendMessage
+from MX3_CAN.metrics import DeviceMetrics, create_metrics_server
+from MX3_CAN.node_discovery import (
+    ConfigurationWrite,
+    ConfigurationWriteWaiter,
+    build_node_discovery,
+    log_timeout_error,
+)
+from MX3_CAN.node_lease import (
+    LeaseRejectedError,
+    NodeLeaseStore,
+    create_node_lease_store,
+)
+from MX3_CAN.status_listener import StatusListener
+from MX3_CAN.status_log import (
+    CLOCK,
+    BackgroundLogWriter,
+    DailyRotatingLogger,
+    create_status_logger,
+)
+from MX3_CAN.status_poller import StatusPoller, create_status_poller
+from MX3_CAN.status_store import StatusField
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncLogQueue:
+    """
+    Logger for a StatusListener running on the event loop.
+
+    log() only stamps the entry and queues it; write_logs() drains the queue
+    in batches on a single worker thread, so a slow disk never stalls the
+    event loop. If the queue is full the entry is dropped and counted.
+    run() uses it for the "direct" STATUS_LOG writer; the "background"
+    writer already keeps writes off the calling thread.
+
+    Args:
+        file_logger (DailyRotatingLogger): The logger that writes the files,
+            JSONL or binary.
+        maxsize (int): Maximum number of queued entries.
+    """
+
+    def __init__(self, file_logger: DailyRotatingLogger, maxsize: int = 1024) -> None:
+        self.file_logger = file_logger
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def log(
+        self,
+        data: dict,
+        timestamp: datetime.datetime | None = None,
+        monotonic: float | None = None,
+    ) -> None:
+        """Queue a rendered change set; it is written on the worker thread."""
+        self._enqueue(self.file_logger.log, data, timestamp, monotonic)
+
+    def log_changes(
+        self,
+        changes: list[tuple[StatusField, int]],
+        timestamp: datetime.datetime | None = None,
+        monotonic: float | None = None,
+    ) -> None:
+        """Queue a (field, code) change set; it is written on the worker thread."""
+        self._enqueue(self.file_logger.log_changes, changes, timestamp, monotonic)
+
+    def log_snapshot(
+        self,
+        fields: list[tuple[StatusField, int]],
+        timestamp: datetime.datetime | None = None,
+        monotonic: float | None = None,
+    ) -> None:
+        """Queue a full-state snapshot from StatusStore.snapshot()."""
+        self._enqueue(self.file_logger.log_snapshot, fields, timestamp, monotonic)
+
+    def _enqueue(self, write, data, timestamp=None, monotonic=None) -> None:
+        if timestamp is None:
+            if monotonic is None:
+                monotonic = time.monotonic()
+            timestamp = CLOCK.wall_time(monotonic)
+        try:
+            self.queue.put_nowait((write, timestamp, monotonic, data))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def write_logs(self) -> None:
+        """Write queued entries until cancelled."""
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="status-log"
+        ) as executor:
+            while True:
+                batch = [await self.queue.get()]
+                while not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                await loop.run_in_executor(executor, self._write_batch, batch)
+
+    def _write_batch(self, batch: list[tuple]) -> None:
+        for write, timestamp, monotonic, data in batch:
+            write(data, timestamp, monotonic=monotonic)
+
+    def close(self) -> None:
+        """Write whatever is still queued and close the file."""
+        remaining = []
+        while not self.queue.empty():
+            remaining.append(self.queue.get_nowait())
+        self._write_batch(remaining)
+        self.file_logger.close()
+
+
+class AsyncCANDevice:
+    """
+    IntelliZone CAN device with every activity running on one event loop.
+
+    A can.Notifier attached to the loop feeds a can.AsyncBufferedReader. On
+    SocketCAN the notifier watches the socket with loop.add_reader(), so no
+    receive thread is needed. listen() hands each frame to the consumers that
+    discovery and the status listener register.
+
+    Args:
+        canbus (can.BusABC): The active CAN bus interface.
+        uid (list[int]): The device's Unique ID.
+        local_module (str, optional): Module type of this device.
+        can_interface (CANInterface, optional): If given, discovery and the
+            status listener register their acceptance filters with it.
+        metrics (DeviceMetrics, optional): Updated with discovery counts,
+            the heartbeat task and the status listener.
+        lease_store (NodeLeaseStore, optional): If given, a persisted node
+            ID lease is resumed instead of running discovery, and a new
+            assignment is saved to it.
+    """
+
+    def __init__(
+        self,
+        canbus: can.BusABC,
+        uid: list[int],
+        local_module: str = "Status_Screen",
+        can_interface: CANInterface | None = None,
+        metrics: DeviceMetrics | None = None,
+        lease_store: NodeLeaseStore | None = None,
+    ) -> None:
+        self.canbus = canbus
+        self.metrics = metrics
+        self.lease_store = lease_store
+        self.uid = uid
+        self.can_interface = can_interface
+        self.local_module = local_module
+        self.reader = can.AsyncBufferedReader()
+        self.notifier: can.Notifier | None = None
+        self.consumers: list[Callable[[can.Message], None]] = []
+
+    def start(self) -> None:
+        """Attach the notifier to the running event loop."""
+        self.notifier = can.Notifier(
+            self.canbus, [self.reader], loop=asyncio.get_running_loop()
+        )
+
+    def stop(self) -> None:
+        """Detach the notifier from the bus."""
+        if self.notifier:
+            self.notifier.stop()
+            self.notifier = None
+
+    async def listen(self) -> None:
+        """Route every received frame to the registered consumers."""
+        while True:
+            message = await self.reader.get_message()
+            for consumer in tuple(self.consumers):
+                consumer(message)
+
+    async def send_periodic(
+        self,
+        message: can.Message,
+        period: float,
+        max_failures: int | None = None,
+    ) -> None:
+        """
+        Send a message every `period` seconds until cancelled.
+
+        Send times are scheduled against the loop clock, so they do not drift
+        with the time spent sending.
+
+        Args:
+            message (can.Message): The message to send.
+            period (float): The send period in seconds.
+            max_failures (int, optional): Raise after this many consecutive
+                failed sends. None keeps retrying forever.
+
+        Raises:
+            TimeoutError: If max_failures consecutive sends failed.
+        """
+        loop = asyncio.get_running_loop()
+        failures = 0
+        next_send = loop.time()
+        while True:
+            try:
+                self.canbus.send(message)
+                failures = 0
+            except can.CanError as error:
+                failures += 1
+                logger.warning(f"Failed to send CAN message: {error}")
+                if max_failures is not None and failures >= max_failures:
+                    raise TimeoutError(
+                        f"No 0x{message.arbitration_id:X} frame could be sent "
+                        f"for {failures * period:.1f} s."
+                    ) from error
+            next_send += period
+            await asyncio.sleep(max(0.0, next_send - loop.time()))
+
+    async def discover(self) -> int:
+        """
+        Send Node Discovery every 100 ms until the controller assigns a node ID.
+
+        Returns:
+            int: The assigned Node ID.
+
+        Raises:
+            TimeoutError: If no Configuration Write arrives within
+                DISCOVERY_TIMEOUT seconds.
+        """
+        return (await self.discover_assignment()).node_id
+
+    async def discover_assignment(self) -> ConfigurationWrite:
+        """
+        Like discover(), but return the whole assignment, with the controller
+        taken from the Configuration Write's arbitration ID.
+        """
+        assigned = asyncio.get_running_loop().create_future()
+        waiter = ConfigurationWriteWaiter(self.uid, local_module=self.local_module)
+        if self.can_interface:
+            self.can_interface.set_acceptance_filters("discovery", waiter.can_filters)
+
+        def on_message(message: can.Message) -> None:
+            node_id = waiter.match(message)
+            if node_id is not None and not assigned.done():
+                assigned.set_result(
+                    ConfigurationWrite(
+                        node_id,
+                        (message.arbitration_id >> 12) & 0xF,
+                        (message.arbitration_id >> 8) & 0xF,
+                    )
+                )
+
+        sender, payload = build_node_discovery(self.uid, local_module=self.local_module)
+        self.consumers.append(on_message)
+        discovery_task = asyncio.create_task(
+            self.send_periodic(sender.build_message(payload), period=0.1)
+        )
+        if self.metrics:
+            self.metrics.discovery_attempts += 1
+        try:
+            assignment = await asyncio.wait_for(assigned, DISCOVERY_TIMEOUT)
+            logger.info(
+                f"Node Discovery complete. Assigned ID: 0x{assignment.node_id:X}"
+            )
+            return assignment
+        except asyncio.TimeoutError:
+            if self.metrics:
+                self.metrics.discovery_timeouts += 1
+            log_timeout_error("Timeout waiting for Configuration Write message.")
+            raise TimeoutError(
+                f"Timed out after {DISCOVERY_TIMEOUT:.0f} s waiting for Configuration Write."
+            ) from None
+        finally:
+            discovery_task.cancel()
+            self.consumers.remove(on_message)
+            if self.can_interface:
+                self.can_interface.clear_acceptance_filters("discovery")
+
+    async def heartbeat(self, node_id: int, period: float = 0.2) -> None:
+        """
+        Send Heartbeat messages to the controller until cancelled.
+
+        The task is supervised: if heartbeats cannot be sent for five seconds
+        it raises TimeoutError, which restarts the device.
+        """
+        heartbeat_sender = SendMessage(
+            message_type=CONTROLLER_MESSAGE_TYPE["Heartbeat"],
+            node_id=node_id,
+            module_type=MODULE_TYPE[self.local_module],
+            dest_module=MODULE_TYPE["Controller"],
+            dest_node=0x0,
+        )
+        await self.send_periodic(
+            heartbeat_sender.build_message([]),
+            period,
+            max_failures=int(5.0 / period),
+        )
+
+    async def poll_status(
+        self, node_id: int, status_received: asyncio.Event, period: float = 2.0
+    ) -> None:
+        """
+        Send Status_Read_Request messages until the controller reports status.
+        """
+        sender = SendMessage(
+            message_type=CONTROLLER_MESSAGE_TYPE["Status_Read_Request"],
+            node_id=node_id,
+            module_type=MODULE_TYPE[self.local_module],
+            dest_module=MODULE_TYPE["Controller"],
+            dest_node=0x0,
+            prepared=True,
+        )
+        while not status_received.is_set():
+            try:
+                msg = sender.build_message([0x00])
+                self.canbus.send(msg)
+                logger.info(f"Sent Controller Status Request: {msg}")
+            except can.CanError:
+                logger.error("Failed to send Controller Status request.")
+            try:
+                await asyncio.wait_for(status_received.wait(), period)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_poller(
+        self, poller: StatusPoller, status_received: asyncio.Event
+    ) -> None:
+        """
+        Drive a StatusPoller on the event loop once the controller reports
+        status, in place of its polling thread.
+        """
+        await status_received.wait()
+        logger.info("Sending periodic status requests to the controller.")
+        while True:
+            await asyncio.sleep(poller.poll_once())
+
+    async def run(self) -> None:
+        """
+        Discover, then run heartbeat, listening, status polling and log
+        writing as tasks until one of them fails or the run is cancelled.
+
+        Raises:
+            LeaseRejectedError: If the controller does not answer a resumed
+                lease's node ID within the store's verify_timeout.
+        """
+        self.start()
+        listen_task = asyncio.create_task(self.listen(), name="listen")
+        tasks = [listen_task]
+        status_listener = None
+        frame_recorder = None
+        error_executor = None
+        channel = (
+            self.can_interface.channel
+            if self.can_interface
+            else str(self.canbus.channel_info)
+        )
+        try:
+            # Resume a persisted lease instead of discovering, if there is one
+            lease = (
+                self.lease_store.load(self.uid, channel) if self.lease_store else None
+            )
+            if lease:
+                node_id = lease.node_id
+                logger.info(f"Resuming leased Node ID: 0x{node_id:X}")
+            else:
+                assignment = await self.discover_assignment()
+                node_id = assignment.node_id
+                if self.lease_store:
+                    try:
+                        self.lease_store.save(
+                            self.uid,
+                            node_id,
+                            channel,
+                            assignment.controller_module,
+                            assignment.controller_node,
+                        )
+                    except OSError as error:
+                        logger.warning("Could not persist node ID lease: %s", error)
+            heartbeat_task = asyncio.create_task(
+                self.heartbeat(node_id), name="heartbeat"
+            )
+            tasks.append(heartbeat_task)
+            logger.info("Started periodic heartbeat task.")
+
+            instrumentation = create_instrumentation()
+            status_logger = create_status_logger(instrumentation=instrumentation)
+            if not isinstance(status_logger, BackgroundLogWriter):
+                # Direct writes would block the event loop: queue them for
+                # a worker thread instead
+                status_logger = AsyncLogQueue(status_logger)
+                tasks.append(
+                    asyncio.create_task(status_logger.write_logs(), name="write_logs")
+                )
+                if instrumentation:
+                    instrumentation.watch("log_dropped", status_logger, "dropped")
+            error_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="error-log"
+            )
+            status_listener = StatusListener(
+                node_id=node_id,
+                expected_reply=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"],
+                module_type=MODULE_TYPE[self.local_module],
+                source_module=MODULE_TYPE["Controller"],
+                source_node=0x0,
+                logger=status_logger,
+                instrumentation=instrumentation,
+                error_reports=create_error_reports(executor=error_executor),
+            )
+            status_received = asyncio.Event()
+
+            def on_status(message: can.Message) -> None:
+                status_listener.on_message_received(message)
+                if status_listener.received_event.is_set():
+                    status_received.set()
+
+            self.consumers.append(on_status)
+            # Its writer thread keeps disk writes off the event loop
+            frame_recorder = create_frame_recorder(channel=channel)
+            if frame_recorder:
+                self.consumers.append(frame_recorder.on_message_received)
+            if self.metrics:
+                self.metrics.heartbeat_task = heartbeat_task
+                self.metrics.status_listener = status_listener
+                self.metrics.instrumentation = instrumentation
+            if self.can_interface:
+                self.can_interface.set_acceptance_filters(
+                    "status_listener", status_listener.can_filters
+                )
+                if frame_recorder:
+                    # Also the controller frames the listener does not decode
+                    self.can_interface.set_acceptance_filters(
+                        "frame_recorder", frame_recorder.can_filters
+                    )
+            tasks.append(
+                asyncio.create_task(
+                    self.poll_status(node_id, status_received), name="poll_status"
+                )
+            )
+            if lease:
+                # A leased ID must be answered quickly
+                try:
+                    await asyncio.wait_for(
+                        status_received.wait(), self.lease_store.verify_timeout
+                    )
+                except asyncio.TimeoutError:
+                    raise LeaseRejectedError(
+                        f"No reply to leased Node ID 0x{node_id:X}."
+                    ) from None
+                logger.info("Controller accepted the leased Node ID.")
+            status_poller = create_status_poller(
+                self.canbus, node_id, status_listener, start=False
+            )
+            if status_poller:
+                if self.metrics:
+                    self.metrics.status_poller = status_poller
+                tasks.append(
+                    asyncio.create_task(
+                        self.run_poller(status_poller, status_received),
+                        name="status_poller",
+                    )
+                )
+            logger.info("Running... Press Ctrl+C to exit.")
+
+            # Every task runs forever except the status poll; the first to
+            # fail ends the run.
+            while True:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+                for task in done:
+                    task.result()
+                tasks = [task for task in tasks if task not in done]
+        finally:
+            if self.metrics:
+                self.metrics.end_run()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.stop()
+            if status_listener:
+                status_listener.close_logger()
+            if frame_recorder:
+                frame_recorder.stop()
+            if error_executor:
+                error_executor.shutdown()
+
+
+async def async_main(channel: str = "can0", interface: str = "socketcan") -> None:
+    """
+    asyncio counterpart of main.main(): run the device on one event loop,
+    restarting after discovery or heartbeat timeouts.
+
+    Args:
+        channel (str, optional): The CAN channel to run on.
+        interface (str, optional): The python-can interface of the channel.
+    """
+    logger.info("Starting IntelliZone CAN device implementation (asyncio).")
+    metrics = DeviceMetrics()
+    # Served from its own thread, so scrapes never wait on the event loop
+    metrics_server = create_metrics_server(metrics)
+    lease_store = create_node_lease_store()
+
+    while True:
+        can_interface = None
+        can_bus = None
+
+        try:
+            can_interface = CANInterface(channel, interface=interface)
+            can_bus = can_interface.bring_up()
+            logger.info("Initialized CAN bus interface.")
+
+            await AsyncCANDevice(
+                can_bus,
+                UID,
+                can_interface=can_interface,
+                metrics=metrics,
+                lease_store=lease_store,
+            ).run()
+
+        except LeaseRejectedError as rejected:
+            # Rediscover right away
+            logger.warning(f"{rejected} Falling back to node discovery.")
+            lease_store.clear()
+            continue
+
+        except TimeoutError as timeout_error:
+            logger.warning(f"TimeoutError: {timeout_error}. Restarting in 5 seconds...")
+            log_timeout_error(f"TimeoutError: {timeout_error}")
+            await asyncio.sleep(5)
+            continue
+
+        except Exception as general_error:
+            logger.exception(f"Fatal Error: {general_error}")
+            logger.error("Unhandled exception. Exiting.")
+            break
+
+        finally:
+            if can_bus:
+                try:
+                    can_bus.shutdown()
+                    logger.info("Shutdown CAN bus.")
+                except Exception as e:
+                    logger.warning("Could not shutdown CAN bus cleanly: %s", e)
+            if can_interface:
+                can_interface.shutdown()
+                logger.info("Cleaned up CAN interface.")
+
+    if metrics_server:
+        metrics_server.stop()
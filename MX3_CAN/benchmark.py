@@ -0,0 +1,271 @@
+import argparse
+import contextlib
+import datetime
+import itertools
+import json
+import platform
+import sys
+import tempfile
+import timeit
+from collections.abc import Callable
+
+import can
+
+from MX3_CAN.binary_log import BinaryDailyRotatingLogger
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.message_parser import PARSERS, STATUS_FIELDS, parse_changes, parse_message
+from MX3_CAN.messages import SendMessage
+from MX3_CAN.status_listener import StatusListener
+from MX3_CAN.status_log import BackgroundLogWriter, DailyRotatingLogger
+from MX3_CAN.status_store import StatusStore, render_changes
+
+# A result is slower than its baseline if it takes this much longer
+DEFAULT_THRESHOLD = 0.10
+
+
+class NullLogger:
+    """Status logger that discards everything, to time the listener alone."""
+
+    def log(self, data, timestamp=None, monotonic=None) -> None:
+        pass
+
+    def log_changes(self, changes, timestamp=None, monotonic=None) -> None:
+        pass
+
+    def log_snapshot(self, fields, timestamp=None, monotonic=None) -> None:
+        pass
+
+    def flush(self, fsync: bool = False) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+def status_payloads(parameter_code: int) -> tuple[bytes, bytes]:
+    """Two full-length payloads for a code that differ in every data byte."""
+    size = PARSERS[parameter_code].size
+    return (
+        bytes([parameter_code] + [0x00] * (size - 1)),
+        bytes([parameter_code] + [0xA5] * (size - 1)),
+    )
+
+
+def status_frames(payloads: list[bytes]) -> list[can.Message]:
+    listener = benchmark_listener(NullLogger())
+    return [
+        can.Message(
+            arbitration_id=listener.expected_arbitration_id,
+            data=payload,
+            is_extended_id=True,
+        )
+        for payload in payloads
+    ]
+
+
+def benchmark_listener(logger) -> StatusListener:
+    return StatusListener(
+        node_id=0x1,
+        expected_reply=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"],
+        module_type=MODULE_TYPE["Status_Screen"],
+        source_module=MODULE_TYPE["Controller"],
+        logger=logger,
+    )
+
+
+def alternating(items: list) -> Callable[[], object]:
+    """Return a function that returns the items in turn, forever."""
+    return itertools.cycle(items).__next__
+
+
+def build_benchmarks(
+    directory: str, cleanup: contextlib.ExitStack
+) -> dict[str, Callable[[], object]]:
+    """
+    Every benchmark as a zero-argument callable running one operation.
+
+    Status benchmarks alternate between payloads that differ, so every call
+    decodes and diffs a real change rather than hitting a repeat.
+
+    Args:
+        directory (str): Where the logger benchmarks write.
+        cleanup (contextlib.ExitStack): Closes the loggers afterwards.
+    """
+    benchmarks = {}
+
+    for parameter_code in sorted(PARSERS):
+        next_payload = alternating(status_payloads(parameter_code))
+        store = StatusStore()
+        benchmarks[f"parse_message[0x{parameter_code:02X}]"] = (
+            lambda next_payload=next_payload, store=store: parse_message(
+                next_payload(), store
+            )
+        )
+
+    all_payloads = [
+        payload for code in sorted(PARSERS) for payload in status_payloads(code)
+    ]
+    listener = benchmark_listener(NullLogger())
+    next_frame = alternating(status_frames(all_payloads))
+    benchmarks["on_message_received[changed]"] = lambda: listener.on_message_received(
+        next_frame()
+    )
+    repeat_listener = benchmark_listener(NullLogger())
+    (repeated,) = status_frames([status_payloads(0x10)[0]])
+    benchmarks["on_message_received[unchanged]"] = (
+        lambda: repeat_listener.on_message_received(repeated)
+    )
+
+    store = StatusStore()
+    change_sets = [parse_changes(payload, store) for payload in status_payloads(0x19)]
+    next_changes = alternating(change_sets)
+    next_rendered = alternating([render_changes(changes) for changes in change_sets])
+    timestamp = datetime.datetime.now()
+
+    jsonl_logger = DailyRotatingLogger(directory, buffering=-1)
+    cleanup.callback(jsonl_logger.close)
+    benchmarks["DailyRotatingLogger.log"] = lambda: jsonl_logger.log(
+        next_rendered(), timestamp
+    )
+    benchmarks["DailyRotatingLogger.log_changes"] = lambda: jsonl_logger.log_changes(
+        next_changes(), timestamp
+    )
+    binary_logger = BinaryDailyRotatingLogger(STATUS_FIELDS, directory, buffering=-1)
+    cleanup.callback(binary_logger.close)
+    benchmarks["BinaryDailyRotatingLogger.log_changes"] = (
+        lambda: binary_logger.log_changes(next_changes(), timestamp)
+    )
+    # The cost the receive thread pays; the writer thread drains the queue
+    # into a NullLogger.
+    background = BackgroundLogWriter(NullLogger(), queue_size=1 << 20)
+    cleanup.callback(background.close)
+    benchmarks["BackgroundLogWriter.log_changes"] = lambda: background.log_changes(
+        next_changes(), timestamp
+    )
+
+    heartbeat = SendMessage(
+        message_type=CONTROLLER_MESSAGE_TYPE["Heartbeat"], node_id=1
+    )
+    benchmarks["SendMessage.build_message"] = lambda: heartbeat.build_message([])
+    prepared = SendMessage(
+        message_type=CONTROLLER_MESSAGE_TYPE["Status_Read_Request"],
+        node_id=1,
+        prepared=True,
+    )
+    benchmarks["SendMessage.build_message[prepared]"] = lambda: prepared.build_message(
+        [0x00]
+    )
+    return benchmarks
+
+
+def measure(function: Callable[[], object], repeat: int, min_time: float) -> float:
+    """
+    Time one operation, in nanoseconds.
+
+    The loop count is grown until one run takes `min_time` seconds; the best
+    of `repeat` runs is reported, which is the least disturbed by other load.
+    """
+    timer = timeit.Timer(function)
+    number = 1
+    while (elapsed := timer.timeit(number)) < min_time:
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.1))
+    best = min([elapsed] + timer.repeat(repeat - 1, number))
+    return best / number * 1e9
+
+
+def run_benchmarks(
+    repeat: int = 5, min_time: float = 0.2, names: list[str] | None = None
+) -> dict:
+    """
+    Run the benchmarks and return the results document.
+
+    Returns:
+        dict: {"created": ..., "python": ..., "machine": ...,
+        "results": {name: {"ns_per_op": float, "ops_per_s": float}}}
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory, contextlib.ExitStack() as cleanup:
+        benchmarks = build_benchmarks(directory, cleanup)
+        for name, function in benchmarks.items():
+            if names and not any(part in name for part in names):
+                continue
+            ns_per_op = measure(function, repeat, min_time)
+            results[name] = {"ns_per_op": ns_per_op, "ops_per_s": 1e9 / ns_per_op}
+    return {
+        "created": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(
+    results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD
+) -> list[tuple[str, float, float, float]]:
+    """
+    Compare results to a baseline.
+
+    Returns:
+        list[tuple[str, float, float, float]]: (name, baseline ns, current ns,
+        relative change) for every benchmark more than `threshold` slower.
+    """
+    regressions = []
+    for name, result in results["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        change = result["ns_per_op"] / before["ns_per_op"] - 1.0
+        if change > threshold:
+            regressions.append((name, before["ns_per_op"], result["ns_per_op"], change))
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the CAN decode, diff and log hot path."
+    )
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument(
+        "--baseline", help="Compare against results saved with --output."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Relative slowdown that counts as a regression (default 0.10).",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark.")
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="Minimum seconds per run."
+    )
+    parser.add_argument(
+        "names", nargs="*", help="Only run benchmarks whose name contains these."
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.repeat, args.min_time, args.names)
+    for name, result in results["results"].items():
+        print(
+            f"{name:45} {result['ns_per_op']:12,.0f} ns/op "
+            f"{result['ops_per_s']:14,.0f} ops/s"
+        )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after, change in regressions:
+            print(
+                f"REGRESSION {name}: {before:,.0f} -> {after:,.0f} ns/op "
+                f"(+{change:.0%})"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
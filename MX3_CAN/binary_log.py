@@ -0,0 +1,349 @@
+import argparse
+import datetime
+import json
+import os
+import struct
+import sys
+import time
+from collections.abc import Iterator
+from typing import BinaryIO, TextIO
+
+from MX3_CAN.status_log import DailyRotatingLogger
+from MX3_CAN.status_store import StatusField
+
+MAGIC = b"MX3STLOG"
+VERSION = 1
+# Header: magic, version, day (ISO date), schema length; then the schema JSON
+HEADER = struct.Struct("<8sB10sI")
+# Record: microseconds since the day's local midnight, key ID, value code
+RECORD = struct.Struct("<QHI")
+EXTENSION = ".mx3log"
+# Key ID of the record that starts a snapshot; its code is the number of
+# field records that follow
+SNAPSHOT_KEY = 0xFFFF
+
+
+def build_schema(fields: tuple[StatusField, ...]) -> dict:
+    """
+    Describe the fields of a binary log, indexed by key ID.
+
+    Each field is stored once as [section, key, table, format]. `table`
+    indexes a shared list of string tables (fields rendered through the same
+    config.yaml map share one), `format` is set for fields without a table.
+    """
+    tables = []
+    table_ids = {}
+    schema_fields = []
+    for key_id, field in enumerate(fields):
+        if field.key_id != key_id:
+            raise ValueError(
+                f"Field {field!r} has key_id {field.key_id}, not {key_id}."
+            )
+        table_id = None
+        if field.strings is not None:
+            table_id = table_ids.get(field.strings)
+            if table_id is None:
+                table_id = table_ids[field.strings] = len(tables)
+                tables.append(list(field.strings))
+        schema_fields.append([field.section, field.key, table_id, field.value_format])
+    return {"tables": tables, "fields": schema_fields}
+
+
+def encode_header(day: datetime.date, schema: dict) -> bytes:
+    """Return the header that starts a binary log for the given day."""
+    schema_bytes = json.dumps(schema, separators=(",", ":")).encode()
+    return (
+        HEADER.pack(MAGIC, VERSION, day.isoformat().encode(), len(schema_bytes))
+        + schema_bytes
+    )
+
+
+def read_header(file: BinaryIO) -> tuple[datetime.date, dict]:
+    """
+    Read the header of a binary log, leaving the file at the first record.
+
+    Raises:
+        ValueError: If the file is not a binary status log.
+    """
+    raw = file.read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ValueError("File is too short to be a binary status log.")
+    magic, version, day, schema_length = HEADER.unpack(raw)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a binary status log, or an unsupported version.")
+    schema = json.loads(file.read(schema_length))
+    return datetime.date.fromisoformat(day.decode()), schema
+
+
+class BinaryDailyRotatingLogger(DailyRotatingLogger):
+    """A DailyRotatingLogger that writes the compact binary format.
+
+    Each day's file starts with a header holding a schema that maps key IDs
+    to section and key names and to the strings their codes render as. It is
+    followed by fixed-size records of (microseconds since midnight, key ID,
+    value code), one per changed field, 14 bytes each. A snapshot is a
+    SNAPSHOT_KEY record holding the number of field records that follow.
+
+    A file left by an earlier run is appended to if its schema matches;
+    a trailing partial record from a crash is cut off first. If the schema
+    has changed, the day continues in a new numbered file.
+
+    Records hold no monotonic times and no anchors; their timestamps come
+    from the same anchored clock as the JSONL log's. An entry stamped before
+    the open file's day (queued before midnight, or a re-anchor stepping the
+    clock back) is stored at the day's first microsecond.
+    """
+
+    def __init__(
+        self,
+        fields: tuple[StatusField, ...],
+        directory="logs",
+        buffering=1,
+        instrumentation=None,
+    ):
+        """Initialize the logger.
+
+        Args:
+            fields: All status fields, indexed by key_id (STATUS_FIELDS).
+            directory: The directory where the log files will be stored.
+            buffering: 1 flushes after every entry, anything else leaves
+                flushing to flush().
+            instrumentation: Where to record timings, if anywhere.
+        """
+        self.schema = build_schema(fields)
+        self.fields = {(field.section, field.key): field for field in fields}
+        # Rendered string -> code per key_id, shared by fields with the same
+        # strings; the first code wins for strings several codes render as
+        # (e.g. "Unknown")
+        self.codes: dict[int, dict[str, int]] = {}
+        tables = {}
+        for field in fields:
+            if field.strings is not None:
+                table = tables.get(id(field.strings))
+                if table is None:
+                    table = tables[id(field.strings)] = {}
+                    for code, string in enumerate(field.strings):
+                        table.setdefault(string, code)
+                self.codes[field.key_id] = table
+        self.day_start = None
+        super().__init__(directory, buffering, instrumentation)
+
+    def _open_file(self, date_str: str):
+        """Open the day's file, writing the header if it is new."""
+        day = datetime.date.fromisoformat(date_str)
+        header = encode_header(day, self.schema)
+        self.day_start = datetime.datetime.combine(day, datetime.time())
+
+        suffix = 0
+        while True:
+            name = date_str if suffix == 0 else f"{date_str}-{suffix}"
+            path = os.path.join(self.directory, name + EXTENSION)
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                file = open(path, "ab")
+                file.write(header)
+                return file
+            with open(path, "rb") as existing:
+                if existing.read(len(header)) == header:
+                    records = (os.path.getsize(path) - len(header)) // RECORD.size
+                    os.truncate(path, len(header) + records * RECORD.size)
+                    return open(path, "ab")
+            suffix += 1
+
+    def log(
+        self,
+        data: dict,
+        timestamp: datetime.datetime | None = None,
+        monotonic: float | None = None,
+    ) -> None:
+        """Append a rendered change set, encoded back into field codes.
+
+        Prefer log_changes(), which needs no encoding.
+
+        Args:
+            data: {section: {key: rendered value}}.
+            timestamp: When the changes happened. Defaults to the wall time
+                of `monotonic`.
+            monotonic: The monotonic time the changes were received.
+                Defaults to now.
+
+        Raises:
+            ValueError: If a field is not in the schema or a value is not
+                one it can render.
+        """
+        self._write_records(self.encode(data), timestamp, monotonic)
+
+    def encode(self, data: dict) -> list[tuple[StatusField, int]]:
+        """Turn a rendered change set back into (field, code) pairs."""
+        changes = []
+        for section, values in data.items():
+            for key, value in values.items():
+                field = self.fields.get((section, key))
+                if field is None:
+                    raise ValueError(f"No status field {section}.{key}.")
+                if field.strings is not None:
+                    code = self.codes[field.key_id].get(value)
+                    if code is None:
+                        raise ValueError(f"{section}.{key} never renders {value!r}.")
+                else:
+                    hexadecimal = field.value_format.rstrip("}")[-1:] in ("X", "x")
+                    code = int(value, 16 if hexadecimal else 10)
+                changes.append((field, code))
+        return changes
+
+    def log_changes(
+        self,
+        changes,
+        timestamp: datetime.datetime | None = None,
+        monotonic: float | None = None,
+    ) -> None:
+        """Append one record per changed field.
+
+        Args:
+            changes: The changed fields and their new codes.
+            timestamp: When the changes happened. Defaults to the wall time
+                of `monotonic`.
+            monotonic: The monotonic time the changes were received.
+                Defaults to now.
+        """
+        self._write_records(changes, timestamp, monotonic)
+
+    def log_snapshot(
+        self,
+        fields,
+        timestamp: datetime.datetime | None = None,
+        monotonic: float | None = None,
+    ) -> None:
+        """Append a snapshot marker followed by one record per field.
+
+        Args:
+            fields: Every decoded field and its code.
+            timestamp: When the snapshot was taken. Defaults to the wall
+                time of `monotonic`.
+            monotonic: The monotonic time of the snapshot. Defaults to now.
+        """
+        self._write_records(fields, timestamp, monotonic, snapshot=True)
+
+    def _write_records(
+        self,
+        changes,
+        timestamp: datetime.datetime | None,
+        monotonic: float | None,
+        snapshot: bool = False,
+    ) -> None:
+        timestamp, monotonic = self._stamp(timestamp, monotonic)
+        self._rotate_if_needed(timestamp)
+        timed = self.instrumentation is not None
+        started = time.perf_counter() if timed else 0.0
+        # Records are unsigned: an earlier entry goes at the day's start
+        offset = max(
+            (timestamp - self.day_start) // datetime.timedelta(microseconds=1), 0
+        )
+        records = [RECORD.pack(offset, field.key_id, code) for field, code in changes]
+        if snapshot:
+            records.insert(0, RECORD.pack(offset, SNAPSHOT_KEY, len(records)))
+        data = b"".join(records)
+        serialized = time.perf_counter() if timed else 0.0
+        self.file.write(data)
+        self.bytes_written += len(data)
+        if self.buffering == 1:
+            self.file.flush()
+        if timed:
+            self._record_write(timestamp, started, serialized, monotonic)
+
+
+def read_binary_log(path: str, chunk_records: int = 4096) -> Iterator[dict]:
+    """
+    Stream the entries of a binary log as JSONL-style dictionaries.
+
+    Consecutive records with the same timestamp form one entry, as they did
+    when they were logged. Snapshot records form an entry with a "snapshot"
+    key instead of "changes". Memory use is bounded by `chunk_records`.
+
+    Args:
+        path (str): The binary log file.
+        chunk_records (int, optional): Records read per chunk.
+
+    Yields:
+        dict: {"timestamp": <ISO 8601>, "changes": {section: {key: value}}}
+    """
+    with open(path, "rb") as file:
+        day, schema = read_header(file)
+        day_start = datetime.datetime.combine(day, datetime.time())
+        tables = schema["tables"]
+        fields = [
+            (section, key, tables[table_id] if table_id is not None else None, fmt)
+            for section, key, table_id, fmt in schema["fields"]
+        ]
+
+        entry_offset = None
+        kind = "changes"
+        changes = {}
+        # Field records still belonging to the current snapshot
+        snapshot_left = 0
+        while chunk := file.read(RECORD.size * chunk_records):
+            # A trailing partial record (interrupted write) is ignored
+            chunk = chunk[: len(chunk) - len(chunk) % RECORD.size]
+            for offset, key_id, code in RECORD.iter_unpack(chunk):
+                if key_id == SNAPSHOT_KEY or (
+                    not snapshot_left and (offset != entry_offset or kind != "changes")
+                ):
+                    if changes:
+                        yield _entry(day_start, entry_offset, kind, changes)
+                        changes = {}
+                    kind = "changes"
+                entry_offset = offset
+                if key_id == SNAPSHOT_KEY:
+                    kind, snapshot_left = "snapshot", code
+                    continue
+                if snapshot_left:
+                    snapshot_left -= 1
+                section, key, strings, fmt = fields[key_id]
+                value = strings[code] if strings is not None else fmt.format(code)
+                changes.setdefault(section, {})[key] = value
+        if changes:
+            yield _entry(day_start, entry_offset, kind, changes)
+
+
+def _entry(day_start: datetime.datetime, offset: int, kind: str, values: dict) -> dict:
+    timestamp = day_start + datetime.timedelta(microseconds=offset)
+    return {"timestamp": timestamp.isoformat(), kind: values}
+
+
+def convert_to_jsonl(path: str, output: TextIO) -> int:
+    """
+    Convert a binary log to JSONL, one entry per line.
+
+    Returns:
+        int: The number of entries written.
+    """
+    count = 0
+    for entry in read_binary_log(path):
+        json.dump(entry, output)
+        output.write("\n")
+        count += 1
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Convert binary status logs (*.mx3log) to JSONL."
+    )
+    parser.add_argument("paths", nargs="+", help="Binary log files to convert.")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Write to this file instead of stdout.",
+    )
+    args = parser.parse_args()
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for path in args.paths:
+            convert_to_jsonl(path, output)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
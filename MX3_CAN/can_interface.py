@@ -12,27 +12,36 @@ class CANInterface:
     Args:
         channel (str): The name of the CAN bus interface (e.g. 'can0').
         bitrate (int): The bitrate of the CAN bus (e.g. 500000).
+        interface (str): The python-can interface (e.g. 'socketcan').
 
     Attributes:
         channel (str): The name of the CAN bus interface.
         bitrate (int): The bitrate of the CAN bus.
+        interface (str): The python-can interface.
         bus (can.BusABC): The CAN bus interface.
+        acceptance_filters (dict[str, list[dict]]): The CAN filters each
+            active component (discovery, status listener, ...) has asked for.
+            The kernel receives their union; with no component registered,
+            every frame is accepted.
     """
 
-    def __init__(self, channel="can0", bitrate=BITRATE):
+    def __init__(self, channel="can0", bitrate=BITRATE, interface="socketcan"):
         """
         Initialize a CAN bus interface.
 
         Args:
             channel (str): The name of the CAN bus interface.
             bitrate (int): The bitrate of the CAN bus.
+            interface (str): The python-can interface.
 
         Returns:
             None
         """
         self.channel = channel
         self.bitrate = bitrate
+        self.interface = interface
         self.bus = None
+        self.acceptance_filters = {}
 
     def bring_up(self) -> can.BusABC:
         """
@@ -42,18 +51,69 @@ class CANInterface:
         Returns:
             can.BusABC: The CAN bus object.
         """
-        # Bring down the CAN interface
-        self._bring_interface_down()
+        if self.manages_link:
+            # Bring down the CAN interface
+            self._bring_interface_down()
 
-        # Bring up the CAN interface with the specified bitrate
-        self._set_bitrate()
+            # Bring up the CAN interface with the specified bitrate
+            self._set_bitrate()
 
-        # Create and return the CAN bus object
+        # Create and return the CAN bus object, with the acceptance filters
+        # of the components registered so far installed in the kernel
         self.bus = can.Bus(
-            interface="socketcan", channel=self.channel, bitrate=self.bitrate
+            interface=self.interface,
+            channel=self.channel,
+            bitrate=self.bitrate,
+            can_filters=self._combined_filters(),
         )
         return self.bus
 
+    @property
+    def manages_link(self) -> bool:
+        """
+        Whether bring_up() and shutdown() configure the link with `ip link`.
+
+        Virtual CAN links (vcan, e.g. a controller simulator's bus) and
+        non-SocketCAN interfaces have no bitrate to set.
+        """
+        return self.interface == "socketcan" and not self.channel.startswith("vcan")
+
+    def set_acceptance_filters(self, owner: str, can_filters: list[dict]) -> None:
+        """
+        Register the frames a component is waiting for and update the bus.
+
+        Args:
+            owner (str): Name of the component, e.g. "discovery".
+            can_filters (list[dict]): python-can filter dictionaries with
+                "can_id", "can_mask" and "extended" keys.
+        """
+        self.acceptance_filters[owner] = list(can_filters)
+        self._apply_filters()
+
+    def clear_acceptance_filters(self, owner: str) -> None:
+        """
+        Drop a component's acceptance filters and update the bus.
+
+        Args:
+            owner (str): Name the component registered its filters under.
+        """
+        if self.acceptance_filters.pop(owner, None) is not None:
+            self._apply_filters()
+
+    def _combined_filters(self) -> list[dict] | None:
+        """Return the union of all registered filters, or None for no filtering."""
+        combined = [
+            can_filter
+            for can_filters in self.acceptance_filters.values()
+            for can_filter in can_filters
+        ]
+        return combined or None
+
+    def _apply_filters(self) -> None:
+        """Install the combined filters on the open bus, if there is one."""
+        if self.bus:
+            self.bus.set_filters(self._combined_filters())
+
     def _bring_interface_down(self) -> None:
         """Bring down the CAN interface.
 
@@ -123,7 +183,8 @@ class CANInterface:
             self.bus = None
 
         # Bring down the CAN interface
-        subprocess.run(
-            ["sudo", "ip", "link", "set", self.channel, "down"],
-            check=True,
-        )
+        if self.manages_link:
+            subprocess.run(
+                ["sudo", "ip", "link", "set", self.channel, "down"],
+                check=True,
+            )
@@ -0,0 +1,310 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, wait
+
+import can
+
+from MX3_CAN.config_yaml import CONFIG_CLIENT, CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.messages import SendMessage
+from MX3_CAN.reassembly import create_reassembler
+
+logger = logging.getLogger(__name__)
+
+# Bits 11-8 (the replying node) are left out of the reply filters, so one
+# filter per message type accepts replies from every node
+ANY_SOURCE_NODE_MASK = 0x1FFFF0FF
+
+
+class _PendingRead:
+    """One configuration read, queued or in flight."""
+
+    __slots__ = ("node", "parameter", "future", "attempts", "deadline")
+
+    def __init__(self, node: int, parameter: int) -> None:
+        self.node = node
+        self.parameter = parameter
+        self.future: Future = Future()
+        self.attempts = 0
+        # time.monotonic() after which the request in flight counts as lost
+        self.deadline = None
+
+
+class ConfigClient(can.Listener):
+    """
+    Pipelined Config_Read_Request with request/response correlation.
+
+    Each read is a Config_Read_Request [parameter] to a node of
+    `dest_module`; the reply, a Config_Response (or Config_Write)
+    [parameter, value...] from that node, or its reassembled _Ext form,
+    completes the read's future with the value bytes. Reads are keyed by
+    (node, parameter):
+
+    - at most `max_in_flight` requests are outstanding at a time; further
+      reads wait in a queue and go out as replies come in, so a full dump
+      is one pipelined round rather than a send-and-wait per parameter,
+    - a read of a key that is already pending returns the same future,
+    - a request without a reply within `timeout` seconds is resent, up to
+      `retries` times, after which the future fails with TimeoutError.
+
+    Register the client with the Notifier (it is a can.Listener) and call
+    start() to run the timeout thread; Notifier.stop() stops it again.
+
+    Args:
+        canbus (can.BusABC): The bus to send requests on.
+        node_id (int): This device's node ID.
+        max_in_flight (int): Requests outstanding at most.
+        timeout (float): Seconds to wait for each reply.
+        retries (int): Times a request is resent before it fails.
+        local_module (str, optional): Module type of this device.
+        dest_module (str, optional): Module type of the nodes read from.
+    """
+
+    def __init__(
+        self,
+        canbus: can.BusABC,
+        node_id: int,
+        max_in_flight: int = 8,
+        timeout: float = 0.2,
+        retries: int = 2,
+        local_module: str = "Status_Screen",
+        dest_module: str = "Controller",
+    ) -> None:
+        self.canbus = canbus
+        self.node_id = node_id
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.retries = retries
+        self.local_module = MODULE_TYPE[local_module]
+        self.dest_module = MODULE_TYPE[dest_module]
+        self.reassembler = create_reassembler()
+        self.reply_types = {
+            CONTROLLER_MESSAGE_TYPE["Config_Response"]: False,
+            CONTROLLER_MESSAGE_TYPE["Config_Write"]: False,
+            CONTROLLER_MESSAGE_TYPE["Config_Response_Ext"]: True,
+            CONTROLLER_MESSAGE_TYPE["Config_Write_Ext"]: True,
+        }
+
+        self.requests_sent = 0
+        self.requests_retried = 0
+        self.reads_failed = 0
+        self.replies_unmatched = 0
+        self._senders: dict[int, SendMessage] = {}
+        self._queued: deque[_PendingRead] = deque()
+        self._in_flight: dict[tuple[int, int], _PendingRead] = {}
+        self._pending: dict[tuple[int, int], _PendingRead] = {}
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    @property
+    def can_filters(self) -> list[dict]:
+        """Acceptance filters for replies addressed to this device."""
+        return [
+            {
+                "can_id": (message_type << 16)
+                | (self.dest_module << 12)
+                | (self.local_module << 4)
+                | self.node_id,
+                "can_mask": ANY_SOURCE_NODE_MASK,
+                "extended": True,
+            }
+            for message_type in self.reply_types
+        ]
+
+    def start(self) -> None:
+        """Start the thread that times out and resends requests."""
+        with self._condition:
+            self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="config-client", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the timeout thread and cancel every pending read."""
+        with self._condition:
+            self._stopped = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._queued.clear()
+            self._in_flight.clear()
+            self._condition.notify()
+        for read in pending:
+            read.future.cancel()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def read(self, parameter: int, node: int = 0x0) -> Future:
+        """
+        Read one configuration parameter.
+
+        Returns:
+            Future: Resolves to the value bytes of the reply.
+        """
+        return self.read_many([parameter], node)[parameter]
+
+    def read_many(self, parameters: list[int], node: int = 0x0) -> dict[int, Future]:
+        """
+        Queue reads of several parameters of one node.
+
+        The first `max_in_flight` requests go out at once, in one batch.
+
+        Returns:
+            dict[int, Future]: Parameter -> future of its value bytes.
+        """
+        futures = {}
+        with self._condition:
+            for parameter in parameters:
+                key = (node, parameter)
+                read = self._pending.get(key)
+                if read is None:
+                    read = self._pending[key] = _PendingRead(node, parameter)
+                    self._queued.append(read)
+                futures[parameter] = read.future
+            batch = self._fill_window(time.monotonic())
+            self._condition.notify()
+        self._send(batch)
+        return futures
+
+    def dump(
+        self, parameters: list[int], node: int = 0x0, timeout: float | None = None
+    ) -> dict[int, bytes]:
+        """
+        Read several parameters and wait for every reply.
+
+        Parameters that fail after their retries are left out and logged.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the whole dump.
+                Defaults to waiting until every read has completed or failed.
+
+        Returns:
+            dict[int, bytes]: Parameter -> value bytes.
+        """
+        futures = self.read_many(parameters, node)
+        wait(futures.values(), timeout=timeout)
+        values = {}
+        missing = []
+        for parameter, future in futures.items():
+            if future.done() and not future.cancelled() and not future.exception():
+                values[parameter] = future.result()
+            else:
+                missing.append(parameter)
+        if missing:
+            logger.warning(
+                "No reply from node 0x%X for parameters %s.",
+                node,
+                ", ".join(f"0x{parameter:02X}" for parameter in missing),
+            )
+        return values
+
+    def on_message_received(self, msg: can.Message) -> None:
+        arbitration_id = msg.arbitration_id
+        if arbitration_id & 0xFF != (self.local_module << 4) | self.node_id:
+            return
+        if (arbitration_id >> 12) & 0xF != self.dest_module:
+            return
+        extended = self.reply_types.get((arbitration_id >> 16) & 0x1FFF)
+        if extended is None:
+            return
+        payload = self.reassembler.feed(msg) if extended else msg.data
+        if not payload:
+            return
+
+        key = ((arbitration_id >> 8) & 0xF, payload[0])
+        with self._condition:
+            read = self._in_flight.pop(key, None)
+            if read is None:
+                # Late reply to a read that was retried or failed, or a
+                # write we did not ask for
+                self.replies_unmatched += 1
+                return
+            del self._pending[key]
+            batch = self._fill_window(time.monotonic())
+            self._condition.notify()
+        read.future.set_result(bytes(payload[1:]))
+        self._send(batch)
+
+    def _fill_window(self, now: float) -> list[_PendingRead]:
+        """Move queued reads in flight while there is room; call locked."""
+        batch = []
+        while self._queued and len(self._in_flight) < self.max_in_flight:
+            read = self._queued.popleft()
+            read.attempts += 1
+            read.deadline = now + self.timeout
+            self._in_flight[(read.node, read.parameter)] = read
+            batch.append(read)
+        return batch
+
+    def _send(self, batch: list[_PendingRead]) -> None:
+        """Send the requests for a batch, grouped by node."""
+        by_node: dict[int, list[list[int]]] = {}
+        for read in batch:
+            by_node.setdefault(read.node, []).append([read.parameter])
+        for node, payloads in by_node.items():
+            sender = self._senders.get(node)
+            if sender is None:
+                sender = self._senders[node] = SendMessage(
+                    message_type=CONTROLLER_MESSAGE_TYPE["Config_Read_Request"],
+                    node_id=self.node_id,
+                    module_type=self.local_module,
+                    dest_module=self.dest_module,
+                    dest_node=node,
+                    prepared=True,
+                )
+            # Requests that fail to send time out and are resent
+            self.requests_sent += sender.send_many(self.canbus, payloads)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                failed = []
+                for key, read in list(self._in_flight.items()):
+                    if read.deadline > now:
+                        continue
+                    del self._in_flight[key]
+                    if read.attempts > self.retries:
+                        del self._pending[key]
+                        failed.append(read)
+                    else:
+                        self.requests_retried += 1
+                        # Retries go ahead of reads not yet sent
+                        self._queued.appendleft(read)
+                batch = self._fill_window(now)
+                if not batch and not failed:
+                    deadlines = [read.deadline for read in self._in_flight.values()]
+                    self._condition.wait(
+                        max(min(deadlines) - now, 0.0) if deadlines else None
+                    )
+                    continue
+                self.reads_failed += len(failed)
+
+            for read in failed:
+                read.future.set_exception(
+                    TimeoutError(
+                        f"No reply from node 0x{read.node:X} for parameter "
+                        f"0x{read.parameter:02X} after {read.attempts} requests."
+                    )
+                )
+            self._send(batch)
+
+
+def create_config_client(
+    canbus: can.BusABC, node_id: int, settings: dict = CONFIG_CLIENT
+) -> ConfigClient:
+    """Create and start a config client with the CONFIG_CLIENT settings."""
+    client = ConfigClient(
+        canbus,
+        node_id,
+        max_in_flight=settings.get("MAX_IN_FLIGHT", 8),
+        timeout=settings.get("TIMEOUT", 0.2),
+        retries=settings.get("RETRIES", 2),
+    )
+    client.start()
+    return client
@@ -52,3 +52,15 @@ PROXIMITY_SYNC_RATE = MCP2515_CONFIG["PROXIMITY_SYNC_RATE"]
 ENABLED_STATUS = MCP2515_CONFIG["ENABLED_STATUS"]
 LOCATOR_FAILURE_TYPES = MCP2515_CONFIG["LOCATOR_FAILURE_TYPES"]
 LOCATOR_UPDATE_TYPES = MCP2515_CONFIG["LOCATOR_UPDATE_TYPES"]
+
+STATUS_PARAMETERS = MCP2515_CONFIG["STATUS_PARAMETERS"]
+ERROR_PARAMETERS = MCP2515_CONFIG.get("ERROR_PARAMETERS") or {}
+STATUS_LOG = MCP2515_CONFIG.get("STATUS_LOG", {})
+RAW_RECORDER = MCP2515_CONFIG.get("RAW_RECORDER", {})
+INSTRUMENTATION = MCP2515_CONFIG.get("INSTRUMENTATION", {})
+METRICS = MCP2515_CONFIG.get("METRICS", {})
+EXT_REASSEMBLY = MCP2515_CONFIG.get("EXT_REASSEMBLY", {})
+ERROR_LOG = MCP2515_CONFIG.get("ERROR_LOG", {})
+STATUS_POLLING = MCP2515_CONFIG.get("STATUS_POLLING", {})
+CONFIG_CLIENT = MCP2515_CONFIG.get("CONFIG_CLIENT", {})
+NODE_LEASE = MCP2515_CONFIG.get("NODE_LEASE", {})
@@ -0,0 +1,418 @@
+import argparse
+import heapq
+import logging
+import random
+import re
+import threading
+import time
+import urllib.request
+from collections import Counter
+
+import can
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.message_parser import PARSERS
+
+logger = logging.getLogger(__name__)
+
+CONTROLLER = MODULE_TYPE["Controller"]
+
+# Status_Read_Request payload asking for every parameter code at once
+ALL_CODES = 0x00
+
+# One sample of the device's per-code frame counter, from its /metrics page
+_FRAMES_SAMPLE = re.compile(
+    r'^mx3_status_frames_total\{code="(0x[0-9A-Fa-f]+)"\} (\d+)'
+)
+
+
+class SimulatedNode:
+    """
+    What the simulated controller knows about one device.
+
+    Attributes:
+        uid (list[int]): The device's Unique ID.
+        module_type (int): The device's module type.
+        node_id (int): The node ID the controller assigned.
+        last_heartbeat (float | None): time.monotonic() of the last Heartbeat.
+        heartbeats (int): Heartbeats received.
+        reporting (bool): Whether the device asked for status reports.
+        reports_sent (int): Status reports sent to the device, for checking
+            what it received and decoded against.
+        reports_by_code (Counter[int]): The same, per parameter code.
+        payloads (dict[int, bytearray]): Current status payload per code.
+    """
+
+    def __init__(self, uid: list[int], module_type: int, node_id: int) -> None:
+        self.uid = uid
+        self.module_type = module_type
+        self.node_id = node_id
+        self.last_heartbeat = None
+        self.heartbeats = 0
+        self.reporting = False
+        self.reports_sent = 0
+        self.reports_by_code = Counter()
+        self.payloads = {}
+
+    @property
+    def status_arbitration_id(self) -> int:
+        """Arbitration ID of the Device_Status_Report frames sent to this node."""
+        return (
+            (CONTROLLER_MESSAGE_TYPE["Device_Status_Report"] << 16)
+            | (CONTROLLER << 12)
+            | (self.module_type << 4)
+            | self.node_id
+        )
+
+
+class ControllerSimulator:
+    """
+    A simulated IntelliZone controller on any python-can bus (virtual, vcan).
+
+    - Node_Discovery is answered with a Config_Write assigning a node ID,
+      in the format wait_for_configuration_write() expects. A UID that
+      rediscovers keeps its node ID.
+    - Heartbeats are tracked per node; a node whose heartbeats stop for
+      `heartbeat_timeout` seconds gets no more status reports until they
+      resume, and is counted in `heartbeats_lost`.
+    - Status_Read_Request [code] is answered with one report for that code,
+      and [0x00] with one report per code in `rates`; after the first
+      request the node receives reports for every code in `rates`.
+    - Config_Read_Request [parameter] is answered with a Config_Response
+      [parameter, value...] from `config`; unknown parameters get no reply.
+    - Each report changes one random payload byte with probability
+      `change_probability`, otherwise it repeats the last payload.
+
+    Args:
+        bus (can.BusABC): The bus to simulate the controller on.
+        rates (dict[int, float], optional): Reports per second for each
+            parameter code. Defaults to `rate` for every code in PARSERS.
+        rate (float): Default reports per second per code.
+        change_probability (float): Chance that a report differs from the
+            previous one for that code.
+        heartbeat_timeout (float): Seconds without a Heartbeat before a node
+            is considered lost.
+        seed (int, optional): Seed for reproducible payloads.
+        config (dict[int, list[int]], optional): Configuration value bytes
+            per parameter.
+    """
+
+    def __init__(
+        self,
+        bus: can.BusABC,
+        rates: dict[int, float] | None = None,
+        rate: float = 1.0,
+        change_probability: float = 0.1,
+        heartbeat_timeout: float = 1.0,
+        seed: int | None = None,
+        config: dict[int, list[int]] | None = None,
+    ) -> None:
+        self.bus = bus
+        self.rates = rates if rates is not None else dict.fromkeys(PARSERS, rate)
+        self.change_probability = change_probability
+        self.heartbeat_timeout = heartbeat_timeout
+        self.random = random.Random(seed)
+        self.config = config if config is not None else {}
+        self.nodes: dict[int, SimulatedNode] = {}
+        self.lock = threading.Lock()
+
+        self.discoveries = 0
+        self.status_requests = 0
+        self.config_reads = 0
+        self.heartbeats_lost = 0
+        self.frames_sent = 0
+        self.send_errors = 0
+
+        self._handlers = {
+            CONTROLLER_MESSAGE_TYPE["Node_Discovery"]: self._on_node_discovery,
+            CONTROLLER_MESSAGE_TYPE["Heartbeat"]: self._on_heartbeat,
+            CONTROLLER_MESSAGE_TYPE["Status_Read_Request"]: self._on_status_request,
+            CONTROLLER_MESSAGE_TYPE["Config_Read_Request"]: self._on_config_read,
+        }
+        self._notifier = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Start answering requests and sending status reports."""
+        self._stopped.clear()
+        self._notifier = can.Notifier(self.bus, [self.on_message_received], timeout=0.1)
+        self._thread = threading.Thread(
+            target=self._report_loop, name="controller-sim", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the simulator; the bus is left open."""
+        self._stopped.set()
+        if self._notifier:
+            self._notifier.stop()
+            self._notifier = None
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def on_message_received(self, msg: can.Message) -> None:
+        arbitration_id = msg.arbitration_id
+        # Only frames addressed to the controller (node 0)
+        if (arbitration_id >> 4) & 0xF != CONTROLLER or arbitration_id & 0xF:
+            return
+        handler = self._handlers.get((arbitration_id >> 16) & 0x1FFF)
+        if handler:
+            handler((arbitration_id >> 12) & 0xF, (arbitration_id >> 8) & 0xF, msg.data)
+
+    def _on_node_discovery(self, module_type: int, node_id: int, data) -> None:
+        uid = list(data[:4])
+        if len(uid) < 4:
+            return
+        with self.lock:
+            node = next((node for node in self.nodes.values() if node.uid == uid), None)
+            if node is None:
+                free = [n for n in range(1, 0xF) if n not in self.nodes]
+                if not free:
+                    logger.warning("No free node ID for UID %s.", uid)
+                    return
+                node = self.nodes[free[0]] = SimulatedNode(uid, module_type, free[0])
+            self.discoveries += 1
+        # Config_Write to the temporary node ID the device discovered with
+        self._send(
+            (CONTROLLER_MESSAGE_TYPE["Config_Write"] << 16)
+            | (CONTROLLER << 12)
+            | (module_type << 4)
+            | node_id,
+            [0x00, *uid, node.node_id],
+        )
+
+    def _on_heartbeat(self, module_type: int, node_id: int, data) -> None:
+        node = self.nodes.get(node_id)
+        if node:
+            node.last_heartbeat = time.monotonic()
+            node.heartbeats += 1
+
+    def _on_status_request(self, module_type: int, node_id: int, data) -> None:
+        node = self.nodes.get(node_id)
+        if node is None:
+            return
+        self.status_requests += 1
+        node.reporting = True
+        requested = data[0] if data else ALL_CODES
+        if requested == ALL_CODES:
+            for parameter_code in self.rates:
+                self._send_report(node, parameter_code, change=False)
+        elif requested in PARSERS:
+            self._send_report(node, requested, change=False)
+
+    def _on_config_read(self, module_type: int, node_id: int, data) -> None:
+        if not data or data[0] not in self.config:
+            return
+        self.config_reads += 1
+        self._send(
+            (CONTROLLER_MESSAGE_TYPE["Config_Response"] << 16)
+            | (CONTROLLER << 12)
+            | (module_type << 4)
+            | node_id,
+            [data[0], *self.config[data[0]]],
+        )
+
+    def _alive(self, node: SimulatedNode, now: float) -> bool:
+        return (
+            node.last_heartbeat is not None
+            and now - node.last_heartbeat < self.heartbeat_timeout
+        )
+
+    def _payload(self, node: SimulatedNode, parameter_code: int, change: bool):
+        payload = node.payloads.get(parameter_code)
+        if payload is None:
+            size = PARSERS[parameter_code].size
+            payload = bytearray(self.random.randbytes(size))
+            payload[0] = parameter_code
+            node.payloads[parameter_code] = payload
+        elif change and len(payload) > 1:
+            payload[self.random.randrange(1, len(payload))] = self.random.randrange(256)
+        return payload
+
+    def _send_report(self, node: SimulatedNode, parameter_code: int, change: bool):
+        change = change and self.random.random() < self.change_probability
+        if self._send(
+            node.status_arbitration_id, self._payload(node, parameter_code, change)
+        ):
+            node.reports_sent += 1
+            node.reports_by_code[parameter_code] += 1
+
+    def _report_loop(self) -> None:
+        """Send each parameter code at its rate, on a fixed schedule."""
+        now = time.monotonic()
+        schedule = [
+            (now + 1.0 / rate, 1.0 / rate, code)
+            for code, rate in self.rates.items()
+            if rate > 0
+        ]
+        heapq.heapify(schedule)
+        lost = set()
+        while schedule and not self._stopped.is_set():
+            due, period, code = schedule[0]
+            delay = due - time.monotonic()
+            if delay > 0 and self._stopped.wait(delay):
+                break
+            heapq.heapreplace(schedule, (due + period, period, code))
+
+            now = time.monotonic()
+            for node in tuple(self.nodes.values()):
+                if not node.reporting:
+                    continue
+                if not self._alive(node, now):
+                    if node.node_id not in lost:
+                        lost.add(node.node_id)
+                        self.heartbeats_lost += 1
+                        logger.info(
+                            "Node 0x%X stopped sending heartbeats.", node.node_id
+                        )
+                    continue
+                lost.discard(node.node_id)
+                self._send_report(node, code, change=True)
+
+    def _send(self, arbitration_id: int, data) -> bool:
+        try:
+            self.bus.send(
+                can.Message(
+                    arbitration_id=arbitration_id, data=data, is_extended_id=True
+                )
+            )
+            self.frames_sent += 1
+            return True
+        except can.CanError as error:
+            self.send_errors += 1
+            logger.debug("Simulator send failed: %s", error)
+            return False
+
+
+def frame_loss(sent_by_code: Counter, received_by_code) -> dict[int, tuple[int, int]]:
+    """
+    Compare the status reports sent with those a device received.
+
+    Args:
+        sent_by_code (Counter[int]): Reports sent per parameter code, e.g.
+            SimulatedNode.reports_by_code.
+        received_by_code: Reports received per code, indexable by code:
+            StatusListener.frames_by_code or read_device_frames().
+
+    Returns:
+        dict[int, tuple[int, int]]: Code -> (sent, lost), for every code sent.
+    """
+    return {
+        code: (sent, sent - received_by_code[code])
+        for code, sent in sorted(sent_by_code.items())
+    }
+
+
+def read_device_frames(metrics_url: str, timeout: float = 1.0) -> Counter:
+    """Read a device's mx3_status_frames_total counters from its /metrics page."""
+    with urllib.request.urlopen(metrics_url, timeout=timeout) as response:
+        text = response.read().decode()
+    received = Counter()
+    for line in text.splitlines():
+        match = _FRAMES_SAMPLE.match(line)
+        if match:
+            received[int(match[1], 16)] = int(match[2])
+    return received
+
+
+def format_frame_loss(loss: dict[int, tuple[int, int]]) -> str:
+    """Summarise frame_loss() as one log line, naming the worst codes."""
+    total_sent = sum(sent for sent, _ in loss.values())
+    total_lost = sum(lost for _, lost in loss.values())
+    if not total_sent:
+        return "none sent"
+    summary = f"lost {total_lost}/{total_sent} ({total_lost / total_sent:.2%})"
+    worst = sorted(
+        (item for item in loss.items() if item[1][1]), key=lambda item: -item[1][1]
+    )
+    if worst:
+        summary += ", most on " + ", ".join(
+            f"0x{code:02X} {lost}/{sent}" for code, (sent, lost) in worst[:3]
+        )
+    return summary
+
+
+def parse_rate(value: str) -> tuple[int, float]:
+    """Parse CODE=RATE, e.g. 0x10=50."""
+    code, rate = value.split("=")
+    return int(code, 0), float(rate)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulated IntelliZone controller.")
+    parser.add_argument(
+        "--interface", default="socketcan", help="python-can interface."
+    )
+    parser.add_argument("--channel", default="vcan0", help="Channel to simulate on.")
+    parser.add_argument(
+        "--rate", type=float, default=1.0, help="Reports per second per code."
+    )
+    parser.add_argument(
+        "--code-rate",
+        type=parse_rate,
+        action="append",
+        default=[],
+        metavar="CODE=RATE",
+        help="Rate for one parameter code, e.g. 0x10=50 (repeatable).",
+    )
+    parser.add_argument(
+        "--change-probability",
+        type=float,
+        default=0.1,
+        help="Chance that a report differs from the previous one.",
+    )
+    parser.add_argument("--seed", type=int, help="Seed for reproducible payloads.")
+    parser.add_argument(
+        "--metrics-url",
+        help="The device's metrics page (METRICS in config.yaml), e.g. "
+        "http://127.0.0.1:9108/metrics, to report frame loss against; "
+        "assumes one device on the bus.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+
+    rates = dict.fromkeys(PARSERS, args.rate)
+    rates.update(args.code_rate)
+    bus = can.Bus(interface=args.interface, channel=args.channel)
+    simulator = ControllerSimulator(
+        bus, rates, change_probability=args.change_probability, seed=args.seed
+    )
+    simulator.start()
+    logger.info("Simulating a controller on %s. Press Ctrl+C to exit.", args.channel)
+    try:
+        while True:
+            time.sleep(5)
+            logger.info(
+                "Nodes %d, frames sent %d, send errors %d, heartbeats lost %d",
+                len(simulator.nodes),
+                simulator.frames_sent,
+                simulator.send_errors,
+                simulator.heartbeats_lost,
+            )
+            if args.metrics_url:
+                sent = sum(
+                    (node.reports_by_code for node in simulator.nodes.values()),
+                    Counter(),
+                )
+                try:
+                    received = read_device_frames(args.metrics_url)
+                except OSError as error:
+                    logger.warning("Could not read device metrics: %s", error)
+                    continue
+                # Reports still in flight count as lost in this snapshot
+                logger.info(
+                    "Status reports %s", format_frame_loss(frame_loss(sent, received))
+                )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+        bus.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import datetime
+import json
+import logging
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import Executor
+
+from MX3_CAN.config_yaml import ERROR_LOG, MODULE_TYPE
+from MX3_CAN.message_parser import ERROR_PARSERS, StatusDecoder, count_parse_error
+from MX3_CAN.status_log import CLOCK, DailyRotatingLogger
+from MX3_CAN.status_store import StatusField, render_changes
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorEvent:
+    """
+    One decoded Device_Error_Report.
+
+    Attributes:
+        timestamp (datetime.datetime): When it was received (local time).
+        received (float): The frame's kernel receive time (msg.timestamp).
+        monotonic (float): When it was received, on the monotonic clock.
+        source_module (int): The sender's module type.
+        source_node (int): The sender's node ID.
+        code (int | None): Byte 0 of the payload, which selects the layout.
+        data (bytes): The whole payload.
+        fields (list[tuple[StatusField, int]]): The decoded fields and codes,
+            empty if the code has no layout in ERROR_PARAMETERS.
+    """
+
+    __slots__ = (
+        "timestamp",
+        "received",
+        "monotonic",
+        "source_module",
+        "source_node",
+        "code",
+        "data",
+        "fields",
+    )
+
+    def __init__(
+        self,
+        timestamp: datetime.datetime,
+        received: float,
+        source_module: int,
+        source_node: int,
+        data: bytes,
+        fields: list[tuple[StatusField, int]],
+        monotonic: float | None = None,
+    ) -> None:
+        self.timestamp = timestamp
+        self.received = received
+        self.monotonic = monotonic
+        self.source_module = source_module
+        self.source_node = source_node
+        self.code = data[0] if data else None
+        self.data = data
+        self.fields = fields
+
+    @property
+    def source(self) -> str:
+        """The sender as <module>-<node>, e.g. Controller-0."""
+        module = MODULE_TYPE.inverse.get(self.source_module, self.source_module)
+        return f"{module}-{self.source_node:X}"
+
+    def to_entry(self) -> dict:
+        """The error log entry for this report."""
+        entry = {"timestamp": self.timestamp.isoformat()}
+        if self.monotonic is not None:
+            entry["monotonic"] = round(self.monotonic, 6)
+        entry.update(
+            error={
+                "source": self.source,
+                "code": f"0x{self.code:02X}" if self.code is not None else None,
+                "data": self.data.hex(),
+            },
+            changes=render_changes(self.fields),
+        )
+        return entry
+
+
+class ErrorLog(DailyRotatingLogger):
+    """
+    Daily error log, one line per error report, written and flushed at once.
+
+    Entries keep the status log's "timestamp" and "changes" keys, so
+    log_query indexes and queries them (including --section), and add the
+    raw report:
+
+        {
+            "timestamp": "<ISO 8601 formatted timestamp>",
+            "monotonic": <monotonic receive time in seconds>,
+            "error": {"source": "Controller-0", "code": "0x01", "data": "<hex>"},
+            "changes": <decoded fields, {} if the code has no layout>
+        }
+    """
+
+    def log_error(self, event: ErrorEvent) -> None:
+        self._rotate_if_needed(event.timestamp)
+        if (
+            event.monotonic is not None
+            and self.clock.anchor is not self._written_anchor
+        ):
+            self._write_anchor()
+        line = json.dumps(event.to_entry()) + "\n"
+        self.file.write(line)
+        self.bytes_written += len(line)
+
+
+class ErrorReports:
+    """
+    Decode Device_Error_Report payloads and hand them out at once.
+
+    Error reports skip everything status reports go through: there is no
+    store, no diffing and no queue. Each report is decoded with the
+    ERROR_PARAMETERS layout for its code, passed to every subscriber on the
+    receive thread, then appended to the error log, which is opened on the
+    first error. One instance can be shared by several listeners (the bus
+    monitor shares one for every device).
+
+    Args:
+        directory (str): Where the daily error logs are written.
+        parsers (dict[int, StatusDecoder], optional): Error code -> decoder.
+        executor (Executor, optional): A single-worker executor the log
+            writes are handed to, for receive threads that must not block
+            on the disk (the asyncio event loop). Defaults to writing on the
+            receive thread.
+    """
+
+    def __init__(
+        self,
+        directory: str = os.path.join("logs", "errors"),
+        parsers: dict[int, StatusDecoder] = ERROR_PARSERS,
+        executor: Executor | None = None,
+    ) -> None:
+        self.directory = directory
+        self.parsers = parsers
+        self.executor = executor
+        # Replaced rather than mutated, so the receive thread can iterate it
+        # while another thread subscribes
+        self.subscribers: tuple[Callable[[ErrorEvent], None], ...] = ()
+        self.errors_received = 0
+        self.subscriber_errors = 0
+        self.lock = threading.Lock()
+        self._log = None
+
+    def subscribe(self, callback: Callable[[ErrorEvent], None]) -> None:
+        """Call `callback(event)` for every error report, on the receive thread."""
+        with self.lock:
+            self.subscribers = (*self.subscribers, callback)
+
+    def unsubscribe(self, callback: Callable[[ErrorEvent], None]) -> None:
+        with self.lock:
+            self.subscribers = tuple(
+                subscriber for subscriber in self.subscribers if subscriber != callback
+            )
+
+    def decode(self, payload: bytes) -> list[tuple[StatusField, int]]:
+        decoder = self.parsers.get(payload[0]) if payload else None
+        if decoder is None:
+            return []
+        try:
+            return list(zip(decoder.fields, decoder.decode(payload)))
+        except Exception as e:
+            count_parse_error()
+            logger.exception("Error parsing error report: %s", e)
+            return []
+
+    def on_error_report(
+        self, arbitration_id: int, payload: bytes, received: float = 0.0
+    ) -> ErrorEvent:
+        """
+        Decode one error report, notify the subscribers and log it.
+
+        Args:
+            arbitration_id (int): The report's arbitration ID (for the sender).
+            payload (bytes): The payload, from one frame or reassembled.
+            received (float): The kernel receive time, msg.timestamp.
+
+        Returns:
+            ErrorEvent: The decoded report.
+        """
+        monotonic = CLOCK.receive_time(received)
+        event = ErrorEvent(
+            CLOCK.wall_time(monotonic),
+            received,
+            (arbitration_id >> 12) & 0xF,
+            (arbitration_id >> 8) & 0xF,
+            payload,
+            self.decode(payload),
+            monotonic,
+        )
+        self.errors_received += 1
+        for subscriber in self.subscribers:
+            try:
+                subscriber(event)
+            except Exception:
+                self.subscriber_errors += 1
+                logger.exception("Error report subscriber %r failed.", subscriber)
+
+        if self.executor is None:
+            self._write(event)
+        else:
+            self.executor.submit(self._write, event)
+        return event
+
+    def _write(self, event: ErrorEvent) -> None:
+        with self.lock:
+            try:
+                if self._log is None:
+                    self._log = ErrorLog(self.directory)
+                self._log.log_error(event)
+            except OSError as error:
+                logger.warning("Failed to write error log entry: %s", error)
+
+    def close(self) -> None:
+        """Close the error log; it is reopened if another error arrives."""
+        if self.executor is not None:
+            # Queued behind the writes still pending on the executor
+            self.executor.submit(self._close).result()
+        else:
+            self._close()
+
+    def _close(self) -> None:
+        with self.lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+
+def create_error_reports(
+    settings: dict = ERROR_LOG, executor: Executor | None = None
+) -> ErrorReports:
+    """Create the error report handling configured in the ERROR_LOG section."""
+    return ErrorReports(
+        settings.get("DIRECTORY", os.path.join("logs", "errors")),
+        executor=executor,
+    )
@@ -0,0 +1,385 @@
+import datetime
+import logging
+import os
+import threading
+from array import array
+
+import can
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE, RAW_RECORDER
+from MX3_CAN.message_parser import PARSERS
+
+logger = logging.getLogger(__name__)
+
+# Flag bits kept per ring slot
+EXTENDED = 0x1
+REMOTE = 0x2
+ERROR = 0x4
+
+# Flag SocketCAN sets in the ID of error frames
+CAN_ERR_FLAG = 0x20000000
+
+# Payload bytes kept per ring slot (classic CAN)
+SLOT_DATA = 8
+
+# Default acceptance filters: every frame the controller sends (source
+# module, bits 15-12). Anything wider lets more of the bus past the kernel
+# filters for the whole process, not just for the recorder.
+CONTROLLER_FRAME_FILTERS = [
+    {"can_id": MODULE_TYPE["Controller"] << 12, "can_mask": 0xF000, "extended": True}
+]
+
+
+class StatusTrigger:
+    """
+    Fires when a status field changes to a given value.
+
+    Only Device_Status_Report frames carrying one of the field's parameter
+    codes are decoded, so every other frame costs two comparisons.
+
+    Args:
+        section (str): The status section, e.g. "Tracking_Status".
+        key (str): The field's key, e.g. "Global_Zone_Status".
+        value (str): The rendered value that fires the trigger,
+            e.g. "Shutdown/Error".
+
+    Raises:
+        ValueError: If no status field matches, or it can never render as
+            `value`.
+    """
+
+    def __init__(self, section: str, key: str, value: str) -> None:
+        self.description = f"{section}.{key} -> {value}"
+        self.parameter_codes = {}
+        for parameter_code, decoder in PARSERS.items():
+            if decoder.section == section and key in decoder.keys:
+                self.parameter_codes[parameter_code] = decoder
+                self.slot = decoder.keys.index(key)
+                field = decoder.fields[self.slot]
+        if not self.parameter_codes:
+            raise ValueError(f"No status field {section}.{key}.")
+        if field.strings is None or value not in field.strings:
+            raise ValueError(f"Status field {section}.{key} never reads '{value}'.")
+        self.code = field.strings.index(value)
+        self.last_code = None
+        self.message_type = CONTROLLER_MESSAGE_TYPE["Device_Status_Report"]
+
+    def __call__(self, msg: can.Message) -> bool:
+        """Return True if the frame moves the field to the trigger value."""
+        if (msg.arbitration_id >> 16) & 0x1FFF != self.message_type or not msg.data:
+            return False
+        decoder = self.parameter_codes.get(msg.data[0])
+        if decoder is None:
+            return False
+        code = decoder.decode(msg.data)[self.slot]
+        fired = code == self.code and self.last_code != self.code
+        self.last_code = code
+        return fired
+
+
+def format_candump(
+    timestamp: float, arbitration_id: int, flags: int, data: bytes, channel: str
+) -> str:
+    """
+    Format one frame as a `candump -l` line, which canplayer and
+    can.CanutilsLogReader read back.
+    """
+    if flags & ERROR:
+        frame_id = f"{arbitration_id | CAN_ERR_FLAG:08X}"
+    elif flags & EXTENDED:
+        frame_id = f"{arbitration_id:08X}"
+    else:
+        frame_id = f"{arbitration_id:03X}"
+    frame_data = "R" if flags & REMOTE else data.hex().upper()
+    return f"({timestamp:.6f}) {channel} {frame_id}#{frame_data}\n"
+
+
+class RotatingFrameFile:
+    """
+    candump log files that roll over by size, keeping the newest `max_files`.
+
+    Args:
+        directory (str): Where the files are written.
+        prefix (str): File name prefix; files are named
+            <prefix>-<YYYYmmdd-HHMMSS>.log after the time they were opened.
+        max_bytes (int): Start a new file once this size is reached.
+        max_files (int): Delete the oldest files beyond this many.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "frames",
+        max_bytes: int = 10 * 1024 * 1024,
+        max_files: int = 10,
+    ) -> None:
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.file = None
+        self.path = None
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, text: str) -> None:
+        """Append text, opening or rolling over the file as needed."""
+        if self.file is None or self.file.tell() >= self.max_bytes:
+            self.rollover()
+        self.file.write(text)
+
+    def rollover(self) -> None:
+        """Close the current file and open a new one."""
+        self.close()
+        name = f"{self.prefix}-{datetime.datetime.now():%Y%m%d-%H%M%S}"
+        path = os.path.join(self.directory, f"{name}.log")
+        suffix = 0
+        while os.path.exists(path):
+            suffix += 1
+            path = os.path.join(self.directory, f"{name}-{suffix}.log")
+        self.path = path
+        self.file = open(path, "w")
+        self._delete_old_files()
+
+    def _delete_old_files(self) -> None:
+        files = sorted(
+            (
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if name.startswith(f"{self.prefix}-") and name.endswith(".log")
+            ),
+            key=os.path.getmtime,
+        )
+        for path in files[: max(0, len(files) - self.max_files)]:
+            try:
+                os.remove(path)
+            except OSError as error:
+                logger.warning("Could not delete old frame log %s: %s", path, error)
+
+    def flush(self) -> None:
+        if self.file:
+            self.file.flush()
+
+    def close(self) -> None:
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class FrameRecorder(can.Listener):
+    """
+    Keep the most recent raw CAN frames and write them to candump log files.
+
+    Frames are copied into fixed, preallocated arrays (a ring of `ring_size`
+    slots), so recording a frame allocates nothing. A writer thread copies
+    frames from the ring to disk every `flush_interval` seconds:
+
+    - "continuous" mode writes every frame.
+    - "trigger" mode writes nothing until a trigger fires, then writes the
+      last `ring_size - post_trigger_frames` frames before it and the next
+      `post_trigger_frames` frames, to a new file per event. The window
+      fits in the ring, and the writer is woken as soon as it is complete,
+      but the oldest frames of the window are still overwritten if more
+      frames arrive before the writer copies them.
+
+    Frames the writer could not copy before the ring wrapped are counted in
+    `overruns`.
+
+    The recorder only sees frames its acceptance filters (and those of the
+    other listeners) let through; see `can_filters`.
+
+    Args:
+        writer (RotatingFrameFile): Where frames are written.
+        mode (str): "continuous" or "trigger".
+        ring_size (int): Number of frames kept in memory.
+        post_trigger_frames (int): Frames written after a trigger. Must be
+            less than `ring_size`.
+        triggers (list[StatusTrigger], optional): Conditions that fire a
+            trigger in "trigger" mode. trigger() can also be called directly.
+        channel (str): Channel name written to the log lines.
+        flush_interval (float): Seconds between writer passes.
+        can_filters (list[dict], optional): Acceptance filters for the frames
+            to record. Defaults to every frame the controller sends.
+    """
+
+    def __init__(
+        self,
+        writer: RotatingFrameFile,
+        mode: str = "trigger",
+        ring_size: int = 4096,
+        post_trigger_frames: int = 1024,
+        triggers: list[StatusTrigger] | None = None,
+        channel: str = "can0",
+        flush_interval: float = 1.0,
+        can_filters: list[dict] | None = None,
+    ) -> None:
+        if mode not in ("continuous", "trigger"):
+            raise ValueError(f"Unknown frame recorder mode '{mode}'.")
+        if mode == "trigger" and not 0 <= post_trigger_frames < ring_size:
+            raise ValueError("post_trigger_frames must be less than ring_size.")
+        self.writer = writer
+        self.mode = mode
+        self.size = ring_size
+        self.post_trigger_frames = post_trigger_frames
+        self.triggers = triggers or []
+        self.channel = channel
+        self.flush_interval = flush_interval
+        self.filters = (
+            can_filters if can_filters is not None else CONTROLLER_FRAME_FILTERS
+        )
+
+        self.timestamps = array("d", [0.0]) * ring_size
+        self.arbitration_ids = array("L", [0]) * ring_size
+        self.flags = bytearray(ring_size)
+        self.lengths = bytearray(ring_size)
+        self.data = bytearray(SLOT_DATA * ring_size)
+
+        # Frames recorded so far; the ring slot of frame n is n % ring_size
+        self.count = 0
+        # Frames [written, write_until) still have to be written
+        self.written = 0
+        self.write_until = None if mode == "trigger" else float("inf")
+        self.new_event = False
+        self.triggers_fired = 0
+        self.overruns = 0
+        self.lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="frame-recorder", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def can_filters(self) -> list[dict]:
+        """Acceptance filters for the frames worth recording."""
+        return self.filters
+
+    def on_message_received(self, msg: can.Message) -> None:
+        with self.lock:
+            slot = self.count % self.size
+            self.timestamps[slot] = msg.timestamp
+            self.arbitration_ids[slot] = msg.arbitration_id
+            self.flags[slot] = (
+                (EXTENDED if msg.is_extended_id else 0)
+                | (REMOTE if msg.is_remote_frame else 0)
+                | (ERROR if msg.is_error_frame else 0)
+            )
+            data = msg.data
+            if len(data) > SLOT_DATA:
+                data = data[:SLOT_DATA]
+            offset = slot * SLOT_DATA
+            self.lengths[slot] = len(data)
+            self.data[offset : offset + len(data)] = data
+            self.count += 1
+            window_complete = self.count == self.write_until
+        if window_complete:
+            # Copy the trigger window before the ring wraps past it
+            self._wake.set()
+
+        for trigger in self.triggers:
+            if trigger(msg):
+                logger.info("Frame recorder triggered: %s", trigger.description)
+                self.trigger()
+
+    def trigger(self) -> None:
+        """Write the frames in the ring and the next `post_trigger_frames`."""
+        with self.lock:
+            self.triggers_fired += 1
+            if self.mode != "trigger":
+                return
+            if self.write_until is None or self.written >= self.write_until:
+                # A new event: start a new file with the pre-trigger frames
+                pre_trigger_frames = self.size - self.post_trigger_frames
+                self.written = max(self.written, self.count - pre_trigger_frames)
+                self.new_event = True
+            self.write_until = self.count + self.post_trigger_frames
+        self._wake.set()
+
+    def _copy_pending(self) -> tuple[bool, list[tuple]]:
+        """
+        Copy the frames due to be written out of the ring, and report whether
+        they start a new trigger event.
+        """
+        with self.lock:
+            new_event, self.new_event = self.new_event, False
+            if self.write_until is None:
+                return new_event, []
+            end = min(self.count, self.write_until)
+            start = self.written
+            if start < self.count - self.size:
+                self.overruns += self.count - self.size - start
+                start = self.count - self.size
+            frames = []
+            for n in range(start, end):
+                slot = n % self.size
+                offset = slot * SLOT_DATA
+                frames.append(
+                    (
+                        self.timestamps[slot],
+                        self.arbitration_ids[slot],
+                        self.flags[slot],
+                        bytes(self.data[offset : offset + self.lengths[slot]]),
+                    )
+                )
+            self.written = max(start, end)
+            return new_event, frames
+
+    def _write_pending(self) -> None:
+        new_event, frames = self._copy_pending()
+        if new_event:
+            self.writer.rollover()
+        if frames:
+            self.writer.write(
+                "".join(
+                    format_candump(*frame, channel=self.channel) for frame in frames
+                )
+            )
+            self.writer.flush()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self._write_pending()
+            except (OSError, ValueError) as error:
+                logger.warning("Failed to write raw CAN frames: %s", error)
+
+    def stop(self) -> None:
+        """Write what is due, then stop the writer thread and close the file."""
+        self._stopped = True
+        self._wake.set()
+        self._thread.join()
+        self._write_pending()
+        self.writer.close()
+
+
+def create_frame_recorder(
+    settings: dict = RAW_RECORDER, channel: str = "can0"
+) -> FrameRecorder | None:
+    """
+    Create the raw frame recorder configured in the RAW_RECORDER section.
+
+    Returns:
+        FrameRecorder | None: The recorder, or None if it is not enabled.
+    """
+    if not settings.get("ENABLED", False):
+        return None
+    triggers = [
+        StatusTrigger(trigger["Section"], trigger["Key"], trigger["Value"])
+        for trigger in settings.get("TRIGGERS", [])
+    ]
+    return FrameRecorder(
+        RotatingFrameFile(
+            settings.get("DIRECTORY", "logs/frames"),
+            max_bytes=settings.get("MAX_FILE_BYTES", 10 * 1024 * 1024),
+            max_files=settings.get("MAX_FILES", 10),
+        ),
+        mode=settings.get("MODE", "trigger"),
+        ring_size=settings.get("RING_SIZE", 4096),
+        post_trigger_frames=settings.get("POST_TRIGGER_FRAMES", 1024),
+        triggers=triggers,
+        channel=channel,
+        flush_interval=settings.get("FLUSH_INTERVAL", 1.0),
+        can_filters=settings.get("FILTERS"),
+    )
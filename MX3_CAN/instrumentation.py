@@ -0,0 +1,143 @@
+import bisect
+import json
+import logging
+import os
+from array import array
+
+from MX3_CAN.config_yaml import INSTRUMENTATION
+
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds in seconds: 1 us to ~16 s, doubling
+BUCKET_BOUNDS = tuple(1e-6 * 2**n for n in range(25))
+
+
+class Histogram:
+    """
+    Latency histogram with fixed, doubling buckets.
+
+    record() is a bisect over 25 bounds and three additions, with no
+    allocation, so it can run for every frame. Values above the last bound
+    land in an overflow bucket.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = array("Q", [0]) * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, percent: float) -> float:
+        """Upper bound of the bucket holding the given percentile, in seconds."""
+        if not self.count:
+            return 0.0
+        target = self.count * percent / 100
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return (
+                    BUCKET_BOUNDS[bucket] if bucket < len(BUCKET_BOUNDS) else self.max
+                )
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count * 1e6 if self.count else 0.0,
+            "p50_us": self.percentile(50) * 1e6,
+            "p99_us": self.percentile(99) * 1e6,
+            "max_us": self.max * 1e6,
+            # Upper bound in microseconds -> count, empty buckets left out
+            "buckets": {
+                (
+                    f"{BUCKET_BOUNDS[n] * 1e6:g}" if n < len(BUCKET_BOUNDS) else "inf"
+                ): count
+                for n, count in enumerate(self.counts)
+                if count
+            },
+        }
+
+
+class Instrumentation:
+    """
+    Per-stage latency histograms and event counters for the receive path.
+
+    StatusListener records its stages (kernel receive to listener, lock
+    wait, parse, diff) and the status logger its own (serialization, write,
+    entry to disk). Counters count frames, drops and errors. snapshot() can
+    be called at any time from any thread; dump() writes it as JSON.
+
+    Args:
+        dump_path (str, optional): Where dump() writes by default.
+    """
+
+    def __init__(self, dump_path: str | None = None) -> None:
+        self.dump_path = dump_path
+        self.histograms: dict[str, Histogram] = {}
+        self.counters: dict[str, int] = {}
+        # Extra counters read from other objects at snapshot time, e.g. the
+        # background writer's dropped entries
+        self.sources: dict[str, tuple[object, str]] = {}
+
+    def histogram(self, stage: str) -> Histogram:
+        """Return the histogram of a stage, creating it on first use."""
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        return histogram
+
+    def count(self, counter: str, amount: int = 1) -> None:
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def watch(self, counter: str, owner: object, attribute: str) -> None:
+        """Report `owner.attribute` as a counter in every snapshot."""
+        self.sources[counter] = (owner, attribute)
+
+    def snapshot(self) -> dict:
+        counters = dict(self.counters)
+        for counter, (owner, attribute) in self.sources.items():
+            counters[counter] = getattr(owner, attribute)
+        return {
+            "counters": counters,
+            "stages": {
+                stage: histogram.to_dict()
+                for stage, histogram in list(self.histograms.items())
+            },
+        }
+
+    def dump(self, path: str | None = None) -> None:
+        """Write the snapshot as JSON, to `dump_path` unless a path is given."""
+        path = path or self.dump_path
+        if not path:
+            return
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "w") as file:
+                json.dump(self.snapshot(), file, indent=2)
+            logger.info("Wrote instrumentation to %s", path)
+        except OSError as error:
+            logger.warning("Could not write instrumentation to %s: %s", path, error)
+
+
+def create_instrumentation(settings: dict = INSTRUMENTATION) -> Instrumentation | None:
+    """
+    Create the instrumentation configured in the INSTRUMENTATION section.
+
+    Returns:
+        Instrumentation | None: None unless ENABLED is set.
+    """
+    if not settings.get("ENABLED", False):
+        return None
+    return Instrumentation(settings.get("DUMP_PATH", "logs/instrumentation.json"))
@@ -0,0 +1,470 @@
+import argparse
+import codecs
+import datetime
+import json
+import logging
+import os
+import re
+import struct
+import sys
+from collections.abc import Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Index header: magic, version, bytes of the log indexed so far
+INDEX_HEADER = struct.Struct("<8sBQ")
+INDEX_MAGIC = b"MX3LGIDX"
+INDEX_VERSION = 2
+# Index record: entry timestamp (microseconds since 1970-01-01, local time),
+# byte offset of the entry in the log, flags
+INDEX_RECORD = struct.Struct("<qQB")
+# Flag of records that point at a full-state snapshot entry
+SNAPSHOT = 0x1
+INDEX_SUFFIX = ".idx"
+
+# Log bytes between index records
+INDEX_STRIDE = 16 * 1024
+READ_SIZE = 64 * 1024
+# An unparseable entry larger than this is skipped rather than buffered
+MAX_ENTRY_SIZE = 1024 * 1024
+
+EPOCH = datetime.datetime(1970, 1, 1)
+MICROSECOND = datetime.timedelta(microseconds=1)
+_WHITESPACE = re.compile(r"\s*")
+_decoder = json.JSONDecoder()
+
+
+def to_micros(timestamp: datetime.datetime) -> int:
+    """Timestamp as an index key: microseconds since 1970 in local time."""
+    return (timestamp - EPOCH) // MICROSECOND
+
+
+def iter_log_entries(path: str, offset: int = 0) -> Iterator[tuple[int, dict]]:
+    """
+    Stream the entries of a status log with their byte offsets.
+
+    Works for one-entry-per-line JSONL and for older pretty-printed files
+    where one entry spans many lines: entries are parsed with raw_decode
+    from a buffer of at most one read plus one entry. A partial entry at the
+    end of the file (still being written) is not returned.
+
+    Args:
+        path (str): The .jsonl log file.
+        offset (int, optional): Byte offset of an entry to start from.
+
+    Yields:
+        tuple[int, dict]: The byte offset of each entry and the entry.
+    """
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as file:
+        file.seek(offset)
+        # `text` starts at byte `offset` of the file; `pos` is the parse position
+        text = ""
+        ascii_text = True
+        pos = 0
+        eof = False
+        while True:
+            pos = _WHITESPACE.match(text, pos).end()
+            try:
+                entry, end = _decoder.raw_decode(text, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    return
+                offset += _byte_length(text[:pos])
+                text = text[pos:]
+                pos = 0
+                if len(text) > MAX_ENTRY_SIZE:
+                    # Corrupt data: continue at the next entry
+                    logger.warning(
+                        "Skipping unparseable data at byte %d of %s", offset, path
+                    )
+                    pos = text.find("\n{", 1) + 1 or len(text)
+                    continue
+                chunk = file.read(READ_SIZE)
+                eof = not chunk
+                text += text_decoder.decode(chunk, final=eof)
+                ascii_text = text.isascii()
+                continue
+
+            if isinstance(entry, dict):
+                # Logs are written with ensure_ascii, so this is normally pos
+                yield offset + (pos if ascii_text else _byte_length(text[:pos])), entry
+            pos = end
+
+
+def _byte_length(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode())
+
+
+def entry_timestamp(entry: dict) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(entry["timestamp"])
+
+
+def is_status_entry(entry: dict) -> bool:
+    """
+    Whether an entry holds changes or a snapshot.
+
+    Other records, such as the clock anchors, are not in timestamp order
+    with the entries around them, so they are never indexed or compared.
+    """
+    return "changes" in entry or "snapshot" in entry
+
+
+def index_path(log_path: str) -> str:
+    return log_path + INDEX_SUFFIX
+
+
+def update_index(log_path: str, stride: int = INDEX_STRIDE) -> str:
+    """
+    Build or extend the sidecar index of a log file.
+
+    The index holds one (timestamp, byte offset) record for the first entry
+    in every `stride` bytes of the log, and one for every snapshot entry,
+    flagged SNAPSHOT; anchor records are skipped. Its header records how far
+    the log was indexed, so a growing file (today's) is only parsed from
+    there on. A log that shrank or was replaced is re-indexed from the start.
+
+    Args:
+        log_path (str): The .jsonl log file.
+        stride (int, optional): Log bytes between index records.
+
+    Returns:
+        str: The path of the index file.
+    """
+    path = index_path(log_path)
+    log_size = os.path.getsize(log_path)
+    indexed = 0
+    last_offset = None
+    mode = "wb"
+    if os.path.exists(path):
+        with open(path, "rb") as index:
+            header = index.read(INDEX_HEADER.size)
+            records = (os.path.getsize(path) - INDEX_HEADER.size) // INDEX_RECORD.size
+            if len(header) == INDEX_HEADER.size:
+                magic, version, indexed = INDEX_HEADER.unpack(header)
+                if (
+                    magic == INDEX_MAGIC
+                    and version == INDEX_VERSION
+                    and indexed <= log_size
+                ):
+                    if indexed == log_size:
+                        return path
+                    mode = "r+b"
+                    if records:
+                        index.seek(
+                            INDEX_HEADER.size + (records - 1) * INDEX_RECORD.size
+                        )
+                        _, last_offset, _ = INDEX_RECORD.unpack(
+                            index.read(INDEX_RECORD.size)
+                        )
+        if mode == "wb":
+            indexed = 0
+
+    with open(path, mode) as index:
+        if mode == "wb":
+            index.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0))
+            records = 0
+        # Drop any record written after the header was last updated
+        index.truncate(INDEX_HEADER.size + records * INDEX_RECORD.size)
+        index.seek(0, os.SEEK_END)
+
+        end = indexed
+        for offset, entry in iter_log_entries(log_path, indexed):
+            end = offset
+            if last_offset is not None and offset <= last_offset:
+                continue
+            if not is_status_entry(entry):
+                continue
+            is_snapshot = "snapshot" in entry
+            if is_snapshot or last_offset is None or offset - last_offset >= stride:
+                index.write(
+                    INDEX_RECORD.pack(
+                        to_micros(entry_timestamp(entry)),
+                        offset,
+                        SNAPSHOT if is_snapshot else 0,
+                    )
+                )
+                last_offset = offset
+        if end > indexed:
+            # Index up to the start of the last entry, which may still be
+            # followed by a partial one; the next update re-reads from there
+            index.seek(0)
+            index.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, end))
+    return path
+
+
+def find_offset(log_path: str, start: datetime.datetime) -> int:
+    """
+    Binary search the index for where entries at or after `start` begin.
+
+    Returns:
+        int: Byte offset of the last indexed entry before `start`, or 0.
+    """
+    target = to_micros(start)
+    with open(index_path(log_path), "rb") as index:
+        low = 0
+        high = (os.path.getsize(index.name) - INDEX_HEADER.size) // INDEX_RECORD.size
+        offset = 0
+        while low < high:
+            middle = (low + high) // 2
+            index.seek(INDEX_HEADER.size + middle * INDEX_RECORD.size)
+            timestamp, record_offset, _ = INDEX_RECORD.unpack(
+                index.read(INDEX_RECORD.size)
+            )
+            if timestamp < target:
+                offset = record_offset
+                low = middle + 1
+            else:
+                high = middle
+    return offset
+
+
+def log_date(log_path: str) -> datetime.date | None:
+    """The day a log file covers, from its YYYY-MM-DD file name."""
+    try:
+        return datetime.date.fromisoformat(os.path.basename(log_path)[:10])
+    except ValueError:
+        return None
+
+
+def query_log(
+    log_path: str,
+    start: datetime.datetime | None = None,
+    end: datetime.datetime | None = None,
+    sections: Iterable[str] | None = None,
+) -> Iterator[dict]:
+    """
+    Stream the entries of one log file between `start` and `end`.
+
+    The index is brought up to date first, then reading starts at the
+    indexed entry just before `start` and stops at the first entry after
+    `end`. Full-state snapshot entries are skipped; see state_at().
+
+    Args:
+        log_path (str): The .jsonl log file.
+        start (datetime.datetime, optional): Earliest entry time, inclusive.
+        end (datetime.datetime, optional): Latest entry time, inclusive.
+        sections (Iterable[str], optional): Only return changes to these
+            sections; entries without any are skipped.
+
+    Yields:
+        dict: {"timestamp": ..., "changes": {section: {key: value}}}
+    """
+    sections = set(sections) if sections else None
+    offset = 0
+    if start is not None:
+        update_index(log_path)
+        offset = find_offset(log_path, start)
+
+    for _, entry in iter_log_entries(log_path, offset):
+        if "changes" not in entry:
+            continue
+        timestamp = entry_timestamp(entry)
+        if start is not None and timestamp < start:
+            continue
+        if end is not None and timestamp > end:
+            return
+        if sections is not None:
+            changes = {
+                section: values
+                for section, values in entry["changes"].items()
+                if section in sections
+            }
+            if not changes:
+                continue
+            entry = dict(entry, changes=changes)
+        yield entry
+
+
+def query_logs(
+    log_paths: Iterable[str],
+    start: datetime.datetime | datetime.time | None = None,
+    end: datetime.datetime | datetime.time | None = None,
+    sections: Iterable[str] | None = None,
+) -> Iterator[dict]:
+    """
+    Stream the matching entries of several log files, in file name order.
+
+    `start` and `end` may be times of day (e.g. 08:40 and 09:00), which are
+    applied to each file's own date, so one query covers the same window
+    across several days.
+
+    Args:
+        log_paths (Iterable[str]): The .jsonl log files.
+        start (datetime.datetime | datetime.time, optional): Window start.
+        end (datetime.datetime | datetime.time, optional): Window end.
+        sections (Iterable[str], optional): Only return changes to these
+            sections.
+
+    Yields:
+        dict: The matching entries.
+    """
+    for log_path in sorted(log_paths, key=os.path.basename):
+        day = log_date(log_path)
+        file_start, file_end = start, end
+        if isinstance(start, datetime.time) or isinstance(end, datetime.time):
+            if day is None:
+                logger.warning("Skipping %s: no date in its name.", log_path)
+                continue
+            if isinstance(start, datetime.time):
+                file_start = datetime.datetime.combine(day, start)
+            if isinstance(end, datetime.time):
+                file_end = datetime.datetime.combine(day, end)
+        if day is not None:
+            # Skip files that cannot overlap the window
+            if (
+                file_end is not None
+                and datetime.datetime.combine(day, datetime.time()) > file_end
+            ):
+                continue
+            if file_start is not None and day < file_start.date():
+                continue
+        yield from query_log(log_path, file_start, file_end, sections)
+
+
+def find_snapshot(log_path: str, timestamp: datetime.datetime) -> int | None:
+    """
+    Find the last snapshot entry at or before `timestamp` through the index.
+
+    Returns:
+        int | None: Its byte offset, or None if the file has none that early.
+    """
+    target = to_micros(timestamp)
+    with open(index_path(log_path), "rb") as index:
+        # Binary search for the first record after `timestamp`...
+        low = 0
+        high = (os.path.getsize(index.name) - INDEX_HEADER.size) // INDEX_RECORD.size
+        while low < high:
+            middle = (low + high) // 2
+            index.seek(INDEX_HEADER.size + middle * INDEX_RECORD.size)
+            record_timestamp, _, _ = INDEX_RECORD.unpack(index.read(INDEX_RECORD.size))
+            if record_timestamp <= target:
+                low = middle + 1
+            else:
+                high = middle
+        # ...then walk back to the nearest snapshot
+        for record in range(low - 1, -1, -1):
+            index.seek(INDEX_HEADER.size + record * INDEX_RECORD.size)
+            _, offset, flags = INDEX_RECORD.unpack(index.read(INDEX_RECORD.size))
+            if flags & SNAPSHOT:
+                return offset
+    return None
+
+
+def state_at(
+    log_paths: Iterable[str], timestamp: datetime.datetime
+) -> dict[str, dict[str, str]]:
+    """
+    Reconstruct the controller status at `timestamp` from the status logs.
+
+    Starts from the nearest snapshot entry at or before `timestamp`, found
+    through the index of the newest file that has one, and applies only the
+    changes logged after it. Without any snapshot (logs written before
+    snapshots existed) every change up to `timestamp` is replayed.
+
+    Args:
+        log_paths (Iterable[str]): The .jsonl log files, e.g. a whole logs
+            directory; files dated after `timestamp` are ignored.
+        timestamp (datetime.datetime): The time to reconstruct.
+
+    Returns:
+        dict[str, dict[str, str]]: The status as {section: {key: value}}.
+    """
+    candidates = sorted(
+        (
+            path
+            for path in log_paths
+            if log_date(path) is not None and log_date(path) <= timestamp.date()
+        ),
+        key=os.path.basename,
+    )
+
+    first, offset = 0, 0
+    for position in range(len(candidates) - 1, -1, -1):
+        update_index(candidates[position])
+        snapshot_offset = find_snapshot(candidates[position], timestamp)
+        if snapshot_offset is not None:
+            first, offset = position, snapshot_offset
+            break
+
+    state = {}
+    for path in candidates[first:]:
+        for _, entry in iter_log_entries(path, offset):
+            if not is_status_entry(entry):
+                continue
+            if entry_timestamp(entry) > timestamp:
+                return state
+            if "snapshot" in entry:
+                state = {
+                    section: dict(values)
+                    for section, values in entry["snapshot"].items()
+                }
+            else:
+                for section, values in entry["changes"].items():
+                    state.setdefault(section, {}).update(values)
+        offset = 0
+    return state
+
+
+def parse_when(value: str) -> datetime.datetime | datetime.time:
+    """Parse a CLI bound: an ISO 8601 date-time, or a time of day."""
+    try:
+        return datetime.time.fromisoformat(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Query status logs by time range and section.",
+        epilog="Example: python -m MX3_CAN.log_query logs/2025-08-*.jsonl "
+        "--from 08:40 --to 09:00 --section Coil_Driver_Status",
+    )
+    parser.add_argument("paths", nargs="+", help="Log files or directories.")
+    parser.add_argument(
+        "--from",
+        dest="start",
+        type=parse_when,
+        help="Start: YYYY-MM-DDTHH:MM[:SS] or HH:MM[:SS] on every day.",
+    )
+    parser.add_argument(
+        "--to",
+        dest="end",
+        type=parse_when,
+        help="End: YYYY-MM-DDTHH:MM[:SS] or HH:MM[:SS] on every day.",
+    )
+    parser.add_argument(
+        "--section",
+        action="append",
+        help="Only show changes to this section (repeatable).",
+    )
+    parser.add_argument(
+        "--state-at",
+        type=datetime.datetime.fromisoformat,
+        help="Print the full status at YYYY-MM-DDTHH:MM[:SS] instead.",
+    )
+    args = parser.parse_args()
+
+    log_paths = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            log_paths.extend(
+                os.path.join(path, name)
+                for name in os.listdir(path)
+                if name.endswith(".jsonl")
+            )
+        else:
+            log_paths.append(path)
+
+    if args.state_at:
+        json.dump(state_at(log_paths, args.state_at), sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+
+    for entry in query_logs(log_paths, args.start, args.end, args.section):
+        json.dump(entry, sys.stdout)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,54 @@
 #!/home/matrixdesign/IntellizoneVibrationRecorder/.venv/bin/python3
 import argparse
+import asyncio
+import json
 import logging
+import signal
 import time
 
 import can
 
+from MX3_CAN.async_runtime import async_main
 from MX3_CAN.can_interface import CANInterface
 from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE, UID
+from MX3_CAN.frame_recorder import FrameRecorder, create_frame_recorder
+from MX3_CAN.instrumentation import Instrumentation, create_instrumentation
 from MX3_CAN.messages import SendMessage
+from MX3_CAN.metrics import DeviceMetrics, create_metrics_server
+from MX3_CAN.monitor import run_monitor
 from MX3_CAN.node_discovery import (
+    ConfigurationWrite,
+    expected_configuration_write,
     log_timeout_error,
+    receive_configuration_write,
     send_periodic_node_discovery,
-    wait_for_configuration_write,
 )
+from MX3_CAN.node_lease import LeaseRejectedError, create_node_lease_store
 from MX3_CAN.status_listener import StatusListener
+from MX3_CAN.status_poller import create_status_poller
 from MX3_CAN.status_request import request_controller_status
 
 # Command-line interface for verbosity
 parser = argparse.ArgumentParser(description="MX3 IntelliZone CAN Device")
 parser.add_argument("--verbose", action="store_true", help="Enable debug logging")
+parser.add_argument(
+    "--asyncio",
+    action="store_true",
+    help="Run discovery, heartbeat, polling, listening and logging on one event loop",
+)
+parser.add_argument(
+    "--monitor",
+    action="store_true",
+    help="Passively record the status of every device on the bus",
+)
+parser.add_argument(
+    "--channel",
+    default="can0",
+    help="CAN channel, e.g. vcan0 to run against python -m MX3_CAN.controller_sim",
+)
+parser.add_argument(
+    "--interface", default="socketcan", help="python-can interface for the channel"
+)
 args = parser.parse_args()
 
 logging_level = logging.DEBUG if args.verbose else logging.INFO
@@ -28,21 +58,25 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def initialize_can_interface() -> tuple[CANInterface, can.BusABC]:
+def initialize_can_interface(
+    channel: str = "can0", interface: str = "socketcan"
+) -> tuple[CANInterface, can.BusABC]:
     """
     Initialize the CAN interface and bring it up.
 
     Returns the active CAN bus interface.
     """
     # Create a CAN interface object
-    can_interface = CANInterface()
+    can_interface = CANInterface(channel, interface=interface)
     # Bring up the CAN interface
     can_bus = can_interface.bring_up()
     # Return the active CAN bus interface
     return can_interface, can_bus
 
 
-def perform_node_discovery(canbus: can.BusABC, uid: list[int]) -> int:
+def perform_node_discovery(
+    canbus: can.BusABC, uid: list[int], can_interface: CANInterface | None = None
+) -> ConfigurationWrite:
     """
     Perform node discovery.
 
@@ -54,24 +88,34 @@ def perform_node_discovery(canbus: can.BusABC, uid: list[int]) -> int:
         The active CAN bus interface.
     uid : list of int
         The device's Unique ID.
+    can_interface : CANInterface, optional
+        If given, only the Configuration Write reply is let through the
+        kernel's acceptance filters while discovery runs.
 
     Returns
     -------
-    int
-        The assigned Node ID.
+    ConfigurationWrite
+        The assigned Node ID and the controller that assigned it.
     """
+    if can_interface:
+        can_interface.set_acceptance_filters(
+            "discovery", [expected_configuration_write().build_can_filter()]
+        )
+
     # Start sending periodic Node Discovery messages
     discovery_task = send_periodic_node_discovery(canbus, uid)
     try:
         # Wait for a Configuration Write message and extract the assigned Node ID
-        node_id = wait_for_configuration_write(canbus, uid)
-        logger.info(f"Node Discovery complete. Assigned ID: 0x{node_id:X}")
-        return node_id
+        assignment = receive_configuration_write(canbus, uid)
+        logger.info(f"Node Discovery complete. Assigned ID: 0x{assignment.node_id:X}")
+        return assignment
     finally:
         # Stop sending periodic Node Discovery messages
         if discovery_task:
             discovery_task.stop()
             logger.info("Stopped periodic Node Discovery.")
+        if can_interface:
+            can_interface.clear_acceptance_filters("discovery")
 
 
 def start_heartbeat(canbus: can.BusABC, node_id: int):
@@ -106,6 +150,8 @@ def start_heartbeat(canbus: can.BusABC, node_id: int):
 def setup_status_listener(
     canbus: can.BusABC,
     node_id: int,
+    frame_recorder: FrameRecorder | None = None,
+    instrumentation: Instrumentation | None = None,
 ) -> tuple[StatusListener, can.Notifier]:
     """
     Set up a StatusListener to receive Device Status Report messages from the
@@ -118,6 +164,10 @@ def setup_status_listener(
         The active CAN bus interface.
     node_id : int
         The assigned Node ID.
+    frame_recorder : FrameRecorder, optional
+        If given, the Notifier also hands every frame to the raw recorder.
+    instrumentation : Instrumentation, optional
+        If given, the listener and its logger record per-stage timings.
 
     Returns
     -------
@@ -132,57 +182,137 @@ def setup_status_listener(
         module_type=MODULE_TYPE["Status_Screen"],
         source_module=MODULE_TYPE["Controller"],
         source_node=0x0,
+        instrumentation=instrumentation,
     )
     # Create a Notifier that calls the listener when a message is received on
     # the CAN bus.
-    notifier = can.Notifier(canbus, [listener])
+    listeners = [listener]
+    if frame_recorder:
+        listeners.append(frame_recorder)
+    notifier = can.Notifier(canbus, listeners)
 
     # Return the StatusListener object and the Notifier as a tuple.
     return listener, notifier
 
 
-def main() -> None:
+def main(channel: str = "can0", interface: str = "socketcan") -> None:
     """
     Main function for the IntelliZone CAN device implementation.
 
     This function is called when the script is run directly.
+
+    Parameters
+    ----------
+    channel : str, optional
+        The CAN channel to run on.
+    interface : str, optional
+        The python-can interface of the channel.
     """
     logger.info("Starting IntelliZone CAN device implementation.")
+    instrumentation = create_instrumentation()
+    if instrumentation:
+        # `kill -USR1 <pid>` logs the current timings and counters
+        signal.signal(
+            signal.SIGUSR1,
+            lambda signum, frame: logger.info(
+                "Instrumentation: %s", json.dumps(instrumentation.snapshot())
+            ),
+        )
+    metrics = DeviceMetrics(instrumentation)
+    metrics_server = create_metrics_server(metrics)
+    lease_store = create_node_lease_store()
 
     while True:
         can_notifier = None
         can_interface = None
         heartbeat_task = None
         status_listener = None
+        status_poller = None
+        frame_recorder = None
         can_bus = None
 
         try:
             # 1. Initialize CAN
-            can_interface, can_bus = initialize_can_interface()
+            can_interface, can_bus = initialize_can_interface(channel, interface)
             logger.info("Initialized CAN bus interface.")
 
-            # 2. Node discovery (may raise TimeoutError)
-            node_id = perform_node_discovery(can_bus, UID)
-            logger.info(f"Assigned Node ID: 0x{node_id:X}")
+            # 2. Node discovery (may raise TimeoutError), unless a persisted
+            # lease lets us resume with the node ID we had
+            lease = (
+                lease_store.load(UID, can_interface.channel) if lease_store else None
+            )
+            if lease:
+                node_id = lease.node_id
+                logger.info(f"Resuming leased Node ID: 0x{node_id:X}")
+            else:
+                metrics.discovery_attempts += 1
+                assignment = perform_node_discovery(can_bus, UID, can_interface)
+                node_id = assignment.node_id
+                logger.info(f"Assigned Node ID: 0x{node_id:X}")
+                if lease_store:
+                    try:
+                        lease_store.save(
+                            UID,
+                            node_id,
+                            can_interface.channel,
+                            assignment.controller_module,
+                            assignment.controller_node,
+                        )
+                    except OSError as error:
+                        logger.warning("Could not persist node ID lease: %s", error)
 
             # 3. Heartbeat
             heartbeat_task = start_heartbeat(can_bus, node_id)
+            metrics.heartbeat_task = heartbeat_task
             logger.info("Started periodic heartbeat task.")
 
             # 4. Listener + notifier
-            status_listener, can_notifier = setup_status_listener(can_bus, node_id)
+            frame_recorder = create_frame_recorder(channel=can_interface.channel)
+            status_listener, can_notifier = setup_status_listener(
+                can_bus, node_id, frame_recorder, instrumentation
+            )
+            metrics.status_listener = status_listener
+            can_interface.set_acceptance_filters(
+                "status_listener", status_listener.can_filters
+            )
+            if frame_recorder:
+                # Also the controller frames the listener does not decode
+                can_interface.set_acceptance_filters(
+                    "frame_recorder", frame_recorder.can_filters
+                )
             logger.info("Set up status listener and Notifier.")
 
-            # 5. Status request loop
-            request_controller_status(can_bus, node_id, status_listener)
+            # 5. Status request loop; a leased ID must be answered quickly
+            if lease:
+                if not request_controller_status(
+                    can_bus,
+                    node_id,
+                    status_listener,
+                    timeout=lease_store.verify_timeout,
+                ):
+                    raise LeaseRejectedError(
+                        f"No reply to leased Node ID 0x{node_id:X}."
+                    )
+                logger.info("Controller accepted the leased Node ID.")
+            else:
+                request_controller_status(can_bus, node_id, status_listener)
             logger.info("Sending periodic status requests to the controller.")
+            status_poller = create_status_poller(can_bus, node_id, status_listener)
+            metrics.status_poller = status_poller
 
             logger.info("Running... Press Ctrl+C to exit.")
             while True:
                 time.sleep(1)
 
+        except LeaseRejectedError as rejected:
+            # Rediscover right away
+            logger.warning(f"{rejected} Falling back to node discovery.")
+            lease_store.clear()
+            continue
+
         except TimeoutError as timeout_error:
             # Handle node discovery timeouts
+            metrics.discovery_timeouts += 1
             logger.warning(f"TimeoutError: {timeout_error}. Restarting in 5 seconds...")
             log_timeout_error(f"TimeoutError: {timeout_error}")
             time.sleep(5)
@@ -196,6 +326,10 @@ def main() -> None:
 
         finally:
             # Clean up after any exceptions
+            metrics.end_run()
+            if status_poller:
+                status_poller.stop()
+                logger.info("Stopped status poller.")
             if can_notifier:
                 can_notifier.stop()
                 logger.info("Stopped notifier.")
@@ -204,6 +338,9 @@ def main() -> None:
                 logger.info("Stopped heartbeat task.")
             if status_listener:
                 status_listener.close_logger()
+            if frame_recorder:
+                frame_recorder.stop()
+                logger.info("Stopped raw frame recorder.")
             if can_bus:
                 try:
                     can_bus.shutdown()  # <-- NEW: Ensure raw socket is released properly
@@ -214,9 +351,17 @@ def main() -> None:
                 can_interface.shutdown()
                 logger.info("Cleaned up CAN interface.")
 
+    if metrics_server:
+        metrics_server.stop()
+
 
 if __name__ == "__main__":
     try:
-        main()
+        if args.monitor:
+            run_monitor(channel=args.channel, interface=args.interface)
+        elif args.asyncio:
+            asyncio.run(async_main(args.channel, args.interface))
+        else:
+            main(args.channel, args.interface)
     except KeyboardInterrupt:
         logging.info("Interrupted by user. Exiting...")
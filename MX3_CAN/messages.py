@@ -1,10 +1,15 @@
 import can
 import logging
+from collections.abc import Iterable
+from typing import NamedTuple
 
 from MX3_CAN.config_yaml import MODULE_TYPE
 
 logger = logging.getLogger(__name__)
 
+# Prepared frames kept per sender; payloads beyond this are built per call
+MAX_PREPARED_FRAMES = 256
+
 class SendMessage:
     def __init__(
         self,
@@ -14,6 +19,7 @@ class SendMessage:
         dest_module: int = MODULE_TYPE["Controller"],
         dest_node: int = 0x0,
         direction: str = "tx",
+        prepared: bool = False,
     ) -> None:
         """
         Construct a MatrixCAN-format message sender or receiver.
@@ -32,6 +38,12 @@ class SendMessage:
             Remote device's node ID (default is 0x0).
         direction : str, optional
             "tx" for sending, "rx" for receiving from controller (default: "tx").
+        prepared : bool, optional
+            Prepared-frame mode: the arbitration ID is computed once here and
+            `build_message()` returns the same `can.Message` object for the
+            same payload every time instead of allocating a new one. The
+            fields must not be changed afterwards, and callers must not modify
+            the returned messages (default: False).
 
         Returns
         -------
@@ -45,6 +57,12 @@ class SendMessage:
         self.dest_node = dest_node
         self.direction = direction
 
+        # Prepared frames by payload, or None when not in prepared-frame mode
+        self._frames = None
+        if prepared:
+            self._arbitration_id = self.build_arbitration_id()
+            self._frames = {}
+
     def build_arbitration_id(self) -> int:
         """
         Construct a MatrixCAN arbitration ID for this message.
@@ -92,6 +110,22 @@ class SendMessage:
         else:
             raise ValueError(f"Invalid direction: {self.direction}")
 
+    def build_can_filter(self) -> dict:
+        """
+        Construct a python-can filter that accepts exactly this message.
+
+        Returns
+        -------
+        dict
+            A filter dictionary for `can_filters` / `BusABC.set_filters()`
+            matching the full 29-bit arbitration ID.
+        """
+        return {
+            "can_id": self.build_arbitration_id(),
+            "can_mask": 0x1FFFFFFF,
+            "extended": True,
+        }
+
     def build_message(self, data: list[int] | None = None) -> can.Message:
         """
         Construct a CAN message with the arbitration ID generated by
@@ -108,6 +142,9 @@ class SendMessage:
         can.Message
             The constructed CAN message.
         """
+        if self._frames is not None:
+            return self._prepared_message(data)
+
         arbitration_id = self.build_arbitration_id()
         message_data = data if data is not None else []
 
@@ -118,6 +155,39 @@ class SendMessage:
             is_extended_id=True,  # This is a MatrixCAN message
         )
 
+    def _prepared_message(self, data: list[int] | None) -> can.Message:
+        """Return the preallocated message for this payload, creating it once."""
+        key = bytes(data) if data else b""
+        message = self._frames.get(key)
+        if message is None:
+            message = can.Message(
+                arbitration_id=self._arbitration_id,
+                data=key,
+                is_extended_id=True,
+            )
+            if len(self._frames) < MAX_PREPARED_FRAMES:
+                self._frames[key] = message
+        return message
+
+    def send_many(self, bus: can.BusABC, payloads: Iterable[list[int]]) -> int:
+        """
+        Send one message per payload back to back, e.g. one request per
+        parameter code.
+
+        Parameters
+        ----------
+        bus : can.BusABC
+            The CAN bus to send on.
+        payloads : iterable of list of int
+            The data bytes of each message.
+
+        Returns
+        -------
+        int
+            The number of messages sent.
+        """
+        return send_batch(bus, (self.build_message(data) for data in payloads))
+
     def send_once(
         self, bus: can.BusABC, data: list[int] | None = None
     ) -> can.Message | None:
@@ -180,3 +250,76 @@ class SendMessage:
         except can.CanError:
             # If the send fails, return None
             return None
+
+
+def send_batch(bus: can.BusABC, messages: Iterable[can.Message]) -> int:
+    """
+    Send a burst of messages, e.g. requests to several nodes, back to back.
+
+    A failed send does not stop the burst; failures are logged once at the
+    end.
+
+    Parameters
+    ----------
+    bus : can.BusABC
+        The CAN bus to send on.
+    messages : iterable of can.Message
+        The messages to send, typically from prepared senders.
+
+    Returns
+    -------
+    int
+        The number of messages sent.
+    """
+    sent = 0
+    failed = 0
+    last_error = None
+    for message in messages:
+        try:
+            bus.send(message)
+            sent += 1
+        except can.CanError as error:
+            failed += 1
+            last_error = error
+    if failed:
+        logger.warning(
+            f"Failed to send {failed} of {sent + failed} CAN messages: {last_error}"
+        )
+    return sent
+
+
+class ArbitrationID(NamedTuple):
+    """The fields of a MatrixCAN arbitration ID, from the sender's side."""
+
+    message_type: int
+    source_module: int
+    source_node: int
+    dest_module: int
+    dest_node: int
+
+
+def decode_arbitration_id(arbitration_id: int) -> ArbitrationID:
+    """
+    Split a MatrixCAN arbitration ID into its fields.
+
+    The inverse of `SendMessage.build_arbitration_id()` for a "tx" message:
+    the sender's module type and node ID are bits 15-8, the receiver's
+    bits 7-0.
+
+    Parameters
+    ----------
+    arbitration_id : int
+        A 29-bit extended arbitration ID.
+
+    Returns
+    -------
+    ArbitrationID
+        The message type, source module and node, destination module and node.
+    """
+    return ArbitrationID(
+        (arbitration_id >> 16) & 0x1FFF,
+        (arbitration_id >> 12) & 0xF,
+        (arbitration_id >> 8) & 0xF,
+        (arbitration_id >> 4) & 0xF,
+        arbitration_id & 0xF,
+    )
@@ -0,0 +1,297 @@
+import logging
+import math
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from MX3_CAN import message_parser
+from MX3_CAN.config_yaml import METRICS
+from MX3_CAN.instrumentation import BUCKET_BOUNDS, Instrumentation
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class DeviceMetrics:
+    """
+    The device's counters and gauges in the Prometheus text format.
+
+    The main loop sets `status_listener`, `status_poller` and
+    `heartbeat_task` as it creates them, and counts discovery attempts and
+    timeouts. render() only reads attributes and never takes the listener's
+    lock, so a scrape cannot stall the CAN threads; a value may be one frame
+    out of date.
+
+    Args:
+        instrumentation (Instrumentation, optional): Its counters and stage
+            histograms are exported too.
+    """
+
+    def __init__(self, instrumentation: Instrumentation | None = None) -> None:
+        self.instrumentation = instrumentation
+        self.status_listener = None
+        self.status_poller = None
+        self.heartbeat_task = None
+        self.discovery_attempts = 0
+        self.discovery_timeouts = 0
+
+    def end_run(self) -> None:
+        """
+        Forget the heartbeat task, listener and poller of a run that ended.
+
+        Kernel-managed heartbeat tasks cannot report that they were stopped,
+        so mx3_heartbeat_up only drops to 0 through this. The discovery
+        counters are kept across runs.
+        """
+        self.heartbeat_task = None
+        self.status_listener = None
+        self.status_poller = None
+
+    def heartbeat_up(self) -> bool:
+        """Whether the heartbeat task is still sending."""
+        task = self.heartbeat_task
+        if task is None:
+            return False
+        if hasattr(task, "done"):  # asyncio.Task
+            return not task.done()
+        thread = getattr(task, "thread", None)
+        if thread is not None:  # python-can's thread-based cyclic task
+            return thread.is_alive() and not task.stopped
+        # Kernel-managed (SocketCAN BCM) tasks run until stopped
+        return not getattr(task, "stopped", False)
+
+    def render(self) -> str:
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{labels} {value}")
+
+        listener = self.status_listener
+        if listener is not None:
+            metric(
+                "mx3_status_frames_total",
+                "counter",
+                "Device_Status_Report frames received, per parameter code.",
+                [
+                    (f'{{code="0x{code:02X}"}}', count)
+                    for code, count in enumerate(list(listener.frames_by_code))
+                    if count
+                ],
+            )
+            metric(
+                "mx3_status_frames_unchanged_total",
+                "counter",
+                "Status reports that repeated the previous payload.",
+                [("", listener.frames_unchanged)],
+            )
+            last_report = listener.last_report
+            metric(
+                "mx3_seconds_since_status_report",
+                "gauge",
+                "Seconds since the last Device_Status_Report (NaN before the first).",
+                [
+                    (
+                        "",
+                        (
+                            time.monotonic() - last_report
+                            if last_report is not None
+                            else math.nan
+                        ),
+                    )
+                ],
+            )
+            status_logger = listener.logger
+            # BackgroundLogWriter and AsyncLogQueue wrap the file logger
+            file_logger = getattr(status_logger, "file_logger", status_logger)
+            if hasattr(file_logger, "bytes_written"):
+                metric(
+                    "mx3_log_bytes_written_total",
+                    "counter",
+                    "Bytes written to the status log.",
+                    [("", file_logger.bytes_written)],
+                )
+            metric(
+                "mx3_error_reports_total",
+                "counter",
+                "Device_Error_Report messages received.",
+                [("", listener.error_reports.errors_received)],
+            )
+            if hasattr(status_logger, "dropped"):
+                metric(
+                    "mx3_log_entries_dropped_total",
+                    "counter",
+                    "Status log entries dropped because the writer fell behind.",
+                    [("", status_logger.dropped)],
+                )
+
+        poller = self.status_poller
+        if poller is not None:
+            metric(
+                "mx3_section_staleness_seconds",
+                "gauge",
+                "Seconds since the last report per status section.",
+                [
+                    (f'{{section="{section}"}}', age)
+                    for section, age in poller.staleness().items()
+                    if age is not None
+                ],
+            )
+            metric(
+                "mx3_status_poll_late_replies_total",
+                "counter",
+                "Status requests whose reply came late.",
+                [("", poller.late_replies)],
+            )
+
+        metric(
+            "mx3_parse_errors_total",
+            "counter",
+            "Status payloads that could not be decoded.",
+            [("", message_parser.parse_errors)],
+        )
+        metric(
+            "mx3_heartbeat_up",
+            "gauge",
+            "1 while the heartbeat task is sending.",
+            [("", int(self.heartbeat_up()))],
+        )
+        metric(
+            "mx3_discovery_attempts_total",
+            "counter",
+            "Node discovery runs started.",
+            [("", self.discovery_attempts)],
+        )
+        metric(
+            "mx3_discovery_timeouts_total",
+            "counter",
+            "Node discovery runs that timed out.",
+            [("", self.discovery_timeouts)],
+        )
+
+        if self.instrumentation is not None:
+            self._render_instrumentation(lines)
+        return "\n".join(lines) + "\n"
+
+    def _render_instrumentation(self, lines: list[str]) -> None:
+        snapshot_counters = self.instrumentation.snapshot()["counters"]
+        for counter, value in sorted(snapshot_counters.items()):
+            lines.append(f"# TYPE mx3_instrumentation_{counter} gauge")
+            lines.append(f"mx3_instrumentation_{counter} {value}")
+
+        lines.append(
+            "# HELP mx3_stage_seconds Time spent in each receive and log stage."
+        )
+        lines.append("# TYPE mx3_stage_seconds histogram")
+        for stage, histogram in list(self.instrumentation.histograms.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKET_BOUNDS, histogram.counts):
+                cumulative += count
+                lines.append(
+                    f'mx3_stage_seconds_bucket{{stage="{stage}",le="{bound:g}"}} '
+                    f"{cumulative}"
+                )
+            lines.append(
+                f'mx3_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} '
+                f"{histogram.count}"
+            )
+            lines.append(f'mx3_stage_seconds_sum{{stage="{stage}"}} {histogram.total}')
+            lines.append(
+                f'mx3_stage_seconds_count{{stage="{stage}"}} {histogram.count}'
+            )
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        # One line per scrape would flood the log
+        pass
+
+
+class _UnixHTTPServer(socketserver.UnixStreamServer):
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ("local", 0)
+
+
+class MetricsServer:
+    """
+    Serve DeviceMetrics over HTTP on its own daemon thread.
+
+    Args:
+        metrics (DeviceMetrics): What to serve.
+        address (str): "HOST:PORT" for TCP, or "unix:PATH" for a Unix socket
+            (served as HTTP as well, e.g. curl --unix-socket PATH localhost).
+    """
+
+    def __init__(self, metrics: DeviceMetrics, address: str) -> None:
+        self.metrics = metrics
+        self.address = address
+        if address.startswith("unix:"):
+            self.socket_path = address.removeprefix("unix:")
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self.server = _UnixHTTPServer(self.socket_path, _MetricsHandler)
+        else:
+            self.socket_path = None
+            host, port = address.rsplit(":", 1)
+            self.server = HTTPServer((host, int(port)), _MetricsHandler)
+        self.server.metrics = metrics
+        self._thread = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self.server.serve_forever,
+            kwargs={"poll_interval": 0.5},
+            name="metrics-server",
+            daemon=True,
+        )
+        self._thread.start()
+        logger.info("Serving metrics on %s.", self.address)
+
+    def stop(self) -> None:
+        if self._thread:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def create_metrics_server(
+    metrics: DeviceMetrics, settings: dict = METRICS
+) -> MetricsServer | None:
+    """
+    Start the metrics endpoint configured in the METRICS section.
+
+    Returns:
+        MetricsServer | None: The running server, or None if disabled or the
+        address could not be bound (the device runs on without it).
+    """
+    if not settings.get("ENABLED", False):
+        return None
+    address = settings.get("ADDRESS", "127.0.0.1:9108")
+    try:
+        server = MetricsServer(metrics, address)
+    except OSError as error:
+        logger.warning("Could not serve metrics on %s: %s", address, error)
+        return None
+    server.start()
+    return server
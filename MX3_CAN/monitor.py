@@ -0,0 +1,206 @@
+import argparse
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+
+import can
+
+from MX3_CAN.can_interface import CANInterface
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE, STATUS_LOG
+from MX3_CAN.error_report import ErrorReports, create_error_reports
+from MX3_CAN.instrumentation import Instrumentation
+from MX3_CAN.messages import ArbitrationID, decode_arbitration_id
+from MX3_CAN.status_listener import StatusListener
+from MX3_CAN.status_log import create_status_logger
+
+logger = logging.getLogger(__name__)
+
+# Arbitration IDs remembered in the routing table; frames from IDs past this
+# are still routed, just without caching the route
+MAX_ROUTES = 4096
+
+
+class BusMonitor(can.Listener):
+    """
+    Passively record the status of every device on the bus.
+
+    Each Device_Status_Report is routed by its sender, the (module type,
+    node) pair in bits 15-8 of the arbitration ID, to a StatusListener of its
+    own, with its own store and its own log directory
+    (`directory`/<module>-<node>). Reports from one sender to several
+    receivers share the sender's store, so the copies count as unchanged.
+    Device_Error_Reports take the same route and end up in one shared error
+    log.
+
+    Routing is a single dictionary lookup on the arbitration ID. The first
+    frame with a new ID is decoded and looked up in the per-message-type
+    table, and the resulting handler (a listener's on_message_received, or a
+    no-op for message types that are not monitored) is cached for that ID.
+
+    Args:
+        directory (str): Where the per-device log directories are created.
+        settings (dict, optional): STATUS_LOG settings for each device's
+            logger; DIRECTORY is replaced per device.
+        instrumentation (Instrumentation, optional): Shared by every device's
+            listener and logger.
+        error_reports (ErrorReports, optional): Error report handling shared
+            by every device, so all errors go to one log. Defaults to the
+            ERROR_LOG settings.
+    """
+
+    def __init__(
+        self,
+        directory: str = os.path.join("logs", "monitor"),
+        settings: dict = STATUS_LOG,
+        instrumentation: Instrumentation | None = None,
+        error_reports: ErrorReports | None = None,
+    ) -> None:
+        self.directory = directory
+        self.error_reports = (
+            error_reports if error_reports is not None else create_error_reports()
+        )
+        self.settings = settings
+        self.instrumentation = instrumentation
+        self.nodes: dict[tuple[int, int], StatusListener] = {}
+        self.frames_ignored = 0
+        self._routes: dict[int, Callable[[can.Message], None]] = {}
+        self._route_builders = {
+            CONTROLLER_MESSAGE_TYPE["Device_Status_Report"]: self._status_route,
+            # Reassembled by the sender's listener
+            CONTROLLER_MESSAGE_TYPE["Device_Status_Report_Ext"]: self._status_route,
+            CONTROLLER_MESSAGE_TYPE["Device_Error_Report"]: self._status_route,
+            CONTROLLER_MESSAGE_TYPE["Device_Error_Report_Ext"]: self._status_route,
+        }
+        # Only taken when a new arbitration ID is seen
+        self._lock = threading.Lock()
+
+    @property
+    def can_filters(self) -> list[dict]:
+        """Acceptance filters for every monitored message type, from anyone."""
+        return [
+            {"can_id": message_type << 16, "can_mask": 0x1FFF << 16, "extended": True}
+            for message_type in self._route_builders
+        ]
+
+    def on_message_received(self, msg: can.Message) -> None:
+        route = self._routes.get(msg.arbitration_id)
+        if route is None:
+            route = self._add_route(msg.arbitration_id)
+        route(msg)
+
+    def _add_route(self, arbitration_id: int) -> Callable[[can.Message], None]:
+        fields = decode_arbitration_id(arbitration_id)
+        builder = self._route_builders.get(fields.message_type)
+        with self._lock:
+            route = builder(fields) if builder else self._ignore
+            if len(self._routes) < MAX_ROUTES:
+                self._routes[arbitration_id] = route
+        return route
+
+    def _ignore(self, msg: can.Message) -> None:
+        self.frames_ignored += 1
+
+    def _status_route(self, fields: ArbitrationID) -> Callable[[can.Message], None]:
+        key = (fields.source_module, fields.source_node)
+        listener = self.nodes.get(key)
+        if listener is None:
+            listener = self.nodes[key] = self._node_listener(
+                fields._replace(
+                    message_type=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"]
+                )
+            )
+            logger.info(
+                "Monitoring %s node 0x%X.",
+                MODULE_TYPE.inverse.get(fields.source_module, fields.source_module),
+                fields.source_node,
+            )
+        return listener.on_message_received
+
+    def _node_listener(self, fields: ArbitrationID) -> StatusListener:
+        module_name = MODULE_TYPE.inverse.get(
+            fields.source_module, f"module{fields.source_module}"
+        )
+        settings = dict(
+            self.settings,
+            DIRECTORY=os.path.join(
+                self.directory, f"{module_name}-{fields.source_node:X}"
+            ),
+        )
+        return StatusListener(
+            node_id=fields.dest_node,
+            expected_reply=fields.message_type,
+            module_type=fields.dest_module,
+            source_module=fields.source_module,
+            source_node=fields.source_node,
+            logger=create_status_logger(settings, self.instrumentation),
+            instrumentation=self.instrumentation,
+            error_reports=self.error_reports,
+        )
+
+    def stop(self) -> None:
+        """Close every device's log."""
+        with self._lock:
+            for listener in self.nodes.values():
+                listener.close_logger()
+            self.nodes.clear()
+            self._routes.clear()
+
+
+def run_monitor(
+    directory: str = os.path.join("logs", "monitor"),
+    channel: str = "can0",
+    interface: str = "socketcan",
+) -> None:
+    """
+    Bring up the CAN interface and monitor every device until interrupted.
+
+    Nothing is sent: there is no node discovery and no heartbeat.
+    """
+    can_interface = CANInterface(channel, interface=interface)
+    can_bus = can_interface.bring_up()
+    monitor = BusMonitor(directory)
+    can_interface.set_acceptance_filters("monitor", monitor.can_filters)
+    notifier = can.Notifier(can_bus, [monitor])
+    logger.info("Monitoring the bus into %s. Press Ctrl+C to exit.", directory)
+    try:
+        while True:
+            time.sleep(60)
+            logger.info(
+                "Monitoring %d devices, %d frames ignored",
+                len(monitor.nodes),
+                monitor.frames_ignored,
+            )
+    finally:
+        # Notifier.stop() also stops the monitor, closing the logs
+        notifier.stop()
+        can_bus.shutdown()
+        can_interface.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Passively record the status of every device on the bus."
+    )
+    parser.add_argument(
+        "--log-dir",
+        default=os.path.join("logs", "monitor"),
+        help="Where the per-device status logs are written.",
+    )
+    parser.add_argument("--channel", default="can0", help="CAN channel to monitor.")
+    parser.add_argument(
+        "--interface", default="socketcan", help="python-can interface."
+    )
+    args, _ = parser.parse_known_args()  # --config is read by config_yaml
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+    )
+    try:
+        run_monitor(args.log_dir, args.channel, args.interface)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import os
 import time
 from datetime import datetime
+from typing import NamedTuple
 
 import can
 
@@ -21,12 +22,12 @@ def log_timeout_error(message: str):
         f.write(f"{timestamp} - {message}\n")
 
 
-def send_periodic_node_discovery(
-    can_bus: can.BusABC,
+def build_node_discovery(
     device_uid: list[int],
     temporary_node_id: int = 0xF,
     local_module: str = "Status_Screen",
-):
+) -> tuple[SendMessage, list[int]]:
+    """Return the Node Discovery sender and payload for this device."""
     discovery_payload = device_uid + [0x01, 0x00, 0x01, 0x00]
     # Build the Node Discovery message
     sender = SendMessage(
@@ -36,21 +37,28 @@ def send_periodic_node_discovery(
         dest_module=MODULE_TYPE["Controller"],
         dest_node=0x0,
     )
-
-    # Send the message every 100 ms
-    return sender.send_periodic(can_bus, data=discovery_payload, period=0.1)
+    return sender, discovery_payload
 
 
-def wait_for_configuration_write(
-    canbus: can.BusABC,
+def send_periodic_node_discovery(
+    can_bus: can.BusABC,
     device_uid: list[int],
     temporary_node_id: int = 0xF,
     local_module: str = "Status_Screen",
-) -> int:
-    start_time = time.time()
+):
+    sender, discovery_payload = build_node_discovery(
+        device_uid, temporary_node_id, local_module
+    )
 
-    # Build the expected Configuration Write message
-    expected_message = SendMessage(
+    # Send the message every 100 ms
+    return sender.send_periodic(can_bus, data=discovery_payload, period=0.1)
+
+
+def expected_configuration_write(
+    temporary_node_id: int = 0xF, local_module: str = "Status_Screen"
+) -> SendMessage:
+    """Return the controller's Configuration Write reply, seen from our side."""
+    return SendMessage(
         message_type=CONTROLLER_MESSAGE_TYPE["Config_Write"],
         node_id=temporary_node_id,
         module_type=MODULE_TYPE[local_module],
@@ -59,19 +67,132 @@ def wait_for_configuration_write(
         direction="rx",
     )
 
-    # Calculate the expected arbitration ID
-    expected_arbitration_id = expected_message.build_arbitration_id()
 
-    # Wait indefinitely for the Configuration Write message
-    while time.time() - start_time < DISCOVERY_TIMEOUT:
-        message = canbus.recv()
-        if message and message.arbitration_id == expected_arbitration_id:
-            # Extract the assigned node ID from the message
-            data = list(message.data)
-            if data[0] == 0x00 and data[1:5] == device_uid:
-                node_id = data[5]
-                return node_id
+def configuration_write_arbitration_id(
+    temporary_node_id: int = 0xF, local_module: str = "Status_Screen"
+) -> int:
+    """Return the arbitration ID of the controller's Configuration Write reply."""
+    return expected_configuration_write(
+        temporary_node_id, local_module
+    ).build_arbitration_id()
+
+
+def parse_configuration_write(
+    message: can.Message | None, expected_arbitration_id: int, device_uid: list[int]
+) -> int | None:
+    """
+    Return the node ID assigned by a Configuration Write addressed to this UID.
+
+    Returns None if the message is not the expected Configuration Write or is
+    meant for another device.
+    """
+    if message and message.arbitration_id == expected_arbitration_id:
+        # Extract the assigned node ID from the message
+        data = list(message.data)
+        if len(data) > 5 and data[0] == 0x00 and data[1:5] == device_uid:
+            return data[5]
+    return None
+
+
+class ConfigurationWrite(NamedTuple):
+    """
+    A node ID assignment, and the controller that sent it.
+
+    Attributes:
+        node_id (int): The assigned node ID.
+        controller_module (int): Source module of the Configuration Write.
+        controller_node (int): Source node of the Configuration Write.
+    """
+
+    node_id: int
+    controller_module: int
+    controller_node: int
+
+
+class ConfigurationWriteWaiter:
+    """
+    Recognises the Configuration Write that assigns this device its node ID.
+
+    Used by wait_for_configuration_write()'s receive loop and by the asyncio
+    runtime. Frames with any other arbitration ID are rejected on a single
+    integer comparison, and can_filters lets the kernel drop them before
+    they reach us at all.
+
+    Args:
+        device_uid (list[int]): The device's Unique ID.
+        temporary_node_id (int, optional): Node ID used during discovery.
+        local_module (str, optional): Module type of this device.
+    """
+
+    def __init__(
+        self,
+        device_uid: list[int],
+        temporary_node_id: int = 0xF,
+        local_module: str = "Status_Screen",
+    ) -> None:
+        expected_message = expected_configuration_write(temporary_node_id, local_module)
+        self.expected_arbitration_id = expected_message.build_arbitration_id()
+        self.can_filters = [expected_message.build_can_filter()]
+        self.device_uid = device_uid
+
+    def match(self, message: can.Message | None) -> int | None:
+        """Return the assigned node ID if this is our Configuration Write."""
+        return parse_configuration_write(
+            message, self.expected_arbitration_id, self.device_uid
+        )
+
+
+def wait_for_configuration_write(
+    canbus: can.BusABC,
+    device_uid: list[int],
+    temporary_node_id: int = 0xF,
+    local_module: str = "Status_Screen",
+    timeout: float = DISCOVERY_TIMEOUT,
+) -> int:
+    """
+    Wait for the controller's Configuration Write and return the assigned ID.
+
+    Raises:
+        TimeoutError: If no Configuration Write for this UID arrives in time.
+    """
+    return receive_configuration_write(
+        canbus, device_uid, temporary_node_id, local_module, timeout
+    ).node_id
+
+
+def receive_configuration_write(
+    canbus: can.BusABC,
+    device_uid: list[int],
+    temporary_node_id: int = 0xF,
+    local_module: str = "Status_Screen",
+    timeout: float = DISCOVERY_TIMEOUT,
+) -> ConfigurationWrite:
+    """
+    Wait for the controller's Configuration Write and return the assignment,
+    with the controller taken from the frame's arbitration ID.
+
+    Each recv() call blocks for at most the time left until a monotonic
+    deadline, so the wait neither spins on a busy bus nor hangs on a silent
+    one, and it fails exactly `timeout` seconds after it started.
+
+    Raises:
+        TimeoutError: If no Configuration Write for this UID arrives in time.
+    """
+    deadline = time.monotonic() + timeout
+    waiter = ConfigurationWriteWaiter(device_uid, temporary_node_id, local_module)
+
+    while (remaining := deadline - time.monotonic()) > 0:
+        message = canbus.recv(timeout=remaining)
+        node_id = waiter.match(message)
+        if node_id is not None:
+            return ConfigurationWrite(
+                node_id,
+                (message.arbitration_id >> 12) & 0xF,
+                (message.arbitration_id >> 8) & 0xF,
+            )
 
     # Log and raise timeout if no message is received within the specified time
     log_timeout_error("Timeout waiting for Configuration Write message.")
-    raise TimeoutError("Timed out after 5 minutes waiting for Configuration Write.")
+    raise TimeoutError(
+        f"Timed out after {timeout:.0f} s waiting for Configuration Write."
+    )
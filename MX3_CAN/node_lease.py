@@ -0,0 +1,139 @@
+import datetime
+import json
+import logging
+import os
+from typing import NamedTuple
+
+from MX3_CAN.config_yaml import MODULE_TYPE, NODE_LEASE
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseRejectedError(Exception):
+    """The controller did not accept the node ID from a persisted lease."""
+
+
+class NodeLease(NamedTuple):
+    """
+    A node ID assigned by a controller, as persisted across restarts.
+
+    Attributes:
+        uid (list[int]): The device's Unique ID the ID was assigned to.
+        node_id (int): The assigned node ID.
+        controller_module (int): Module type of the controller that assigned it.
+        controller_node (int): Node ID of that controller.
+        channel (str): The CAN interface it was assigned on.
+        assigned_at (str): When it was assigned (ISO 8601, local time).
+    """
+
+    uid: list[int]
+    node_id: int
+    controller_module: int
+    controller_node: int
+    channel: str
+    assigned_at: str
+
+
+class NodeLeaseStore:
+    """
+    Persist the node ID lease, so a restart can skip node discovery.
+
+    The lease is written atomically: to a temporary file in the same
+    directory, fsynced, then renamed over the old one, so a crash or power
+    cut leaves either the old lease or the new one, never a partial file.
+    A lease is only used for the same UID, controller and CAN interface;
+    any other, or a file that cannot be read, counts as no lease.
+
+    Args:
+        path (str): The lease file.
+        verify_timeout (float): Seconds to wait for the controller to answer
+            the leased node ID before falling back to discovery.
+    """
+
+    def __init__(
+        self,
+        path: str = os.path.join("state", "node_lease.json"),
+        verify_timeout: float = 1.0,
+    ) -> None:
+        self.path = path
+        self.verify_timeout = verify_timeout
+
+    def load(
+        self,
+        uid: list[int],
+        channel: str,
+        controller_module: int = MODULE_TYPE["Controller"],
+        controller_node: int = 0x0,
+    ) -> NodeLease | None:
+        """Return the persisted lease if it matches this device and controller."""
+        try:
+            with open(self.path) as file:
+                lease = NodeLease(**json.load(file))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as error:
+            logger.warning("Ignoring unreadable node lease %s: %s", self.path, error)
+            return None
+
+        leased_to = (lease.uid, lease.controller_module, lease.controller_node)
+        if leased_to != (list(uid), controller_module, controller_node) or (
+            lease.channel != channel
+        ):
+            logger.info("Node lease %s is for another device or controller.", self.path)
+            return None
+        return lease
+
+    def save(
+        self,
+        uid: list[int],
+        node_id: int,
+        channel: str,
+        controller_module: int,
+        controller_node: int,
+    ) -> NodeLease:
+        """Persist a newly assigned node ID and the controller that assigned it."""
+        lease = NodeLease(
+            list(uid),
+            node_id,
+            controller_module,
+            controller_node,
+            channel,
+            datetime.datetime.now().isoformat(),
+        )
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(lease._asdict(), file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        # Make the rename itself durable
+        directory_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+        return lease
+
+    def clear(self) -> None:
+        """Forget the lease, e.g. after the controller rejected it."""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def create_node_lease_store(settings: dict = NODE_LEASE) -> NodeLeaseStore | None:
+    """
+    Create the lease store configured in the NODE_LEASE section.
+
+    Returns:
+        NodeLeaseStore | None: The store, or None if leases are disabled.
+    """
+    if not settings.get("ENABLED", False):
+        return None
+    return NodeLeaseStore(
+        settings.get("PATH", os.path.join("state", "node_lease.json")),
+        settings.get("VERIFY_TIMEOUT", 1.0),
+    )
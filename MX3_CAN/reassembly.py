@@ -0,0 +1,159 @@
+import logging
+import time
+
+import can
+
+from MX3_CAN.config_yaml import EXT_REASSEMBLY
+
+logger = logging.getLogger(__name__)
+
+# Segment layout of the *_Ext message types: byte 0 is the segment index
+# (bits 6-0, counting from 0) with bit 7 set on the last segment, and the
+# payload follows in bytes 1-7. The last segment's DLC gives the tail length.
+LAST_SEGMENT = 0x80
+SEGMENT_INDEX = 0x7F
+CHUNK_SIZE = 7
+
+
+class _Sequence:
+    """A partial payload being reassembled into a pooled buffer."""
+
+    __slots__ = ("buffer", "length", "next_index", "started")
+
+    def __init__(self, buffer: bytearray, started: float) -> None:
+        self.buffer = buffer
+        self.length = 0
+        self.next_index = 0
+        self.started = started
+
+
+class Reassembler:
+    """
+    Streaming reassembly of multi-frame *_Ext payloads.
+
+    Sequences are keyed by (source, message type), where the source is the
+    sender's module type and node (bits 15-8 of the arbitration ID), so
+    several senders and message types can interleave. Buffers come from a
+    pool allocated up front, so memory stays bounded however many frames are
+    lost:
+
+    - a sequence that does not complete within `timeout` seconds is dropped
+      (`timeouts`),
+    - a missing or repeated segment drops the sequence (`lost`), as does a
+      sequence longer than `max_segments` (`overflows`),
+    - when every buffer is in use the oldest sequence is dropped
+      (`evicted`).
+
+    Not thread-safe; call feed() from the receive thread only.
+
+    Args:
+        timeout (float): Seconds a partial sequence is kept.
+        max_segments (int): Segments in the longest payload accepted.
+        max_sequences (int): Sequences reassembled at the same time.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 0.5,
+        max_segments: int = 32,
+        max_sequences: int = 16,
+    ) -> None:
+        self.timeout = timeout
+        self.max_segments = max_segments
+        self._pool = [
+            bytearray(max_segments * CHUNK_SIZE) for _ in range(max_sequences)
+        ]
+        self._sequences: dict[tuple[int, int], _Sequence] = {}
+        self.completed = 0
+        self.timeouts = 0
+        self.lost = 0
+        self.overflows = 0
+        self.evicted = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of partial sequences."""
+        return len(self._sequences)
+
+    def feed(self, msg: can.Message) -> bytes | None:
+        """
+        Add one segment.
+
+        Returns:
+            bytes | None: The complete payload if this was the last segment.
+        """
+        data = msg.data
+        if not data:
+            return None
+        arbitration_id = msg.arbitration_id
+        key = ((arbitration_id >> 8) & 0xFF, (arbitration_id >> 16) & 0x1FFF)
+        header = data[0]
+        index = header & SEGMENT_INDEX
+        now = time.monotonic()
+
+        sequence = self._sequences.get(key)
+        if sequence is not None and now - sequence.started > self.timeout:
+            self.timeouts += 1
+            self._release(key)
+            sequence = None
+        if index == 0:
+            if sequence is not None:
+                # Restarted before the last segment arrived
+                self.lost += 1
+                self._release(key)
+            sequence = self._start(key, now)
+        elif sequence is None:
+            # The start of this sequence was lost or timed out
+            self.lost += 1
+            return None
+        elif index != sequence.next_index:
+            self.lost += 1
+            self._release(key)
+            return None
+
+        chunk = data[1:]
+        end = sequence.length + len(chunk)
+        if index >= self.max_segments or end > len(sequence.buffer):
+            self.overflows += 1
+            self._release(key)
+            return None
+        sequence.buffer[sequence.length : end] = chunk
+        sequence.length = end
+        sequence.next_index = index + 1
+
+        if header & LAST_SEGMENT:
+            payload = bytes(sequence.buffer[:end])
+            self._release(key)
+            self.completed += 1
+            return payload
+        return None
+
+    def expire(self) -> None:
+        """Drop every sequence older than the timeout, e.g. from a timer."""
+        now = time.monotonic()
+        for key, sequence in list(self._sequences.items()):
+            if now - sequence.started > self.timeout:
+                self.timeouts += 1
+                self._release(key)
+
+    def _start(self, key: tuple[int, int], now: float) -> _Sequence:
+        if not self._pool:
+            self.expire()
+        if not self._pool:
+            # Dicts keep insertion order: the first sequence is the oldest
+            self.evicted += 1
+            self._release(next(iter(self._sequences)))
+        sequence = self._sequences[key] = _Sequence(self._pool.pop(), now)
+        return sequence
+
+    def _release(self, key: tuple[int, int]) -> None:
+        self._pool.append(self._sequences.pop(key).buffer)
+
+
+def create_reassembler(settings: dict = EXT_REASSEMBLY) -> Reassembler:
+    """Create a reassembler with the EXT_REASSEMBLY settings."""
+    return Reassembler(
+        timeout=settings.get("TIMEOUT", 0.5),
+        max_segments=settings.get("MAX_SEGMENTS", 32),
+        max_sequences=settings.get("MAX_SEQUENCES", 16),
+    )
@@ -0,0 +1,259 @@
+import argparse
+import collections
+import itertools
+import logging
+import os
+import re
+import statistics
+import threading
+import time
+import uuid
+from array import array
+from collections.abc import Iterable, Iterator
+
+import can
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.error_report import create_error_reports
+from MX3_CAN.status_listener import StatusListener
+from MX3_CAN.status_log import DailyRotatingLogger
+
+logger = logging.getLogger(__name__)
+
+# `candump can0` screen output, optionally with -t a/d/z timestamps:
+#   (1700000000.123456)  can0  18FF1031   [8]  01 02 03 04 05 06 07 08
+#   can0  123   [2]  01 02
+#   can0  123   [0]  remote request
+_CANDUMP_LINE = re.compile(
+    r"^\s*(?:\((?P<timestamp>[\d.]+)\)\s+)?(?P<channel>\S+)\s+"
+    r"(?P<id>[0-9A-Fa-f]+)\s+\[(?P<dlc>\d+)\]\s*(?P<data>.*)$"
+)
+
+
+def read_candump_output(path: str) -> Iterator[can.Message]:
+    """
+    Parse the screen output of `candump` (not the -l log format, which
+    can.LogReader reads). Lines without a timestamp are 1 ms apart.
+    """
+    with open(path) as file:
+        for line_number, line in enumerate(file):
+            match = _CANDUMP_LINE.match(line)
+            if not match:
+                continue
+            frame_id = match["id"]
+            data = match["data"].strip()
+            remote = data.startswith("remote request")
+            yield can.Message(
+                timestamp=(
+                    float(match["timestamp"])
+                    if match["timestamp"]
+                    else line_number * 0.001
+                ),
+                arbitration_id=int(frame_id, 16),
+                is_extended_id=len(frame_id) > 3,
+                is_remote_frame=remote,
+                dlc=int(match["dlc"]),
+                data=None if remote else bytes.fromhex(data.replace(" ", "")),
+                channel=match["channel"],
+            )
+
+
+def read_frames(path: str) -> Iterable[can.Message]:
+    """
+    Read recorded frames from any python-can log format (.log, .asc, .blf,
+    .csv, .trc, ...) or from saved candump screen output (.txt, .dump, ...).
+    """
+    suffix = path.removesuffix(".gz").rsplit(".", 1)[-1].lower()
+    if suffix in ("asc", "blf", "csv", "db", "log", "mf4", "trc"):
+        return can.LogReader(path)
+    return read_candump_output(path)
+
+
+class ReplayStats:
+    """
+    Throughput and per-frame latency of a replay run.
+
+    Latency is measured from just before a frame is put on the bus until
+    on_message_received() returns for it.
+    """
+
+    def __init__(self) -> None:
+        self.frames = 0
+        self.elapsed = 0.0
+        self.latencies = array("d")
+
+    @property
+    def throughput(self) -> float:
+        """Frames per second."""
+        return self.frames / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Latency percentile, in seconds."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def report(self) -> str:
+        lines = [
+            f"Frames:     {self.frames}",
+            f"Elapsed:    {self.elapsed:.3f} s",
+            f"Throughput: {self.throughput:,.0f} frames/s",
+        ]
+        if self.latencies:
+            lines.append(
+                "Latency:    mean {:.1f} us, p50 {:.1f} us, p99 {:.1f} us, "
+                "max {:.1f} us".format(
+                    statistics.fmean(self.latencies) * 1e6,
+                    self.percentile(50) * 1e6,
+                    self.percentile(99) * 1e6,
+                    max(self.latencies) * 1e6,
+                )
+            )
+        return "\n".join(lines)
+
+
+class _TimedListener(can.Listener):
+    """Runs the real listener and records how long each frame took to get there."""
+
+    def __init__(self, listener: can.Listener, stats: ReplayStats) -> None:
+        self.listener = listener
+        self.stats = stats
+        self.sent_at = collections.deque()
+        self.received = 0
+        self.done = threading.Event()
+        self.expected = None
+
+    def on_message_received(self, msg: can.Message) -> None:
+        self.listener.on_message_received(msg)
+        # The virtual bus delivers in send order
+        self.stats.latencies.append(time.perf_counter() - self.sent_at.popleft())
+        self.received += 1
+        if self.received == self.expected:
+            self.done.set()
+
+
+def replay(
+    frames: Iterable[can.Message],
+    listener: can.Listener,
+    speed: float | None = None,
+    channel: str | None = None,
+    timeout: float = 10.0,
+) -> ReplayStats:
+    """
+    Send recorded frames over a python-can virtual bus to a listener.
+
+    Args:
+        frames (Iterable[can.Message]): The recorded frames, e.g. from
+            read_frames().
+        listener (can.Listener): Receives the frames through a can.Notifier,
+            as on the device; usually a StatusListener.
+        speed (float, optional): 1.0 keeps the recorded timing, 10.0 plays
+            ten times faster, None sends as fast as possible.
+        channel (str, optional): Virtual channel name. Defaults to a unique
+            one, so concurrent replays do not see each other's frames.
+        timeout (float): Seconds to wait for the listener to catch up after
+            the last frame was sent.
+
+    Returns:
+        ReplayStats: Throughput and latency of the run.
+
+    Raises:
+        TimeoutError: If the listener did not receive every frame.
+    """
+    channel = channel or f"replay-{uuid.uuid4().hex}"
+    stats = ReplayStats()
+    timed = _TimedListener(listener, stats)
+    sender = can.Bus(interface="virtual", channel=channel)
+    receiver = can.Bus(interface="virtual", channel=channel)
+    notifier = can.Notifier(receiver, [timed])
+    try:
+        first_timestamp = None
+        start = time.perf_counter()
+        for msg in frames:
+            if speed:
+                if first_timestamp is None:
+                    first_timestamp = msg.timestamp
+                due = start + (msg.timestamp - first_timestamp) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            timed.sent_at.append(time.perf_counter())
+            sender.send(msg)
+            stats.frames += 1
+
+        timed.expected = stats.frames
+        if timed.received == stats.frames:
+            timed.done.set()
+        if stats.frames and not timed.done.wait(timeout):
+            raise TimeoutError(
+                f"The listener received {timed.received} of {stats.frames} frames."
+            )
+        stats.elapsed = time.perf_counter() - start
+    finally:
+        notifier.stop()
+        sender.shutdown()
+        receiver.shutdown()
+    return stats
+
+
+def replay_listener(log_directory: str) -> StatusListener:
+    """
+    A StatusListener like the device's, logging to `log_directory`.
+
+    Replayed error reports go to its errors subdirectory, not the device's
+    error log.
+    """
+    return StatusListener(
+        node_id=0x1,
+        expected_reply=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"],
+        module_type=MODULE_TYPE["Status_Screen"],
+        source_module=MODULE_TYPE["Controller"],
+        logger=DailyRotatingLogger(log_directory, buffering=-1),
+        error_reports=create_error_reports(
+            {"DIRECTORY": os.path.join(log_directory, "errors")}
+        ),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Replay recorded CAN traffic through the status listener.",
+    )
+    parser.add_argument(
+        "paths", nargs="+", help="python-can logs or candump output files."
+    )
+    speed = parser.add_mutually_exclusive_group()
+    speed.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Playback speed: 1 is real time, 10 is ten times faster.",
+    )
+    speed.add_argument(
+        "--max-speed",
+        action="store_true",
+        help="Send frames as fast as possible.",
+    )
+    parser.add_argument(
+        "--log-dir",
+        default=os.path.join("logs", "replay"),
+        help="Where the listener writes its status log.",
+    )
+    args = parser.parse_args()
+
+    frames = itertools.chain.from_iterable(read_frames(path) for path in args.paths)
+    listener = replay_listener(args.log_dir)
+    try:
+        stats = replay(frames, listener, None if args.max_speed else args.speed)
+    finally:
+        listener.close_logger()
+    print(stats.report())
+    print(
+        f"Status:     {listener.frames_received} reports, "
+        f"{listener.frames_unchanged} unchanged"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,25 @@
-import copy
 import datetime
-import json
-import os
+import logging
 import threading
+import time
 
 import can
 
-from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE
-from MX3_CAN.message_parser import parse_message
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, STATUS_LOG
+from MX3_CAN.error_report import ErrorReports, create_error_reports
+from MX3_CAN.instrumentation import Instrumentation
+from MX3_CAN.message_parser import PARSERS, count_parse_error
+from MX3_CAN.reassembly import create_reassembler
+from MX3_CAN.status_log import (
+    CLOCK,
+    BackgroundLogWriter,
+    DailyRotatingLogger,
+    create_status_logger,
+    next_midnight,
+)
+from MX3_CAN.status_store import StatusStore
 
-
-class DailyRotatingLogger:
-    """A logger that writes to a new file each day.
-
-    The logger writes log entries as JSON objects to a file named after the
-    current date in the format %Y-%m-%d.jsonl. Each log entry is a single
-    line in the file, with the following structure:
-
-        {
-            "timestamp": "<ISO 8601 formatted timestamp>",
-            "changes": <dictionary of changes>
-        }
-
-    The logger rotates the file every day, so the log entries for a given
-    day are all stored in one file.
-    """
-
-    def __init__(self, directory="logs"):
-        """Initialize the logger.
-
-        Args:
-            directory: The directory where the log files will be stored.
-        """
-        self.directory = directory
-        os.makedirs(directory, exist_ok=True)
-        self.current_date = self._get_today()
-        self.file = self._open_file(self.current_date)
-
-    def _get_today(self) -> str:
-        """Return the current date as a string in the format %Y-%m-%d"""
-        return datetime.date.today().isoformat()
-
-    def _open_file(self, date_str: str):
-        """Open a new file for the given date."""
-        path = os.path.join(self.directory, f"{date_str}.jsonl")
-        return open(path, "a", buffering=1)  # line-buffered
-
-    def _rotate_if_needed(self) -> None:
-        """Close and reopen the file if the date has changed."""
-        today = self._get_today()
-        if today != self.current_date:
-            self.file.close()
-            self.current_date = today
-            self.file = self._open_file(today)
-
-    def log(self, data: dict) -> None:
-        """Log a new entry to the current file.
-
-        Args:
-            data: A dictionary of changes to log.
-        """
-        self._rotate_if_needed()
-        timestamp = datetime.datetime.now().isoformat()  # local time
-        entry = {"timestamp": timestamp, "changes": data}
-        json.dump(entry, self.file)
-        self.file.write("\n")
-
-    def close(self) -> None:
-        """Close the file."""
-        if self.file:
-            self.file.close()
+logger = logging.getLogger(__name__)
 
 
 class StatusListener(can.Listener):
@@ -80,6 +30,10 @@ class StatusListener(can.Listener):
         module_type: int,
         source_module: int = 0x0,
         source_node: int = 0x0,
+        logger: DailyRotatingLogger | BackgroundLogWriter | None = None,
+        snapshot_interval: float | None = STATUS_LOG.get("SNAPSHOT_INTERVAL", 3600.0),
+        instrumentation: Instrumentation | None = None,
+        error_reports: ErrorReports | None = None,
     ) -> None:
         self.expected_arbitration_id = (
             (expected_reply << 16)
@@ -88,37 +42,205 @@ class StatusListener(can.Listener):
             | (module_type << 4)
             | node_id
         )
+        # The multi-frame form of the same report, reassembled before parsing
+        self.expected_ext_arbitration_id = (
+            CONTROLLER_MESSAGE_TYPE["Device_Status_Report_Ext"] << 16
+        ) | (self.expected_arbitration_id & 0xFFFF)
+        self.reassembler = create_reassembler()
+        # Error reports take a fast path of their own, see ErrorReports
+        self.error_reports = (
+            error_reports if error_reports is not None else create_error_reports()
+        )
+        self._handlers = {
+            CONTROLLER_MESSAGE_TYPE["Device_Error_Report"]: self._on_error_report,
+            CONTROLLER_MESSAGE_TYPE["Device_Error_Report_Ext"]: (
+                self._on_error_report_ext
+            ),
+            CONTROLLER_MESSAGE_TYPE["Device_Status_Report"]: self._on_status_report,
+            CONTROLLER_MESSAGE_TYPE[
+                "Device_Status_Report_Ext"
+            ]: self._on_status_report_ext,
+        }
         self.received_event = threading.Event()
-        self.status_store = {}
-        self.last_printed_store = {}
+        self.status_store = StatusStore()
+        # Last raw payload seen per parameter code. Codes that decode into the
+        # same section (the Operator MNID codes) invalidate each other's entry.
+        self.last_payloads = {}
+        self.shared_section_codes = {
+            code: tuple(
+                other
+                for other, other_decoder in PARSERS.items()
+                if other_decoder is decoder and other != code
+            )
+            for code, decoder in PARSERS.items()
+        }
+        self.frames_received = 0
+        self.frames_unchanged = 0
+        # Reports per parameter code, and the monotonic receive time of the
+        # last one, overall and per code
+        self.frames_by_code = [0] * 256
+        self.last_report = None
+        self.last_report_by_code = [None] * 256
         self.lock = threading.Lock()
-        self.logger = DailyRotatingLogger()
+        self.logger = (
+            logger
+            if logger is not None
+            else create_status_logger(instrumentation=instrumentation)
+        )
+        # Per-stage timings, only taken when instrumentation is enabled
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.watch("frames_received", self, "frames_received")
+            instrumentation.watch("frames_unchanged", self, "frames_unchanged")
+            self._receive_latency = instrumentation.histogram("kernel_to_listener")
+            self._lock_wait = instrumentation.histogram("lock_wait")
+            self._parse_time = instrumentation.histogram("parse")
+            self._diff_time = instrumentation.histogram("diff")
+        # A full snapshot follows the first change, the first change of each
+        # day (so every day file starts from a known state) and every
+        # `snapshot_interval` seconds of changes.
+        self.snapshot_interval = snapshot_interval
+        self.next_snapshot = None
+
+    @property
+    def can_filters(self) -> list[dict]:
+        """The acceptance filters for the frames this listener decodes."""
+        return [
+            {
+                "can_id": arbitration_id,
+                "can_mask": 0x1FFFFFFF,
+                "extended": True,
+            }
+            for arbitration_id in (
+                self.expected_arbitration_id,
+                self.expected_ext_arbitration_id,
+            )
+        ] + [
+            {
+                "can_id": (CONTROLLER_MESSAGE_TYPE[message_type] << 16)
+                | (self.expected_arbitration_id & 0xFFFF),
+                "can_mask": 0x1FFFFFFF,
+                "extended": True,
+            }
+            for message_type in ("Device_Error_Report", "Device_Error_Report_Ext")
+        ]
 
     def on_message_received(self, msg: can.Message) -> None:
-        message_type = (msg.arbitration_id >> 16) & 0x1FFF
         # print(f"Received status message: {msg}")
-        if message_type == CONTROLLER_MESSAGE_TYPE["Device_Status_Report"]:
-            data_bytes = list(msg.data)
+        handler = self._handlers.get((msg.arbitration_id >> 16) & 0x1FFF)
+        if handler is not None:
+            handler(msg)
+
+    def _on_status_report(self, msg: can.Message) -> None:
+        self._on_status_payload(msg, bytes(msg.data))
+
+    def _on_status_report_ext(self, msg: can.Message) -> None:
+        payload = self.reassembler.feed(msg)
+        if payload is not None:
+            self._on_status_payload(msg, payload)
 
-            with self.lock:
-                parse_message(data_bytes, self.status_store)
+    def _on_error_report(self, msg: can.Message) -> None:
+        self.error_reports.on_error_report(
+            msg.arbitration_id, bytes(msg.data), msg.timestamp
+        )
 
-                if self.status_store != self.last_printed_store:
-                    diff = {}
-                    for section, values in self.status_store.items():
-                        old_values = self.last_printed_store.get(section, {})
-                        section_diff = {
-                            k: v for k, v in values.items() if old_values.get(k) != v
-                        }
-                        if section_diff:
-                            diff[section] = section_diff
+    def _on_error_report_ext(self, msg: can.Message) -> None:
+        payload = self.reassembler.feed(msg)
+        if payload is not None:
+            self.error_reports.on_error_report(
+                msg.arbitration_id, payload, msg.timestamp
+            )
 
-                    if diff:
-                        self.logger.log(diff)
+    def _on_status_payload(self, msg: can.Message, payload: bytes) -> None:
+        """Decode one status payload, from a single frame or reassembled.
 
-                    self.last_printed_store = copy.deepcopy(self.status_store)
+        Each stage is timed into the instrumentation histograms; with
+        instrumentation off the clock is not read at all.
+        """
+        timed = self.instrumentation is not None
+        started = time.perf_counter() if timed else None
+        # Stamped with the kernel receive time, before waiting for the lock
+        received = CLOCK.receive_time(msg.timestamp)
+        if timed and msg.timestamp:
+            # msg.timestamp is the kernel receive time, on the wall clock
+            self._receive_latency.record(time.time() - msg.timestamp)
+
+        with self.lock:
+            locked = None
+            if timed:
+                locked = time.perf_counter()
+                self._lock_wait.record(locked - started)
+            self.frames_received += 1
+            self.last_report = received
+            if payload:
+                self.frames_by_code[payload[0]] += 1
+                self.last_report_by_code[payload[0]] = received
+            if payload and self.last_payloads.get(payload[0]) == payload:
+                # Repeated payload: nothing can have changed
+                self.frames_unchanged += 1
+            elif payload:
+                parameter_code = payload[0]
+                for code in self.shared_section_codes.get(parameter_code, ()):
+                    self.last_payloads.pop(code, None)
+
+                # The parser reports exactly the fields this frame changed,
+                # as raw codes; strings are only rendered for the log.
+                changes = self._decode(payload, locked)
+                if changes is None:
+                    # Not cached, so a retransmission is decoded again
+                    self.last_payloads.pop(parameter_code, None)
+                else:
+                    self.last_payloads[parameter_code] = payload
+                    if changes:
+                        self._log_changes(changes, received)
+
+        self.received_event.set()
+
+    def _decode(self, payload: bytes, started: float | None) -> list | None:
+        """
+        Decode a payload into the store; None if it could not be decoded.
 
-            self.received_event.set()
+        The parse and diff stages are timed from `started` unless it is None.
+        """
+        decoder = PARSERS.get(payload[0])
+        if decoder is None:
+            if self.instrumentation is not None:
+                self.instrumentation.count("unknown_parameter_codes")
+            return None
+        try:
+            codes = decoder.decode(payload)
+            decoded = time.perf_counter() if started is not None else None
+            changes = decoder.apply(codes, self.status_store)
+        except Exception as e:
+            count_parse_error()
+            if self.instrumentation is not None:
+                self.instrumentation.count("parse_errors")
+            logger.exception("Error parsing CAN bus status: %s", e)
+            return None
+        if started is not None:
+            self._parse_time.record(decoded - started)
+            self._diff_time.record(time.perf_counter() - decoded)
+        return changes
+
+    def _log_changes(self, changes: list, received: float) -> None:
+        timestamp = CLOCK.wall_time(received)
+        self.logger.log_changes(changes, timestamp, monotonic=received)
+        if self.next_snapshot is None or timestamp >= self.next_snapshot:
+            self._log_snapshot(timestamp, received)
+
+    def _log_snapshot(self, timestamp: datetime.datetime, received: float) -> None:
+        self.logger.log_snapshot(
+            self.status_store.snapshot(), timestamp, monotonic=received
+        )
+        self.next_snapshot = next_midnight(timestamp.date())
+        if self.snapshot_interval:
+            self.next_snapshot = min(
+                self.next_snapshot,
+                timestamp + datetime.timedelta(seconds=self.snapshot_interval),
+            )
 
     def close_logger(self):
         self.logger.close()
+        self.error_reports.close()
+        if self.instrumentation is not None:
+            self.instrumentation.dump()
@@ -0,0 +1,543 @@
+import datetime
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from MX3_CAN.config_yaml import STATUS_LOG
+from MX3_CAN.instrumentation import Instrumentation
+from MX3_CAN.status_store import StatusField, render_changes
+
+logger = logging.getLogger(__name__)
+
+
+# A kernel receive timestamp further in the past than this is not trusted
+# (the wall clock was stepped since, or the interface stamps something else)
+MAX_RECEIVE_AGE = 10.0
+
+
+def next_midnight(day: datetime.date) -> datetime.datetime:
+    """Return the local midnight that ends the given day."""
+    return datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time())
+
+
+def sample_anchor() -> tuple[float, float]:
+    """
+    Sample time.monotonic() and time.time() together.
+
+    The tightest of three tries is kept, with the monotonic time taken
+    halfway through it.
+    """
+    best = None
+    for _ in range(3):
+        before = time.monotonic()
+        wall = time.time()
+        after = time.monotonic()
+        if best is None or after - before < best[0]:
+            best = (after - before, (before + after) / 2, wall)
+    return best[1], best[2]
+
+
+class AnchoredClock:
+    """
+    The recording path's clock: monotonic times, mapped to wall time.
+
+    Entries are ordered by their monotonic receive time. Their wall-clock
+    timestamp is the monotonic time plus the offset of the current anchor,
+    a (monotonic, wall) pair sampled together, so an NTP step cannot
+    reorder or bunch up entries; it only shows up at the next anchor, which
+    is resampled every `anchor_interval` seconds. Loggers write an anchor
+    record whenever the anchor changes, so readers can map monotonic times
+    in one stream onto wall time and correlate them with other streams.
+
+    Args:
+        anchor_interval (float): Seconds between anchors.
+    """
+
+    def __init__(self, anchor_interval: float = 60.0) -> None:
+        self.anchor_interval = anchor_interval
+        # Replaced, never mutated, so readers on other threads see a
+        # consistent pair
+        self.anchor = sample_anchor()
+
+    def receive_time(self, kernel_timestamp: float | None) -> float:
+        """
+        The monotonic time a frame was received.
+
+        Args:
+            kernel_timestamp (float | None): msg.timestamp, the kernel's
+                wall-clock receive time on SocketCAN. Without a usable one
+                the current time is used.
+        """
+        now = time.monotonic()
+        if kernel_timestamp:
+            age = time.time() - kernel_timestamp
+            if 0.0 <= age <= MAX_RECEIVE_AGE:
+                return now - age
+        return now
+
+    def wall_time(self, monotonic: float) -> datetime.datetime:
+        """The local wall-clock time of a monotonic time."""
+        anchor = self.anchor
+        if monotonic - anchor[0] >= self.anchor_interval:
+            anchor = self.anchor = sample_anchor()
+        return datetime.datetime.fromtimestamp(anchor[1] + (monotonic - anchor[0]))
+
+    def monotonic_time(self, timestamp: datetime.datetime) -> float:
+        """The monotonic time of a wall-clock time, through the current anchor."""
+        monotonic, wall = self.anchor
+        return monotonic + (timestamp.timestamp() - wall)
+
+
+CLOCK = AnchoredClock(STATUS_LOG.get("ANCHOR_INTERVAL", 60.0))
+
+
+class DailyRotatingLogger:
+    """A logger that writes to a new file each day.
+
+    The logger writes log entries as JSON objects to a file named after the
+    current date in the format %Y-%m-%d.jsonl. Each log entry is a single
+    line in the file, with the following structure:
+
+        {
+            "timestamp": "<ISO 8601 formatted timestamp>",
+            "monotonic": <monotonic receive time in seconds>,
+            "changes": <dictionary of changes>
+        }
+
+    Full-state snapshots, written by log_snapshot(), have a "snapshot" key
+    holding every field instead of "changes". Entries logged with an
+    explicit timestamp but no monotonic time (e.g. replayed history) have
+    no "monotonic" key.
+
+    Monotonic times are mapped to wall time by anchor records, written at
+    the start of each file and whenever the clock's anchor changes:
+
+        {
+            "timestamp": "<ISO 8601 formatted wall time of the anchor>",
+            "anchor": {"monotonic": <seconds>, "wall": <seconds since epoch>}
+        }
+
+    The logger rotates the file every day, so the log entries for a given
+    day are all stored in one file. The next midnight is computed when a
+    file is opened, so the per-entry rotation check is a single comparison
+    against the entry's timestamp.
+
+    With instrumentation, serialization and write times are recorded per
+    entry, and at each flush the time from the oldest unflushed entry's
+    monotonic receive time until it reached the OS (or the disk, when fsync
+    is set).
+    """
+
+    def __init__(
+        self, directory="logs", buffering=1, instrumentation=None, clock=CLOCK
+    ):
+        """Initialize the logger.
+
+        Args:
+            directory: The directory where the log files will be stored.
+            buffering: Buffering of the log file, as for open(). The default
+                flushes every line; BackgroundLogWriter uses a full buffer
+                and flushes per batch.
+            instrumentation: Where to record timings, if anywhere.
+            clock: Maps monotonic times to wall time. Defaults to the clock
+                shared by the whole recording path.
+        """
+        self.directory = directory
+        self.buffering = buffering
+        self.clock: AnchoredClock = clock
+        # The anchor last written to the current file
+        self._written_anchor = None
+        self.bytes_written = 0
+        self.instrumentation: Instrumentation | None = instrumentation
+        self._oldest_unflushed = None
+        if instrumentation is not None:
+            self._serialize_time = instrumentation.histogram("log_serialize")
+            self._write_time = instrumentation.histogram("log_write")
+            self._to_disk_time = instrumentation.histogram("entry_to_disk")
+        os.makedirs(directory, exist_ok=True)
+        today = datetime.date.today()
+        self.current_date = today.isoformat()
+        self.rotate_at = next_midnight(today)
+        self.file = self._open_file(self.current_date)
+
+    def _open_file(self, date_str: str):
+        """Open a new file for the given date."""
+        path = os.path.join(self.directory, f"{date_str}.jsonl")
+        return open(path, "a", buffering=self.buffering)
+
+    def _rotate_if_needed(self, timestamp: datetime.datetime) -> None:
+        """Close and reopen the file if the entry belongs to a later day."""
+        if timestamp >= self.rotate_at:
+            self.file.close()
+            day = timestamp.date()
+            self.current_date = day.isoformat()
+            self.rotate_at = next_midnight(day)
+            self.file = self._open_file(self.current_date)
+            self._written_anchor = None
+
+    def _stamp(
+        self, timestamp: datetime.datetime | None, monotonic: float | None
+    ) -> tuple[datetime.datetime, float | None]:
+        """Fill in the entry times: now, or the wall time of `monotonic`."""
+        if timestamp is None:
+            if monotonic is None:
+                monotonic = time.monotonic()
+            timestamp = self.clock.wall_time(monotonic)
+        return timestamp, monotonic
+
+    def _write_anchor(self) -> None:
+        """Write the clock's current anchor to the current file."""
+        anchor = self.clock.anchor
+        monotonic, wall = anchor
+        line = (
+            json.dumps(
+                {
+                    "timestamp": datetime.datetime.fromtimestamp(wall).isoformat(),
+                    "anchor": {"monotonic": round(monotonic, 6), "wall": wall},
+                }
+            )
+            + "\n"
+        )
+        self.file.write(line)
+        self.bytes_written += len(line)
+        self._written_anchor = anchor
+
+    def log(
+        self,
+        data: dict,
+        timestamp: datetime.datetime | None = None,
+        monotonic: float | None = None,
+    ) -> None:
+        """Log a new entry to the current file.
+
+        Args:
+            data: A dictionary of changes to log.
+            timestamp: When the changes happened, if the entry is written
+                later than that. Defaults to the wall time of `monotonic`.
+            monotonic: The monotonic time the changes were received.
+                Defaults to now.
+        """
+        self._write_entry("changes", data, timestamp, monotonic=monotonic)
+
+    def log_changes(
+        self,
+        changes: list[tuple[StatusField, int]],
+        timestamp: datetime.datetime | None = None,
+        monotonic: float | None = None,
+    ) -> None:
+        """Log a parser change set of (field, code) pairs.
+
+        Args:
+            changes: The changed fields and their new codes.
+            timestamp: When the changes happened. Defaults to the wall time
+                of `monotonic`.
+            monotonic: The monotonic time the changes were received.
+                Defaults to now.
+        """
+        self._write_entry("changes", changes, timestamp, True, monotonic)
+
+    def log_snapshot(
+        self,
+        fields: list[tuple[StatusField, int]],
+        timestamp: datetime.datetime | None = None,
+        monotonic: float | None = None,
+    ) -> None:
+        """Log the full status, as (field, code) pairs from StatusStore.snapshot().
+
+        Args:
+            fields: Every decoded field and its code.
+            timestamp: When the snapshot was taken. Defaults to the wall
+                time of `monotonic`.
+            monotonic: The monotonic time of the snapshot. Defaults to now.
+        """
+        self._write_entry("snapshot", fields, timestamp, True, monotonic)
+
+    def _write_entry(
+        self,
+        kind: str,
+        data,
+        timestamp: datetime.datetime | None,
+        render: bool = False,
+        monotonic: float | None = None,
+    ) -> None:
+        timestamp, monotonic = self._stamp(timestamp, monotonic)
+        self._rotate_if_needed(timestamp)
+        if monotonic is None:
+            entry = {"timestamp": timestamp.isoformat()}
+        else:
+            if self.clock.anchor is not self._written_anchor:
+                self._write_anchor()
+            entry = {
+                "timestamp": timestamp.isoformat(),
+                "monotonic": round(monotonic, 6),
+            }
+        # Timed only with instrumentation: no clock reads otherwise
+        timed = self.instrumentation is not None
+        started = time.perf_counter() if timed else 0.0
+        if render:
+            data = render_changes(data)
+        entry[kind] = data
+        line = json.dumps(entry) + "\n"
+        serialized = time.perf_counter() if timed else 0.0
+        self.file.write(line)
+        # json.dumps escapes non-ASCII, so characters are bytes
+        self.bytes_written += len(line)
+        if timed:
+            self._record_write(timestamp, started, serialized, monotonic)
+
+    def _record_write(
+        self,
+        timestamp: datetime.datetime,
+        started: float,
+        serialized: float,
+        monotonic: float | None = None,
+    ) -> None:
+        """Record the timings of an entry written with instrumentation."""
+        self._serialize_time.record(serialized - started)
+        self._write_time.record(time.perf_counter() - serialized)
+        if self._oldest_unflushed is None:
+            self._oldest_unflushed = (
+                monotonic
+                if monotonic is not None
+                else self.clock.monotonic_time(timestamp)
+            )
+        if self.buffering == 1:
+            # Flushed with every entry
+            self._record_flushed()
+
+    def _record_flushed(self) -> None:
+        if self._oldest_unflushed is not None:
+            self._to_disk_time.record(time.monotonic() - self._oldest_unflushed)
+            self._oldest_unflushed = None
+
+    def flush(self, fsync: bool = False) -> None:
+        """Flush buffered entries to the OS, and to disk if `fsync` is set."""
+        self.file.flush()
+        if fsync:
+            os.fsync(self.file.fileno())
+        self._record_flushed()
+
+    def close(self) -> None:
+        """Close the file."""
+        if self.file:
+            self.file.close()
+
+
+class BackgroundLogWriter:
+    """
+    Queue log entries for a dedicated writer thread.
+
+    log() only stamps the entry and puts it on a bounded queue, so the CAN
+    receive path never waits for the disk. The writer thread flushes to the
+    OS once `batch_size` entries are buffered or `flush_interval` seconds
+    after the first unflushed entry, whichever comes first, and calls fsync
+    at most every `fsync_interval` seconds. If the disk falls so far behind
+    that the queue fills, new entries are dropped and counted rather than
+    blocking the receive thread.
+
+    Args:
+        file_logger (DailyRotatingLogger): The logger that writes the files.
+            It should be opened with a full buffer (buffering=-1).
+        queue_size (int): Maximum number of queued entries.
+        batch_size (int): Flush after this many entries.
+        flush_interval (float): Flush at most this many seconds after an
+            entry was written.
+        fsync_interval (float | None): Seconds between fsync calls. 0 syncs
+            every flush, None never syncs.
+    """
+
+    def __init__(
+        self,
+        file_logger: DailyRotatingLogger,
+        queue_size: int = 4096,
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+        fsync_interval: float | None = None,
+    ) -> None:
+        self.file_logger = file_logger
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.queue: queue.Queue = queue.Queue(queue_size)
+        self.written = 0
+        self.dropped = 0
+        self.write_errors = 0
+        self._last_fsync = time.monotonic()
+        self._stop = object()
+        self._thread = threading.Thread(
+            target=self._run, name="status-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of entries waiting for the writer thread."""
+        return self.queue.qsize()
+
+    def log(
+        self,
+        data: dict,
+        timestamp: datetime.datetime | None = None,
+        monotonic: float | None = None,
+    ) -> None:
+        """Queue a rendered change set, stamped now unless times are given."""
+        self._enqueue(self.file_logger.log, data, timestamp, monotonic)
+
+    def log_changes(
+        self,
+        changes: list[tuple[StatusField, int]],
+        timestamp: datetime.datetime | None = None,
+        monotonic: float | None = None,
+    ) -> None:
+        """Queue a (field, code) change set; it is rendered on the writer thread."""
+        self._enqueue(self.file_logger.log_changes, changes, timestamp, monotonic)
+
+    def log_snapshot(
+        self,
+        fields: list[tuple[StatusField, int]],
+        timestamp: datetime.datetime | None = None,
+        monotonic: float | None = None,
+    ) -> None:
+        """Queue a full-state snapshot from StatusStore.snapshot()."""
+        self._enqueue(self.file_logger.log_snapshot, fields, timestamp, monotonic)
+
+    def _enqueue(
+        self,
+        write,
+        data,
+        timestamp: datetime.datetime | None,
+        monotonic: float | None,
+    ) -> None:
+        # Stamped here, not when the writer thread gets to it
+        if timestamp is None:
+            if monotonic is None:
+                monotonic = time.monotonic()
+            timestamp = CLOCK.wall_time(monotonic)
+        try:
+            self.queue.put_nowait((write, data, timestamp, monotonic))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        pending = 0
+        flush_deadline = None
+        while True:
+            timeout = None
+            if flush_deadline is not None:
+                timeout = max(0.0, flush_deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is self._stop:
+                break
+            if item is not None:
+                self._write(item)
+                pending += 1
+                if flush_deadline is None:
+                    flush_deadline = time.monotonic() + self.flush_interval
+
+            if pending and (
+                pending >= self.batch_size or time.monotonic() >= flush_deadline
+            ):
+                self._flush()
+                pending = 0
+                flush_deadline = None
+
+        # Drain whatever was queued before close()
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not self._stop:
+                self._write(item)
+        self._flush(fsync=self.fsync_interval is not None)
+
+    def _write(self, item: tuple) -> None:
+        write, data, timestamp, monotonic = item
+        try:
+            write(data, timestamp, monotonic=monotonic)
+            self.written += 1
+        except (OSError, ValueError) as error:
+            self.write_errors += 1
+            logger.warning("Failed to write status log entry: %s", error)
+        except Exception:
+            # Anything else would kill the writer thread and leave the queue
+            # to fill up
+            self.write_errors += 1
+            logger.exception("Unexpected error writing status log entry.")
+
+    def _flush(self, fsync: bool | None = None) -> None:
+        if fsync is None:
+            fsync = (
+                self.fsync_interval is not None
+                and time.monotonic() - self._last_fsync >= self.fsync_interval
+            )
+        try:
+            self.file_logger.flush(fsync)
+        except (OSError, ValueError) as error:
+            self.write_errors += 1
+            logger.warning("Failed to flush status log: %s", error)
+        if fsync:
+            self._last_fsync = time.monotonic()
+
+    def close(self) -> None:
+        """Write everything still queued, then stop the thread and close the file."""
+        self.queue.put(self._stop)
+        self._thread.join()
+        self.file_logger.close()
+
+
+def create_status_logger(
+    settings: dict = STATUS_LOG,
+    instrumentation: Instrumentation | None = None,
+) -> DailyRotatingLogger | BackgroundLogWriter:
+    """
+    Create the status logger configured in the STATUS_LOG section.
+
+    Args:
+        settings (dict, optional): The STATUS_LOG settings. Defaults to the
+            section in config.yaml.
+        instrumentation (Instrumentation, optional): Records the logger's
+            timings and the background writer's drop and error counts.
+
+    Returns:
+        DailyRotatingLogger | BackgroundLogWriter: A logger that writes on the
+        caller's thread when WRITER is "direct", or the background writer.
+        FORMAT selects JSONL files or the compact binary format.
+    """
+    directory = settings.get("DIRECTORY", "logs")
+    if settings.get("FORMAT", "jsonl") == "binary":
+        # Imported here: the binary log builds on this module
+        from MX3_CAN.binary_log import BinaryDailyRotatingLogger
+        from MX3_CAN.message_parser import STATUS_FIELDS
+
+        def open_logger(buffering=1):
+            return BinaryDailyRotatingLogger(
+                STATUS_FIELDS, directory, buffering, instrumentation
+            )
+
+    else:
+
+        def open_logger(buffering=1):
+            return DailyRotatingLogger(directory, buffering, instrumentation)
+
+    if settings.get("WRITER", "direct") != "background":
+        return open_logger()
+
+    writer = BackgroundLogWriter(
+        open_logger(buffering=-1),
+        queue_size=settings.get("QUEUE_SIZE", 4096),
+        batch_size=settings.get("BATCH_SIZE", 64),
+        flush_interval=settings.get("FLUSH_INTERVAL", 1.0),
+        fsync_interval=settings.get("FSYNC_INTERVAL"),
+    )
+    if instrumentation is not None:
+        for counter in ("written", "dropped", "write_errors", "queue_depth"):
+            instrumentation.watch(f"log_{counter}", writer, counter)
+    return writer
@@ -0,0 +1,252 @@
+import logging
+import math
+import threading
+import time
+
+import can
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE, STATUS_POLLING
+from MX3_CAN.message_parser import PARSERS
+from MX3_CAN.messages import SendMessage
+from MX3_CAN.status_listener import StatusListener
+
+logger = logging.getLogger(__name__)
+
+# Status_Read_Request payload asking for every parameter code at once
+ALL_CODES = 0x00
+
+
+class _Target:
+    """Refresh state of one polled parameter code."""
+
+    __slots__ = ("code", "period", "backoff", "requested_at", "retry_at")
+
+    def __init__(self, code: int, period: float) -> None:
+        self.code = code
+        self.period = period
+        # Multiplies the period while replies are late
+        self.backoff = 1.0
+        # time.monotonic() of the outstanding request, if any
+        self.requested_at = None
+        # No new request before this time.monotonic() after a late reply
+        self.retry_at = None
+
+
+class StatusPoller:
+    """
+    Keep every polled parameter code fresher than its refresh period.
+
+    A code is only requested when the last report for it, pushed by the
+    controller or answering an earlier request, is older than its period, so
+    codes the controller pushes often are never polled. On each round:
+
+    - codes due within `coalesce_window` of each other go out together,
+      each as Status_Read_Request [code]; if at least half of the polled
+      codes are due, one [0x00] request asks for everything instead,
+    - a token bucket caps requests at `max_rate` per second; requests over
+      the cap are deferred to a later round,
+    - a request not answered within `late_factor` periods counts as late
+      and doubles that code's period, up to `max_backoff` times, and the
+      code is not requested again for one backed-off period, so a silent
+      node is polled less and less often; the next timely reply resets it.
+
+    The listener records the time of the last report per code, which is
+    also what staleness() reports per section.
+
+    Args:
+        canbus (can.BusABC): The bus to send requests on.
+        node_id (int): This device's node ID.
+        listener (StatusListener): The listener decoding the replies.
+        periods (dict[int, float]): Refresh period in seconds per code.
+        max_rate (float): Requests per second at most.
+        coalesce_window (float): Seconds by which a code may be requested
+            early to share a round with others.
+        late_factor (float): Periods to wait for a reply before backing off.
+        max_backoff (float): Largest period multiplier.
+        local_module (str, optional): Module type of this device.
+    """
+
+    def __init__(
+        self,
+        canbus: can.BusABC,
+        node_id: int,
+        listener: StatusListener,
+        periods: dict[int, float],
+        max_rate: float = 20.0,
+        coalesce_window: float = 0.05,
+        late_factor: float = 2.0,
+        max_backoff: float = 8.0,
+        local_module: str = "Status_Screen",
+    ) -> None:
+        self.canbus = canbus
+        self.listener = listener
+        self.sender = SendMessage(
+            message_type=CONTROLLER_MESSAGE_TYPE["Status_Read_Request"],
+            node_id=node_id,
+            module_type=MODULE_TYPE[local_module],
+            dest_module=MODULE_TYPE["Controller"],
+            dest_node=0x0,
+            prepared=True,
+        )
+        self.targets = [
+            _Target(code, period) for code, period in periods.items() if period > 0
+        ]
+        self.max_rate = max_rate
+        self.coalesce_window = coalesce_window
+        self.late_factor = late_factor
+        self.max_backoff = max_backoff
+
+        self.requests_sent = 0
+        self.requests_deferred = 0
+        self.late_replies = 0
+        self._tokens = max_rate
+        self._refilled = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="status-poller", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        delay = 0.0
+        while not self._stopped.wait(delay):
+            delay = self.poll_once()
+
+    def poll_once(self, now: float | None = None) -> float:
+        """
+        Send the requests that are due.
+
+        Returns:
+            float: Seconds until the next round is needed.
+        """
+        if now is None:
+            now = time.monotonic()
+        last_reports = self.listener.last_report_by_code
+        due = []
+        next_round = math.inf
+        for target in self.targets:
+            last = last_reports[target.code]
+            period = target.period * target.backoff
+            if target.requested_at is not None:
+                if last is not None and last >= target.requested_at:
+                    target.requested_at = None
+                    target.backoff = 1.0
+                    period = target.period
+                elif now - target.requested_at >= self.late_factor * period:
+                    self.late_replies += 1
+                    target.backoff = min(target.backoff * 2, self.max_backoff)
+                    target.requested_at = None
+                    target.retry_at = now + target.period * target.backoff
+                    logger.debug(
+                        "Late status reply for 0x%02X; polling every %.1f s.",
+                        target.code,
+                        target.period * target.backoff,
+                    )
+                else:
+                    next_round = min(
+                        next_round, target.requested_at + self.late_factor * period
+                    )
+                    continue
+
+            due_at = last + period if last is not None else now
+            if target.retry_at is not None and target.retry_at > due_at:
+                due_at = target.retry_at
+            if due_at <= now + self.coalesce_window:
+                due.append(target)
+            else:
+                next_round = min(next_round, due_at)
+
+        if due:
+            next_round = min(next_round, self._request(due, now))
+        return min(max(next_round - now, 0.001), 1.0)
+
+    def _request(self, due: list[_Target], now: float) -> float:
+        """Send requests for the due targets within the rate cap."""
+        if self._refilled is not None:
+            elapsed = max(now - self._refilled, 0.0)
+            self._tokens = min(self.max_rate, self._tokens + elapsed * self.max_rate)
+        self._refilled = now
+
+        if len(due) > 1 and 2 * len(due) >= len(self.targets):
+            payloads = [[ALL_CODES]]
+            requested = due
+        else:
+            allowed = int(self._tokens)
+            requested = due[:allowed]
+            payloads = [[target.code] for target in requested]
+            self.requests_deferred += len(due) - len(requested)
+        if not payloads or self._tokens < len(payloads):
+            self.requests_deferred += len(requested)
+            # Retry once a token is back
+            return now + 1.0 / self.max_rate
+
+        self._tokens -= len(payloads)
+        self.requests_sent += self.sender.send_many(self.canbus, payloads)
+        for target in requested:
+            target.requested_at = now
+            target.retry_at = None
+        if len(requested) < len(due):
+            return now + 1.0 / self.max_rate
+        return math.inf
+
+    def staleness(self, now: float | None = None) -> dict[str, float | None]:
+        """
+        Seconds since the last report per section, or None if none arrived.
+        """
+        if now is None:
+            now = time.monotonic()
+        last_reports = self.listener.last_report_by_code
+        latest: dict[str, float | None] = {}
+        for code, decoder in PARSERS.items():
+            last = last_reports[code]
+            previous = latest.get(decoder.section)
+            if previous is None or (last is not None and last > previous):
+                latest[decoder.section] = last
+        return {
+            section: now - last if last is not None else None
+            for section, last in latest.items()
+        }
+
+
+def create_status_poller(
+    canbus: can.BusABC,
+    node_id: int,
+    listener: StatusListener,
+    settings: dict = STATUS_POLLING,
+    start: bool = True,
+) -> StatusPoller | None:
+    """
+    Start the poller configured in the STATUS_POLLING section.
+
+    Args:
+        start (bool, optional): Start the polling thread. Without it the
+            caller drives the poller by calling poll_once().
+
+    Returns:
+        StatusPoller | None: The running poller, or None if disabled.
+    """
+    if not settings.get("ENABLED", False):
+        return None
+    poller = StatusPoller(
+        canbus,
+        node_id,
+        listener,
+        settings.get("PERIODS") or {},
+        max_rate=settings.get("MAX_REQUESTS_PER_SECOND", 20.0),
+        coalesce_window=settings.get("COALESCE_WINDOW", 0.05),
+        late_factor=settings.get("LATE_FACTOR", 2.0),
+        max_backoff=settings.get("MAX_BACKOFF", 8.0),
+    )
+    if start:
+        poller.start()
+    return poller
@@ -1,4 +1,5 @@
 import logging
+import time
 
 from can import BusABC, CanError
 
@@ -14,7 +15,8 @@ def request_controller_status(
     node_id: int,
     status_listener: StatusListener,
     local_module_type: str = "Status_Screen",
-) -> None:
+    timeout: float | None = None,
+) -> bool:
     """
     Continuously sends Status_Read_Request messages until a response is received.
 
@@ -28,10 +30,14 @@ def request_controller_status(
         A StatusListener object that sets an event once a valid response is received.
     local_module_type : str, optional
         Module type of the sending device (e.g., 'Status_Screen'). Defaults to "Status_Screen".
+    timeout : float, optional
+        Give up after this many seconds. Defaults to trying until a response
+        is received.
 
     Returns
     -------
-    None
+    bool
+        Whether a response was received.
     """
     # Create a SendMessage object for Status_Read_Request
     sender = SendMessage(
@@ -40,10 +46,17 @@ def request_controller_status(
         module_type=MODULE_TYPE[local_module_type],
         dest_module=MODULE_TYPE["Controller"],
         dest_node=0x0,
+        prepared=True,  # the same request is resent until a reply arrives
     )
 
+    deadline = time.monotonic() + timeout if timeout is not None else None
     # Continuously send the message every 2 seconds until a response is received
     while not status_listener.received_event.is_set():
+        wait = 2.0
+        if deadline is not None:
+            wait = min(wait, deadline - time.monotonic())
+            if wait <= 0:
+                return False
         try:
             # Build and send the message
             msg = sender.build_message([0x00])
@@ -53,4 +66,5 @@ def request_controller_status(
             # Handle CAN bus send error
             logger.error("Failed to send Controller Status request.")
         # Wait for 2 seconds before the next attempt
-        status_listener.received_event.wait(timeout=2.0)
+        status_listener.received_event.wait(timeout=wait)
+    return True
@@ -0,0 +1,134 @@
+from array import array
+from collections.abc import Iterator, Mapping
+
+# Code held by a slot that has not been decoded yet
+UNSET = -1
+
+
+class StatusField:
+    """
+    One value within a status section.
+
+    The decoder stores the field's raw code (an enum code or, for multi-byte
+    fields such as locator IDs, the big-endian integer). The human-readable
+    string is only produced by render(), when the value is logged or shown.
+
+    Args:
+        section (str): The status section the field belongs to.
+        key (str): The field's key within the section.
+        strings (tuple[str, ...] | None): Rendered string for every possible
+            code, or None if the field renders through value_format.
+        value_format (str | None): Format string for fields without strings.
+        key_id (int): Position of the field among all compiled fields.
+    """
+
+    __slots__ = ("section", "key", "strings", "value_format", "key_id")
+
+    def __init__(
+        self,
+        section: str,
+        key: str,
+        strings: tuple[str, ...] | None = None,
+        value_format: str | None = None,
+        key_id: int = 0,
+    ) -> None:
+        self.section = section
+        self.key = key
+        self.strings = strings
+        self.value_format = value_format
+        self.key_id = key_id
+
+    def render(self, code: int) -> str:
+        """Return the human-readable string for a raw code."""
+        if self.strings is not None:
+            return self.strings[code]
+        return self.value_format.format(code)
+
+    def __repr__(self) -> str:
+        return f"StatusField({self.section!r}, {self.key!r})"
+
+
+class StatusRecord:
+    """
+    Raw codes of one status section, one fixed slot per field.
+
+    Args:
+        fields (tuple[StatusField, ...]): The section's fields, in slot order.
+    """
+
+    __slots__ = ("fields", "codes")
+
+    def __init__(self, fields: tuple[StatusField, ...]) -> None:
+        self.fields = fields
+        self.codes = array("l", [UNSET] * len(fields))
+
+    def render(self) -> dict[str, str]:
+        """Render the decoded slots as a key -> string dictionary."""
+        return {
+            field.key: field.render(code)
+            for field, code in zip(self.fields, self.codes)
+            if code != UNSET
+        }
+
+
+class StatusStore(Mapping):
+    """
+    Integer-coded status store, one StatusRecord per section.
+
+    Reads through the Mapping interface render lazily, so
+    `store["Tracking_Status"]["Global_Zone_Status"]` still returns
+    "Shutdown/Error" while the store itself only ever holds integers.
+    """
+
+    def __init__(self) -> None:
+        self.records: dict[str, StatusRecord] = {}
+
+    def record(self, section: str, fields: tuple[StatusField, ...]) -> StatusRecord:
+        """Return the record for a section, creating it on first use."""
+        record = self.records.get(section)
+        if record is None:
+            record = self.records[section] = StatusRecord(fields)
+        return record
+
+    def render(self) -> dict[str, dict[str, str]]:
+        """Render the whole store as a dict[str, dict[str, str]]."""
+        return {section: record.render() for section, record in self.records.items()}
+
+    def snapshot(self) -> list[tuple[StatusField, int]]:
+        """
+        Copy every decoded field as a change set, for a full-state log entry.
+        """
+        return [
+            (field, code)
+            for record in self.records.values()
+            for field, code in zip(record.fields, record.codes)
+            if code != UNSET
+        ]
+
+    def __getitem__(self, section: str) -> dict[str, str]:
+        return self.records[section].render()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+def render_changes(
+    changes: list[tuple[StatusField, int]],
+) -> dict[str, dict[str, str]]:
+    """
+    Render a change set of (field, code) pairs as {section: {key: value}}.
+
+    Args:
+        changes (list[tuple[StatusField, int]]): The changed fields and their
+            new codes.
+
+    Returns:
+        dict[str, dict[str, str]]: The human-readable change set.
+    """
+    rendered = {}
+    for field, code in changes:
+        rendered.setdefault(field.section, {})[field.key] = field.render(code)
+    return rendered
@@ -0,0 +1,14 @@
+import uuid
+
+import can
+import pytest
+
+
+@pytest.fixture
+def buses():
+    """A device bus and a controller bus on a virtual channel of their own."""
+    channel = f"test-{uuid.uuid4().hex}"
+    with can.Bus(interface="virtual", channel=channel) as device, can.Bus(
+        interface="virtual", channel=channel
+    ) as controller:
+        yield device, controller
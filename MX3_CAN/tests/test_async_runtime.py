@@ -0,0 +1,216 @@
+import asyncio
+import datetime
+
+import can
+import pytest
+
+from MX3_CAN import async_runtime
+from MX3_CAN.async_runtime import AsyncCANDevice, AsyncLogQueue
+from MX3_CAN.binary_log import BinaryDailyRotatingLogger, read_binary_log
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.frame_recorder import FrameRecorder, RotatingFrameFile
+from MX3_CAN.message_parser import STATUS_FIELDS, parse_changes
+from MX3_CAN.node_discovery import configuration_write_arbitration_id
+from MX3_CAN.node_lease import LeaseRejectedError, NodeLeaseStore
+from MX3_CAN.status_listener import StatusListener
+from MX3_CAN.status_log import DailyRotatingLogger
+from MX3_CAN.status_poller import StatusPoller
+from MX3_CAN.status_store import StatusStore, render_changes
+
+UID = [0x45, 0x2F, 0xA7, 0xA2]
+
+
+def test_discover_returns_assigned_node_id(buses):
+    device_bus, controller_bus = buses
+
+    async def scenario():
+        device = AsyncCANDevice(device_bus, UID)
+        device.start()
+        listen_task = asyncio.create_task(device.listen())
+        try:
+            discovery = asyncio.create_task(device.discover())
+            # Wait for the first Node Discovery frame, then assign node 0x5
+            request = await asyncio.to_thread(controller_bus.recv, 1.0)
+            controller_bus.send(
+                can.Message(
+                    arbitration_id=configuration_write_arbitration_id(),
+                    data=[0x00, *UID, 0x05, 0x00, 0x00],
+                    is_extended_id=True,
+                )
+            )
+            return request, await asyncio.wait_for(discovery, 2.0)
+        finally:
+            listen_task.cancel()
+            device.stop()
+
+    request, node_id = asyncio.run(scenario())
+
+    assert (request.arbitration_id >> 16) == CONTROLLER_MESSAGE_TYPE["Node_Discovery"]
+    assert list(request.data[:4]) == UID
+    assert node_id == 0x5
+
+
+def test_run_saves_the_assignment_and_rejects_an_unanswered_lease(
+    buses, tmp_path, monkeypatch
+):
+    device_bus, controller_bus = buses
+    monkeypatch.setattr(
+        async_runtime,
+        "create_status_logger",
+        lambda instrumentation=None: DailyRotatingLogger(str(tmp_path)),
+    )
+    lease_store = NodeLeaseStore(str(tmp_path / "lease.json"), verify_timeout=0.2)
+
+    async def discover_and_save():
+        device = AsyncCANDevice(device_bus, UID, lease_store=lease_store)
+        run = asyncio.create_task(device.run())
+        await asyncio.to_thread(controller_bus.recv, 1.0)
+        controller_bus.send(
+            can.Message(
+                arbitration_id=configuration_write_arbitration_id(),
+                data=[0x00, *UID, 0x05, 0x00, 0x00],
+                is_extended_id=True,
+            )
+        )
+        channel = str(device_bus.channel_info)
+        while lease_store.load(UID, channel) is None:
+            await asyncio.sleep(0.01)
+        run.cancel()
+        await asyncio.gather(run, return_exceptions=True)
+        return lease_store.load(UID, channel)
+
+    lease = asyncio.run(discover_and_save())
+    assert lease.node_id == 0x5
+
+    # Nobody answers the status request for the leased ID this time
+    async def resume():
+        await AsyncCANDevice(device_bus, UID, lease_store=lease_store).run()
+
+    with pytest.raises(LeaseRejectedError):
+        asyncio.run(resume())
+
+
+def test_run_records_raw_frames(buses, tmp_path, monkeypatch):
+    device_bus, controller_bus = buses
+    recorder = FrameRecorder(
+        RotatingFrameFile(str(tmp_path / "frames")),
+        mode="continuous",
+        flush_interval=60,
+    )
+    monkeypatch.setattr(
+        async_runtime,
+        "create_status_logger",
+        lambda instrumentation=None: DailyRotatingLogger(str(tmp_path)),
+    )
+    monkeypatch.setattr(
+        async_runtime, "create_frame_recorder", lambda channel: recorder
+    )
+    status_report = can.Message(
+        arbitration_id=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"] << 16
+        | MODULE_TYPE["Controller"] << 12
+        | MODULE_TYPE["Status_Screen"] << 4
+        | 0x5,
+        data=[0x15, 0x01],
+        is_extended_id=True,
+    )
+
+    async def scenario():
+        run = asyncio.create_task(AsyncCANDevice(device_bus, UID).run())
+        await asyncio.to_thread(controller_bus.recv, 1.0)
+        controller_bus.send(
+            can.Message(
+                arbitration_id=configuration_write_arbitration_id(),
+                data=[0x00, *UID, 0x05, 0x00, 0x00],
+                is_extended_id=True,
+            )
+        )
+        await asyncio.sleep(0.1)
+        controller_bus.send(status_report)
+        while not recorder.count:
+            await asyncio.sleep(0.01)
+        run.cancel()
+        await asyncio.gather(run, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+    # The run stopped the recorder, which wrote the frame out
+    (path,) = (tmp_path / "frames").iterdir()
+    (frame,) = can.CanutilsLogReader(str(path))
+    assert frame.arbitration_id == status_report.arbitration_id
+    assert bytes(frame.data) == bytes([0x15, 0x01])
+
+
+def test_poller_runs_on_the_loop_once_status_arrives(buses, tmp_path):
+    device_bus, controller_bus = buses
+    listener = StatusListener(
+        node_id=0x5,
+        expected_reply=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"],
+        module_type=MODULE_TYPE["Status_Screen"],
+        source_module=MODULE_TYPE["Controller"],
+        logger=DailyRotatingLogger(str(tmp_path)),
+    )
+    poller = StatusPoller(device_bus, 0x5, listener, {0x10: 0.05})
+
+    async def scenario():
+        status_received = asyncio.Event()
+        device = AsyncCANDevice(device_bus, UID)
+        polling = asyncio.create_task(device.run_poller(poller, status_received))
+        await asyncio.sleep(0.05)
+        before = poller.requests_sent
+        status_received.set()
+        await asyncio.sleep(0.05)
+        polling.cancel()
+        await asyncio.gather(polling, return_exceptions=True)
+        return before
+
+    assert asyncio.run(scenario()) == 0
+    assert poller.requests_sent >= 1
+    request = controller_bus.recv(0)
+    assert (request.arbitration_id >> 16) == CONTROLLER_MESSAGE_TYPE[
+        "Status_Read_Request"
+    ]
+    assert list(request.data[:1]) == [0x10]
+
+
+def test_heartbeat_is_sent_periodically(buses):
+    device_bus, controller_bus = buses
+
+    async def scenario():
+        device = AsyncCANDevice(device_bus, UID)
+        heartbeat = asyncio.create_task(device.heartbeat(0x5, period=0.01))
+        await asyncio.sleep(0.1)
+        heartbeat.cancel()
+
+    asyncio.run(scenario())
+
+    frames = []
+    while (message := controller_bus.recv(0)) is not None:
+        frames.append(message)
+    assert len(frames) >= 5
+    assert all(
+        (frame.arbitration_id >> 16) == CONTROLLER_MESSAGE_TYPE["Heartbeat"]
+        and ((frame.arbitration_id >> 12) & 0xF) == MODULE_TYPE["Status_Screen"]
+        for frame in frames
+    )
+
+
+def test_log_queue_writes_any_logger_format(tmp_path):
+    changes = parse_changes([0x10, 0x21, 0x05], StatusStore())
+    start = datetime.datetime.now().replace(hour=12, minute=0)
+
+    async def scenario():
+        log_queue = AsyncLogQueue(
+            BinaryDailyRotatingLogger(STATUS_FIELDS, str(tmp_path))
+        )
+        writer = asyncio.create_task(log_queue.write_logs())
+        log_queue.log(render_changes(changes), start, monotonic=1.0)
+        log_queue.log_changes(changes, start + datetime.timedelta(seconds=1))
+        await asyncio.sleep(0.05)
+        writer.cancel()
+        await asyncio.gather(writer, return_exceptions=True)
+        log_queue.close()
+
+    asyncio.run(scenario())
+
+    entries = list(read_binary_log(str(tmp_path / f"{start.date()}.mx3log")))
+    assert [entry["changes"] for entry in entries] == [render_changes(changes)] * 2
@@ -0,0 +1,43 @@
+import contextlib
+import json
+
+from MX3_CAN.benchmark import build_benchmarks, compare, run_benchmarks
+from MX3_CAN.message_parser import PARSERS
+
+
+def test_every_parameter_code_is_benchmarked():
+    results = run_benchmarks(repeat=1, min_time=0.001, names=["parse_message"])
+
+    assert set(results["results"]) == {
+        f"parse_message[0x{code:02X}]" for code in PARSERS
+    }
+    assert all(result["ns_per_op"] > 0 for result in results["results"].values())
+
+
+def test_compare_reports_only_regressions_over_threshold():
+    baseline = {"results": {"a": {"ns_per_op": 100.0}, "b": {"ns_per_op": 100.0}}}
+    results = {
+        "results": {
+            "a": {"ns_per_op": 109.0},
+            "b": {"ns_per_op": 125.0},
+            "new": {"ns_per_op": 1.0},
+        }
+    }
+
+    assert compare(results, baseline, threshold=0.10) == [("b", 100.0, 125.0, 0.25)]
+
+
+def test_log_benchmarks_write_the_same_change_sets(tmp_path):
+    with contextlib.ExitStack() as cleanup:
+        benchmarks = build_benchmarks(str(tmp_path), cleanup)
+        benchmarks["DailyRotatingLogger.log"]()
+        benchmarks["DailyRotatingLogger.log_changes"]()
+
+    (log_path,) = tmp_path.glob("*.jsonl")
+    rendered, logged = [
+        entry["changes"]
+        for entry in map(json.loads, log_path.read_text().splitlines())
+        if "changes" in entry
+    ]
+    assert rendered == logged
+    assert sum(map(len, rendered.values())) > 1
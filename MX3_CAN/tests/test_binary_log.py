@@ -0,0 +1,89 @@
+import datetime
+import io
+import json
+
+import pytest
+
+from MX3_CAN.binary_log import (
+    BinaryDailyRotatingLogger,
+    convert_to_jsonl,
+    read_binary_log,
+)
+from MX3_CAN.message_parser import STATUS_FIELDS, parse_changes
+from MX3_CAN.status_store import StatusStore, render_changes
+
+
+def test_binary_log_round_trips_to_jsonl(tmp_path):
+    file_logger = BinaryDailyRotatingLogger(STATUS_FIELDS, str(tmp_path))
+    store = StatusStore()
+    start = file_logger.rotate_at - datetime.timedelta(hours=1)
+
+    expected = []
+    for n, payload in enumerate(
+        [[0x10, 0x21, 0x05], [0x1D, 0x01, 0x12, 0x34], [0x10, 0x22]]
+    ):
+        changes = parse_changes(payload, store)
+        timestamp = start + datetime.timedelta(milliseconds=n)
+        file_logger.log_changes(changes, timestamp)
+        expected.append(
+            {"timestamp": timestamp.isoformat(), "changes": render_changes(changes)}
+        )
+    file_logger.close()
+
+    path = tmp_path / f"{start.date()}.mx3log"
+    assert list(read_binary_log(str(path))) == expected
+
+    output = io.StringIO()
+    assert convert_to_jsonl(str(path), output) == 3
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == expected
+
+
+def test_reopening_drops_partial_record(tmp_path):
+    file_logger = BinaryDailyRotatingLogger(STATUS_FIELDS, str(tmp_path))
+    changes = parse_changes([0x15, 0x00, 0x01], StatusStore())
+    file_logger.log_changes(changes)
+    file_logger.file.write(b"\x01\x02\x03")  # torn write
+    file_logger.close()
+
+    file_logger = BinaryDailyRotatingLogger(STATUS_FIELDS, str(tmp_path))
+    file_logger.log_changes(changes)
+    file_logger.close()
+
+    path = tmp_path / f"{datetime.date.today()}.mx3log"
+    entries = list(read_binary_log(str(path)))
+    assert len(entries) == 2
+    assert entries[0]["changes"] == entries[1]["changes"] == render_changes(changes)
+
+
+def test_snapshots_are_read_back_as_snapshot_entries(tmp_path):
+    file_logger = BinaryDailyRotatingLogger(STATUS_FIELDS, str(tmp_path))
+    store = StatusStore()
+    timestamp = file_logger.rotate_at - datetime.timedelta(hours=1)
+    changes = parse_changes([0x10, 0x21, 0x05], store)
+    file_logger.log_changes(changes, timestamp)
+    file_logger.log_snapshot(store.snapshot(), timestamp)
+    file_logger.log_changes(parse_changes([0x10, 0x22], store), timestamp)
+    file_logger.close()
+
+    path = tmp_path / f"{timestamp.date()}.mx3log"
+    entries = list(read_binary_log(str(path)))
+    assert [list(entry)[1] for entry in entries] == ["changes", "snapshot", "changes"]
+    assert entries[1]["snapshot"] == render_changes(changes)
+
+
+def test_rendered_entries_and_early_timestamps(tmp_path):
+    file_logger = BinaryDailyRotatingLogger(STATUS_FIELDS, str(tmp_path))
+    changes = render_changes(
+        parse_changes([0x10, 0x21, 0x05, 0xAB, 0xCD], StatusStore())
+    )
+    day_start = file_logger.day_start
+    file_logger.log(changes, day_start + datetime.timedelta(seconds=1))
+    # Queued before midnight: stored at the start of the open file's day
+    file_logger.log(changes, day_start - datetime.timedelta(seconds=1))
+    with pytest.raises(ValueError):
+        file_logger.log({"Tracking_Status": {"No_Such_Key": "1"}})
+    file_logger.close()
+
+    entries = list(read_binary_log(str(tmp_path / f"{day_start.date()}.mx3log")))
+    assert [entry["changes"] for entry in entries] == [changes, changes]
+    assert entries[1]["timestamp"] == day_start.isoformat()
@@ -0,0 +1,31 @@
+import can
+
+from MX3_CAN.can_interface import CANInterface
+
+
+def accept_only(arbitration_id: int) -> list[dict]:
+    return [{"can_id": arbitration_id, "can_mask": 0x1FFFFFFF, "extended": True}]
+
+
+def test_acceptance_filters_are_combined_per_owner():
+    can_interface = CANInterface(channel="filter_test")
+    can_interface.bus = can.Bus(interface="virtual", channel="filter_test")
+    sender = can.Bus(interface="virtual", channel="filter_test")
+    try:
+        can_interface.set_acceptance_filters("discovery", accept_only(0x1F1E3C0F))
+        can_interface.set_acceptance_filters("status_listener", accept_only(0x1F783C05))
+        can_interface.clear_acceptance_filters("discovery")
+
+        for arbitration_id in (0x1F1E3C0F, 0x1F783C05, 0x1FE3C530):
+            sender.send(can.Message(arbitration_id=arbitration_id, is_extended_id=True))
+
+        received = []
+        while (message := can_interface.bus.recv(0.05)) is not None:
+            received.append(message.arbitration_id)
+        assert received == [0x1F783C05]
+
+        can_interface.clear_acceptance_filters("status_listener")
+        assert can_interface._combined_filters() is None
+    finally:
+        sender.shutdown()
+        can_interface.bus.shutdown()
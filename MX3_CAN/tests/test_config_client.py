@@ -0,0 +1,61 @@
+import can
+
+from MX3_CAN.config_client import ConfigClient
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.controller_sim import ControllerSimulator
+
+CONFIG = {parameter: [parameter, 0xA5, parameter ^ 0xFF] for parameter in range(1, 21)}
+
+
+def test_dump_pipelines_reads_and_retries_lost_replies(buses):
+    device, controller = buses
+    simulator = ControllerSimulator(controller, rates={}, config=CONFIG)
+    client = ConfigClient(device, node_id=0x1, max_in_flight=4, timeout=0.1, retries=1)
+    simulator.start()
+    client.start()
+    notifier = can.Notifier(device, [client], timeout=0.1)
+    try:
+        # 0x30 is unknown to the controller and never answered
+        values = client.dump([*CONFIG, 0x30], timeout=2.0)
+    finally:
+        notifier.stop()
+        simulator.stop()
+
+    assert values == {parameter: bytes(value) for parameter, value in CONFIG.items()}
+    assert simulator.config_reads == len(CONFIG)
+    assert client.reads_failed == 1
+    assert client.requests_retried == 1
+    assert client.requests_sent == len(CONFIG) + 2
+
+
+def test_bounded_in_flight_and_reply_matching(buses):
+    device, controller = buses
+    client = ConfigClient(device, node_id=0x1, max_in_flight=2)
+    futures = client.read_many([0x01, 0x02, 0x03], node=0x2)
+    assert client.read(0x01, node=0x2) is futures[0x01]
+    assert [controller.recv(0).data[0] for _ in range(2)] == [0x01, 0x02]
+    assert controller.recv(0) is None
+
+    def reply(node, data):
+        client.on_message_received(
+            can.Message(
+                arbitration_id=(CONTROLLER_MESSAGE_TYPE["Config_Response"] << 16)
+                | (MODULE_TYPE["Controller"] << 12)
+                | (node << 8)
+                | (MODULE_TYPE["Status_Screen"] << 4)
+                | 0x1,
+                data=data,
+                is_extended_id=True,
+            )
+        )
+
+    # Same parameter from another node: not ours
+    reply(0x0, [0x02, 0x07])
+    assert client.replies_unmatched == 1
+    reply(0x2, [0x02, 0x07])
+    assert futures[0x02].result(0) == b"\x07"
+    # The freed slot goes to the queued read
+    assert controller.recv(0).data[0] == 0x03
+
+    client.stop()
+    assert futures[0x01].cancelled()
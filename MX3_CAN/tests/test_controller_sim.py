@@ -0,0 +1,160 @@
+import time
+
+import can
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.controller_sim import (
+    ControllerSimulator,
+    SimulatedNode,
+    frame_loss,
+    read_device_frames,
+)
+from MX3_CAN.message_parser import PARSERS, parse_changes
+from MX3_CAN.messages import SendMessage
+from MX3_CAN.metrics import DeviceMetrics, MetricsServer
+from MX3_CAN.node_discovery import (
+    send_periodic_node_discovery,
+    wait_for_configuration_write,
+)
+from MX3_CAN.status_listener import StatusListener
+from MX3_CAN.status_log import DailyRotatingLogger
+from MX3_CAN.status_request import request_controller_status
+from MX3_CAN.status_store import StatusStore
+
+UID = [0x45, 0x2F, 0xA7, 0xA2]
+
+
+def test_device_lifecycle_against_simulator(buses, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    device, controller = buses
+    simulator = ControllerSimulator(controller, rate=50, change_probability=0.5, seed=1)
+    simulator.start()
+
+    discovery = send_periodic_node_discovery(device, UID)
+    try:
+        node_id = wait_for_configuration_write(device, UID, timeout=2.0)
+    finally:
+        discovery.stop()
+    assert node_id == 1
+
+    heartbeat = SendMessage(
+        message_type=CONTROLLER_MESSAGE_TYPE["Heartbeat"], node_id=node_id
+    ).send_periodic(device, data=[], period=0.02)
+    listener = StatusListener(
+        node_id=node_id,
+        expected_reply=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"],
+        module_type=MODULE_TYPE["Status_Screen"],
+        source_module=MODULE_TYPE["Controller"],
+    )
+    notifier = can.Notifier(device, [listener], timeout=0.1)
+    try:
+        request_controller_status(device, node_id, listener)
+        time.sleep(0.3)
+    finally:
+        notifier.stop()
+        heartbeat.stop()
+        simulator.stop()
+        listener.close_logger()
+
+    assert simulator.nodes[node_id].heartbeats > 0
+    assert simulator.status_requests >= 1
+    # The initial report of every code, then ~50/s per code
+    assert listener.frames_received > len(simulator.rates)
+    assert "Tracking_Status" in listener.status_store
+    assert simulator.heartbeats_lost == 0
+
+
+def test_listener_decodes_every_report_the_simulator_sends(buses, tmp_path):
+    device, controller = buses
+    # Codes with a section of their own, so the final payload of each code
+    # is the section's state
+    codes = [
+        code
+        for code, decoder in PARSERS.items()
+        if list(PARSERS.values()).count(decoder) == 1
+    ]
+    simulator = ControllerSimulator(
+        controller, rates=dict.fromkeys(codes, 200), change_probability=0.5, seed=2
+    )
+    simulator.start()
+    discovery = send_periodic_node_discovery(device, UID)
+    try:
+        node_id = wait_for_configuration_write(device, UID, timeout=2.0)
+    finally:
+        discovery.stop()
+    node = simulator.nodes[node_id]
+
+    heartbeat = SendMessage(
+        message_type=CONTROLLER_MESSAGE_TYPE["Heartbeat"], node_id=node_id
+    ).send_periodic(device, data=[], period=0.02)
+    listener = StatusListener(
+        node_id=node_id,
+        expected_reply=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"],
+        module_type=MODULE_TYPE["Status_Screen"],
+        source_module=MODULE_TYPE["Controller"],
+        logger=DailyRotatingLogger(str(tmp_path)),
+    )
+    notifier = can.Notifier(device, [listener], timeout=0.1)
+    try:
+        request_controller_status(device, node_id, listener)
+        time.sleep(0.5)
+        simulator.stop()
+        heartbeat.stop()
+        # Let the notifier drain what is still queued on the bus
+        deadline = time.monotonic() + 2.0
+        while (
+            listener.frames_received < node.reports_sent and time.monotonic() < deadline
+        ):
+            time.sleep(0.01)
+    finally:
+        notifier.stop()
+        heartbeat.stop()
+        simulator.stop()
+        listener.close_logger()
+
+    assert node.reports_sent > len(codes)
+    # No report was lost between the simulator and the listener...
+    assert listener.frames_received == node.reports_sent
+    loss = frame_loss(node.reports_by_code, listener.frames_by_code)
+    assert set(loss) == set(codes)
+    assert all(lost == 0 for _, lost in loss.values())
+    # ...also as read from the device's metrics page, as the simulator CLI does
+    metrics = DeviceMetrics()
+    metrics.status_listener = listener
+    server = MetricsServer(metrics, "127.0.0.1:0")
+    server.start()
+    try:
+        port = server.server.server_address[1]
+        received = read_device_frames(f"http://127.0.0.1:{port}/metrics")
+    finally:
+        server.stop()
+    assert frame_loss(node.reports_by_code, received) == loss
+    # ...and the decoded state is what the simulator last sent
+    expected = StatusStore()
+    for code in codes:
+        parse_changes(bytes(node.payloads[code]), expected)
+    for code in codes:
+        section = PARSERS[code].section
+        assert listener.status_store[section] == expected[section]
+
+
+def test_status_request_for_one_code_is_answered_with_that_code(buses):
+    device, controller = buses
+    simulator = ControllerSimulator(controller, rates={0x10: 0, 0x15: 0}, seed=3)
+    node = simulator.nodes[0x1] = SimulatedNode(UID, MODULE_TYPE["Status_Screen"], 0x1)
+    request = SendMessage(
+        message_type=CONTROLLER_MESSAGE_TYPE["Status_Read_Request"], node_id=0x1
+    )
+    simulator.start()
+    try:
+        for data in ([0x15], [0x00]):
+            device.send(request.build_message(data))
+            time.sleep(0.1)
+    finally:
+        simulator.stop()
+
+    replies = []
+    while (message := device.recv(0)) is not None:
+        replies.append(message.data[0])
+    assert replies == [0x15, 0x10, 0x15]
+    assert node.reports_by_code == {0x10: 1, 0x15: 2}
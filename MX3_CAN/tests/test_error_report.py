@@ -0,0 +1,90 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import can
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.error_report import ErrorReports
+from MX3_CAN.log_query import query_log
+from MX3_CAN.message_parser import compile_status_parameters
+from MX3_CAN.status_listener import StatusListener
+from MX3_CAN.status_log import DailyRotatingLogger
+
+ERROR_PARSERS = compile_status_parameters(
+    {
+        0x01: {
+            "Section": "Driver_Error",
+            "Fields": [
+                {"Key": "Severity", "Byte": 1, "Shift": 6, "Mask": 0b11, "Map": "S"},
+                {"Key": "Detail", "Bytes": [2, 3], "Format": "{:04X}"},
+            ],
+        }
+    },
+    {"S": {0: "Info", 1: "Warning", 2: "Error", 3: "Critical"}},
+)
+
+
+def test_error_reports_reach_subscribers_and_the_log(tmp_path):
+    errors = ErrorReports(str(tmp_path / "errors"), ERROR_PARSERS)
+    listener = StatusListener(
+        node_id=0x1,
+        expected_reply=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"],
+        module_type=MODULE_TYPE["Status_Screen"],
+        source_module=MODULE_TYPE["Controller"],
+        logger=DailyRotatingLogger(str(tmp_path / "status")),
+        error_reports=errors,
+    )
+    received = []
+    errors.subscribe(received.append)
+    errors.subscribe(lambda event: 1 / 0)  # a failing subscriber is contained
+
+    error_id = (CONTROLLER_MESSAGE_TYPE["Device_Error_Report"] << 16) | (
+        listener.expected_arbitration_id & 0xFFFF
+    )
+    assert {"can_id": error_id, "can_mask": 0x1FFFFFFF, "extended": True} in (
+        listener.can_filters
+    )
+    for data in ([0x01, 0xC0, 0x12, 0x34], [0x7F, 0x00]):
+        listener.on_message_received(
+            can.Message(arbitration_id=error_id, data=data, is_extended_id=True)
+        )
+    listener.close_logger()
+
+    assert [event.code for event in received] == [0x01, 0x7F]
+    assert received[0].source == "Controller-0"
+    assert errors.subscriber_errors == 2
+    # Error reports never touch the status store
+    assert listener.frames_received == 0
+
+    (log_path,) = (tmp_path / "errors").glob("*.jsonl")
+    entries = list(query_log(str(log_path)))
+    assert entries[0]["changes"] == {
+        "Driver_Error": {"Severity": "Critical", "Detail": "1234"}
+    }
+    assert entries[1]["error"] == {
+        "source": "Controller-0",
+        "code": "0x7F",
+        "data": "7f00",
+    }
+    assert entries[1]["changes"] == {}
+    (filtered,) = query_log(str(log_path), sections=["Driver_Error"])
+    assert filtered["error"]["code"] == "0x01"
+
+
+def test_error_log_writes_can_go_to_an_executor(tmp_path):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        errors = ErrorReports(str(tmp_path), ERROR_PARSERS, executor=executor)
+        disk_free = threading.Event()
+        executor.submit(disk_free.wait)  # a slow disk
+
+        event = errors.on_error_report(0, bytes([0x01, 0x40, 0x00, 0x01]))
+        assert event.code == 0x01
+        assert not list(tmp_path.glob("*.jsonl"))
+        disk_free.set()
+        # close() waits for the queued write
+        errors.close()
+
+    (log_path,) = tmp_path.glob("*.jsonl")
+    assert [entry["changes"] for entry in query_log(str(log_path))] == [
+        {"Driver_Error": {"Severity": "Warning", "Detail": "0001"}}
+    ]
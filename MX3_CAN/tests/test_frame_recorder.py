@@ -0,0 +1,99 @@
+import time
+
+import can
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.frame_recorder import FrameRecorder, RotatingFrameFile, StatusTrigger
+
+
+def status_frame(data: list[int], timestamp: float) -> can.Message:
+    return can.Message(
+        timestamp=timestamp,
+        arbitration_id=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"] << 16 | 0x31,
+        data=data,
+        is_extended_id=True,
+    )
+
+
+def read_frames(path) -> list[can.Message]:
+    return list(can.CanutilsLogReader(str(path)))
+
+
+def test_trigger_writes_pre_and_post_trigger_frames(tmp_path):
+    recorder = FrameRecorder(
+        RotatingFrameFile(str(tmp_path)),
+        ring_size=4,
+        post_trigger_frames=2,
+        triggers=[
+            StatusTrigger("Tracking_Status", "Global_Zone_Status", "Shutdown/Error")
+        ],
+        flush_interval=60,
+    )
+    for n in range(6):
+        recorder.on_message_received(status_frame([0x15, n], timestamp=100.0 + n))
+    # Global_Zone_Status is bits 6-7 of byte 1; 2 is Shutdown/Error
+    recorder.on_message_received(status_frame([0x10, 0x80], timestamp=106.0))
+    for n in range(2):
+        recorder.on_message_received(status_frame([0x15, n], timestamp=107.0 + n))
+    recorder.stop()
+
+    (path,) = tmp_path.iterdir()
+    frames = read_frames(path)
+    # Two frames from the ring (ending with the trigger) and two after it
+    assert [frame.timestamp for frame in frames] == [105.0, 106.0, 107.0, 108.0]
+    assert frames[1].arbitration_id == status_frame([], 0).arbitration_id
+    assert frames[1].is_extended_id
+    assert bytes(frames[1].data) == bytes([0x10, 0x80])
+    assert recorder.triggers_fired == 1
+
+
+def test_continuous_mode_counts_overruns(tmp_path):
+    recorder = FrameRecorder(
+        RotatingFrameFile(str(tmp_path)),
+        mode="continuous",
+        ring_size=4,
+        flush_interval=60,
+    )
+    for n in range(6):
+        recorder.on_message_received(
+            can.Message(timestamp=float(n), arbitration_id=0x123, data=[n])
+        )
+    recorder.stop()
+
+    (path,) = tmp_path.iterdir()
+    frames = read_frames(path)
+    assert [frame.arbitration_id for frame in frames] == [0x123] * 4
+    assert [frame.data[0] for frame in frames] == [2, 3, 4, 5]
+    assert recorder.overruns == 2
+
+
+def test_completed_window_is_written_without_waiting(tmp_path):
+    recorder = FrameRecorder(
+        RotatingFrameFile(str(tmp_path)),
+        ring_size=4,
+        post_trigger_frames=2,
+        flush_interval=60,
+    )
+    recorder.on_message_received(status_frame([0x15, 0], timestamp=100.0))
+    recorder.trigger()
+    for n in range(2):
+        recorder.on_message_received(status_frame([0x15, n], timestamp=101.0 + n))
+    # The writer is woken once the window is complete, not after 60 s
+    deadline = time.monotonic() + 2.0
+    while recorder.written < recorder.write_until and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert recorder.written == recorder.write_until
+    recorder.stop()
+    assert [frame.timestamp for frame in read_frames(next(tmp_path.iterdir()))] == [
+        100.0,
+        101.0,
+        102.0,
+    ]
+    # Only what the controller sends passes the default filters
+    assert recorder.can_filters == [
+        {
+            "can_id": MODULE_TYPE["Controller"] << 12,
+            "can_mask": 0xF000,
+            "extended": True,
+        }
+    ]
@@ -0,0 +1,58 @@
+import json
+import time
+
+import can
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.instrumentation import BUCKET_BOUNDS, Histogram, Instrumentation
+from MX3_CAN.status_listener import StatusListener
+from MX3_CAN.status_log import DailyRotatingLogger
+
+
+def test_histogram_buckets_and_percentiles():
+    histogram = Histogram()
+    for _ in range(99):
+        histogram.record(3e-6)  # 4 us bucket
+    histogram.record(100.0)  # past the last bound
+
+    assert histogram.count == 100
+    assert histogram.percentile(50) == BUCKET_BOUNDS[2]
+    assert histogram.percentile(100) == 100.0
+    assert histogram.to_dict()["buckets"] == {"4": 99, "inf": 1}
+
+
+def test_listener_records_every_stage(tmp_path):
+    instrumentation = Instrumentation(str(tmp_path / "instrumentation.json"))
+    listener = StatusListener(
+        node_id=0x1,
+        expected_reply=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"],
+        module_type=MODULE_TYPE["Status_Screen"],
+        source_module=MODULE_TYPE["Controller"],
+        logger=DailyRotatingLogger(
+            str(tmp_path), buffering=-1, instrumentation=instrumentation
+        ),
+        instrumentation=instrumentation,
+    )
+    for data in ([0x15, 0x00, 0x01], [0x15, 0x00, 0x01], [0x15, 0x00, 0x02]):
+        listener.on_message_received(
+            can.Message(
+                timestamp=time.time(),
+                arbitration_id=listener.expected_arbitration_id,
+                data=data,
+                is_extended_id=True,
+            )
+        )
+    listener.logger.flush()
+    listener.close_logger()
+
+    with open(tmp_path / "instrumentation.json") as file:
+        dumped = json.load(file)
+    assert dumped["counters"] == {"frames_received": 3, "frames_unchanged": 1}
+    stages = dumped["stages"]
+    for stage in ("kernel_to_listener", "lock_wait"):
+        assert stages[stage]["count"] == 3
+    for stage in ("parse", "diff"):
+        assert stages[stage]["count"] == 2
+    # Two changes plus the snapshot after the first, flushed once
+    assert stages["log_serialize"]["count"] == 3
+    assert stages["entry_to_disk"]["count"] == 1
@@ -0,0 +1,133 @@
+import datetime
+import json
+
+from MX3_CAN.log_query import (
+    find_offset,
+    iter_log_entries,
+    query_logs,
+    state_at,
+    update_index,
+)
+
+
+def write_entries(path, entries, indent=None):
+    with open(path, "a") as file:
+        for entry in entries:
+            json.dump(entry, file, indent=indent)
+            file.write("\n")
+
+
+def entries_for(day: str, start: int, count: int) -> list[dict]:
+    base = datetime.datetime.fromisoformat(f"{day}T08:00:00")
+    return [
+        {
+            "timestamp": (base + datetime.timedelta(minutes=n)).isoformat(),
+            "changes": {
+                "Coil_Driver_Status" if n % 2 else "Tracking_Status": {"n": str(n)}
+            },
+        }
+        for n in range(start, start + count)
+    ]
+
+
+def test_pretty_printed_entries_are_streamed_with_offsets(tmp_path):
+    path = tmp_path / "2025-08-15.jsonl"
+    entries = entries_for("2025-08-15", 0, 5)
+    write_entries(path, entries, indent=2)
+
+    data = path.read_bytes()
+    streamed = list(iter_log_entries(str(path)))
+    assert [entry for _, entry in streamed] == entries
+    assert all(data[offset : offset + 1] == b"{" for offset, _ in streamed)
+
+
+def test_time_of_day_window_across_days(tmp_path):
+    for day in ("2025-08-15", "2025-08-16"):
+        write_entries(tmp_path / f"{day}.jsonl", entries_for(day, 0, 120), indent=2)
+
+    results = list(
+        query_logs(
+            [str(path) for path in tmp_path.glob("*.jsonl")],
+            datetime.time(8, 40),
+            datetime.time(9, 0),
+            sections=["Coil_Driver_Status"],
+        )
+    )
+
+    assert [entry["timestamp"][:10] for entry in results] == (
+        ["2025-08-15"] * 10 + ["2025-08-16"] * 10
+    )
+    assert results[0]["timestamp"] == "2025-08-15T08:41:00"
+    assert all(list(entry["changes"]) == ["Coil_Driver_Status"] for entry in results)
+
+
+def test_index_is_extended_as_the_log_grows(tmp_path):
+    path = tmp_path / "2025-08-15.jsonl"
+    write_entries(path, entries_for("2025-08-15", 0, 60))
+    update_index(str(path), stride=256)
+    write_entries(path, entries_for("2025-08-15", 60, 60))
+    update_index(str(path), stride=256)
+
+    start = datetime.datetime(2025, 8, 15, 9, 30)
+    results = list(query_logs([str(path)], start, start))
+    assert [entry["changes"] for entry in results] == [{"Tracking_Status": {"n": "90"}}]
+
+
+def test_state_at_starts_from_the_nearest_snapshot(tmp_path):
+    write_entries(
+        tmp_path / "2025-08-15.jsonl",
+        [
+            {
+                "timestamp": "2025-08-15T08:00:00",
+                "snapshot": {"Tracking_Status": {"Octant": "0-45", "Screen": "Left"}},
+            },
+            {
+                "timestamp": "2025-08-15T09:00:00",
+                "changes": {"Tracking_Status": {"Octant": "45-90"}},
+            },
+        ],
+    )
+    write_entries(
+        tmp_path / "2025-08-16.jsonl",
+        [
+            {
+                "timestamp": "2025-08-16T08:00:00",
+                "changes": {"Tracking_Status": {"Screen": "Right"}},
+            },
+            {
+                "timestamp": "2025-08-16T10:00:00",
+                "changes": {"Tracking_Status": {"Octant": "90-135"}},
+            },
+        ],
+    )
+    paths = [str(path) for path in tmp_path.glob("*.jsonl")]
+
+    assert state_at(paths, datetime.datetime(2025, 8, 16, 9, 0)) == {
+        "Tracking_Status": {"Octant": "45-90", "Screen": "Right"}
+    }
+    assert state_at(paths, datetime.datetime(2025, 8, 15, 8, 30)) == {
+        "Tracking_Status": {"Octant": "0-45", "Screen": "Left"}
+    }
+
+
+def test_anchor_records_out_of_order_are_skipped(tmp_path):
+    path = tmp_path / "2025-08-15.jsonl"
+    first, second, third = entries_for("2025-08-15", 0, 3)
+    # Re-anchored at 08:02 while the 08:01 entry was still queued
+    anchor = {
+        "timestamp": third["timestamp"],
+        "anchor": {"monotonic": 120.0, "wall": 1755237720.0},
+    }
+    write_entries(path, [first, anchor, second, third])
+    update_index(str(path), stride=1)
+
+    assert state_at([str(path)], datetime.datetime(2025, 8, 15, 8, 1)) == {
+        "Tracking_Status": {"n": "0"},
+        "Coil_Driver_Status": {"n": "1"},
+    }
+    # The anchor is not indexed, so the search for 08:01 starts before it
+    assert find_offset(str(path), datetime.datetime(2025, 8, 15, 8, 1)) == 0
+    assert [
+        entry["timestamp"]
+        for entry in query_logs([str(path)], datetime.datetime(2025, 8, 15, 8, 1))
+    ] == [second["timestamp"], third["timestamp"]]
@@ -1,6 +1,14 @@
 import pytest
 
-from MX3_CAN.message_parser import parse_tracking_status
+from MX3_CAN.message_parser import (
+    ERROR_PARSERS,
+    STATUS_FIELDS,
+    compile_status_parameters,
+    parse_changes,
+    parse_message,
+    parse_tracking_status,
+)
+from MX3_CAN.status_store import StatusStore, render_changes
 
 
 def test_parse_tracking_status_valid():
@@ -36,3 +44,162 @@ def test_parse_tracking_status_invalid_length():
 
     with pytest.raises((IndexError, ValueError)):  # Adjust as needed
         parse_tracking_status(data_bytes, status_store)
+
+
+def test_parse_message_dispatches_operator_mnid_codes_to_one_section():
+    status_store = {}
+
+    parse_message([0x12, 0x00, 0xAB, 0xCD, 0x01, 0x02, 0x00, 0x0F], status_store)
+
+    assert status_store == {
+        "Operator_MNID": {
+            "OperatorMNID_1": "ABCD",
+            "OperatorMNID_2": "0102",
+            "OperatorMNID_3": "000F",
+        }
+    }
+
+
+def test_parse_locator_failure_update_unknown_code():
+    maps = {"FAILURES": {0: "Test Status"}, "UPDATES": {1: "Add"}}
+    decoders = compile_status_parameters(
+        {
+            0x1D: {
+                "Section": "Locator_Failure_Update",
+                "Fields": [
+                    {
+                        "Key": "Failure_Type",
+                        "Byte": 1,
+                        "Mask": 0b111,
+                        "Map": "FAILURES",
+                        "Default": "Unknown ({code})",
+                    },
+                    {
+                        "Key": "Update_Type",
+                        "Byte": 1,
+                        "Shift": 3,
+                        "Mask": 0b1,
+                        "Map": "UPDATES",
+                    },
+                ],
+            }
+        },
+        maps,
+    )
+
+    updated = decoders[0x1D]([0x1D, 0b0000_0101], {})
+
+    assert updated["Locator_Failure_Update"] == {
+        "Failure_Type": "Unknown (5)",
+        "Update_Type": "Unknown",
+    }
+
+
+def test_compile_status_parameters_expands_numbered_groups():
+    decoders = compile_status_parameters(
+        {
+            0x14: {
+                "Section": "Diagnostic_Information",
+                "Fields": [
+                    {
+                        "Key": "Driver_{i}_Status",
+                        "Byte": 1,
+                        "Shift": 6,
+                        "Shift_Step": -2,
+                        "Mask": 0b11,
+                        "Map": "LEVEL",
+                        "Count": 4,
+                    },
+                ],
+            }
+        },
+        {"LEVEL": {0: "Safe/Normal", 1: "Warning", 2: "Shutdown/Error", 3: "Reserved"}},
+    )
+
+    decoded = decoders[0x14]([0x14, 0b00_01_10_11], {})
+
+    assert decoders[0x14].decode([0x14, 0b00_01_10_11]) == [0, 1, 2, 3]
+    assert decoded["Diagnostic_Information"] == {
+        "Driver_0_Status": "Safe/Normal",
+        "Driver_1_Status": "Warning",
+        "Driver_2_Status": "Shutdown/Error",
+        "Driver_3_Status": "Reserved",
+    }
+
+
+def test_compile_status_parameters_rejects_unknown_map():
+    with pytest.raises(ValueError):
+        compile_status_parameters(
+            {
+                0x10: {
+                    "Section": "Tracking_Status",
+                    "Fields": [{"Key": "X", "Byte": 1, "Map": "MISSING"}],
+                }
+            },
+            {},
+        )
+
+
+def test_parse_changes_reports_only_changed_keys():
+    status_store = StatusStore()
+
+    first = parse_changes([0x15, 0x00, 0x01], status_store)
+    repeat = parse_changes([0x15, 0x00, 0x01], status_store)
+    second = parse_changes([0x15, 0x00, 0x02], status_store)
+
+    assert render_changes(first) == {
+        "CANBus_Status": {
+            "Vortex_CAN_Bus_Status": "Safe/Normal",
+            "AVR_CAN_Bus_Status": "Warning",
+        }
+    }
+    assert repeat == []
+    assert [(field.key, code) for field, code in second] == [("AVR_CAN_Bus_Status", 2)]
+    assert status_store["CANBus_Status"]["AVR_CAN_Bus_Status"] == "Shutdown/Error"
+    assert list(status_store.records["CANBus_Status"].codes) == [0, 2]
+
+
+def test_codes_rendering_the_same_string_are_not_changes():
+    decoder = compile_status_parameters(
+        {
+            0x40: {
+                "Section": "Test_Status",
+                "Fields": [
+                    {"Key": "State", "Byte": 1, "Mask": 0b111, "Map": "STATES"},
+                    {
+                        "Key": "Detail",
+                        "Byte": 1,
+                        "Shift": 3,
+                        "Mask": 0b111,
+                        "Map": "STATES",
+                        "Default": "Unknown ({code})",
+                    },
+                ],
+            }
+        },
+        {"STATES": {0: "Idle", 1: "Active"}},
+    )[0x40]
+    status_store = StatusStore()
+
+    decoder.update([0x40, 0b101101], status_store)
+    # 5 -> 6 both read "Unknown"; the Detail default tells 5 from 6
+    changes = decoder.update([0x40, 0b110110], status_store)
+
+    assert render_changes(changes) == {"Test_Status": {"Detail": "Unknown (6)"}}
+    assert status_store["Test_Status"]["State"] == "Unknown"
+
+
+def test_layouts_compiled_separately_share_one_key_id_space():
+    layout = {
+        "Section": "Driver_Error",
+        "Fields": [{"Key": "Detail", "Bytes": [1, 2], "Format": "{:04X}"}],
+    }
+    (decoder,) = compile_status_parameters(
+        {0x01: layout}, first_key_id=len(STATUS_FIELDS)
+    ).values()
+
+    assert [field.key_id for field in decoder.fields] == [len(STATUS_FIELDS)]
+    error_key_ids = {
+        field.key_id for decoder in ERROR_PARSERS.values() for field in decoder.fields
+    }
+    assert not error_key_ids & {field.key_id for field in STATUS_FIELDS}
@@ -0,0 +1,41 @@
+import uuid
+
+import can
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE
+from MX3_CAN.messages import SendMessage, send_batch
+
+
+def status_request(node_id: int, prepared: bool = True) -> SendMessage:
+    return SendMessage(
+        message_type=CONTROLLER_MESSAGE_TYPE["Status_Read_Request"],
+        node_id=node_id,
+        prepared=prepared,
+    )
+
+
+def test_prepared_sender_reuses_messages():
+    sender = status_request(0x2)
+    request = sender.build_message([0x00])
+
+    assert sender.build_message([0x00]) is request
+    assert sender.build_message([0x01]) is not request
+    assert request.arbitration_id == status_request(0x2, False).build_arbitration_id()
+    assert bytes(request.data) == b"\x00"
+    assert status_request(0x2, False).build_message([0x00]) is not request
+
+
+def test_send_batch_to_several_nodes():
+    channel = f"test-{uuid.uuid4().hex}"
+    with can.Bus(interface="virtual", channel=channel) as sender_bus, can.Bus(
+        interface="virtual", channel=channel
+    ) as receiver_bus:
+        sent = send_batch(
+            sender_bus, [status_request(node).build_message([0x00]) for node in (1, 2)]
+        )
+        sent += status_request(3).send_many(sender_bus, [[0x10], [0x11]])
+        received = [receiver_bus.recv(timeout=1) for _ in range(sent)]
+
+    assert sent == 4
+    assert [(msg.arbitration_id >> 8) & 0xF for msg in received] == [1, 2, 3, 3]
+    assert [msg.data[0] for msg in received] == [0x00, 0x00, 0x10, 0x11]
@@ -0,0 +1,88 @@
+import socket
+import urllib.request
+
+import can
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.metrics import DeviceMetrics, MetricsServer
+from MX3_CAN.status_listener import StatusListener
+from MX3_CAN.status_log import DailyRotatingLogger
+
+
+def test_render_status_metrics(tmp_path):
+    listener = StatusListener(
+        node_id=0x1,
+        expected_reply=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"],
+        module_type=MODULE_TYPE["Status_Screen"],
+        source_module=MODULE_TYPE["Controller"],
+        logger=DailyRotatingLogger(str(tmp_path)),
+    )
+    metrics = DeviceMetrics()
+    metrics.status_listener = listener
+    metrics.discovery_attempts = 2
+    metrics.discovery_timeouts = 1
+    assert "mx3_seconds_since_status_report nan" in metrics.render()
+
+    for data in ([0x15, 0x00, 0x01], [0x15, 0x00, 0x01], [0x10]):
+        listener.on_message_received(
+            can.Message(
+                arbitration_id=listener.expected_arbitration_id,
+                data=data,
+                is_extended_id=True,
+            )
+        )
+    listener.close_logger()
+    lines = metrics.render().splitlines()
+
+    assert 'mx3_status_frames_total{code="0x15"} 2' in lines
+    assert 'mx3_status_frames_total{code="0x10"} 1' in lines
+    assert "mx3_status_frames_unchanged_total 1" in lines
+    assert "mx3_heartbeat_up 0" in lines
+    assert "mx3_discovery_attempts_total 2" in lines
+    assert "mx3_discovery_timeouts_total 1" in lines
+    (written,) = [line for line in lines if line.startswith("mx3_log_bytes")]
+    assert int(written.split()[1]) == sum(
+        path.stat().st_size for path in tmp_path.glob("*.jsonl")
+    )
+
+
+def test_serve_over_tcp_and_unix_socket(tmp_path):
+    metrics = DeviceMetrics()
+    server = MetricsServer(metrics, "127.0.0.1:0")
+    server.start()
+    try:
+        port = server.server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as reply:
+            assert reply.headers["Content-Type"].startswith("text/plain")
+            assert b"mx3_heartbeat_up 0" in reply.read()
+    finally:
+        server.stop()
+
+    path = str(tmp_path / "metrics.sock")
+    server = MetricsServer(metrics, f"unix:{path}")
+    server.start()
+    try:
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(path)
+            client.sendall(b"GET /metrics HTTP/1.0\r\n\r\n")
+            reply = b"".join(iter(lambda: client.recv(4096), b""))
+        assert reply.startswith(b"HTTP/1.0 200")
+        assert b"mx3_discovery_attempts_total 0" in reply
+    finally:
+        server.stop()
+
+
+def test_heartbeat_is_down_once_the_run_ends():
+    class KernelTask:
+        """A SocketCAN BCM task: no thread and no stopped flag."""
+
+        def stop(self):
+            pass
+
+    metrics = DeviceMetrics()
+    metrics.heartbeat_task = KernelTask()
+    assert metrics.heartbeat_up()
+
+    metrics.end_run()
+    assert not metrics.heartbeat_up()
+    assert "mx3_heartbeat_up 0" in metrics.render().splitlines()
@@ -0,0 +1,69 @@
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.messages import SendMessage, decode_arbitration_id
+from MX3_CAN.monitor import BusMonitor
+
+STATUS = CONTROLLER_MESSAGE_TYPE["Device_Status_Report"]
+
+
+def frame(source_module: str, source_node: int, data: list[int], message_type=STATUS):
+    sender = SendMessage(
+        message_type=message_type,
+        node_id=source_node,
+        module_type=MODULE_TYPE[source_module],
+        dest_module=MODULE_TYPE["Status_Screen"],
+        dest_node=0x1,
+    )
+    return sender.build_message(data)
+
+
+def test_decode_arbitration_id_inverts_build():
+    sender = SendMessage(message_type=STATUS, node_id=0x5, dest_node=0x2)
+    fields = decode_arbitration_id(sender.build_arbitration_id())
+    assert fields == (
+        STATUS,
+        MODULE_TYPE["Status_Screen"],
+        0x5,
+        MODULE_TYPE["Controller"],
+        0x2,
+    )
+
+
+def test_routes_each_sender_to_its_own_store_and_log(tmp_path):
+    monitor = BusMonitor(str(tmp_path), settings={"WRITER": "direct"})
+    monitor.on_message_received(frame("Controller", 0x0, [0x15, 0x00, 0x01]))
+    monitor.on_message_received(frame("Controller", 0x1, [0x15, 0x00, 0x02]))
+    monitor.on_message_received(frame("Controller", 0x0, [0x15, 0x00, 0x01]))
+    monitor.on_message_received(frame("Tracker", 0x3, [0x15, 0x00, 0x01]))
+    monitor.on_message_received(
+        frame("Controller", 0x0, [0x00], CONTROLLER_MESSAGE_TYPE["Heartbeat"])
+    )
+
+    controller = MODULE_TYPE["Controller"]
+    assert set(monitor.nodes) == {
+        (controller, 0x0),
+        (controller, 0x1),
+        (MODULE_TYPE["Tracker"], 0x3),
+    }
+    first = monitor.nodes[(controller, 0x0)]
+    assert first.frames_received == 2
+    assert first.frames_unchanged == 1
+    assert first.status_store != monitor.nodes[(controller, 0x1)].status_store
+    assert monitor.frames_ignored == 1
+    monitor.stop()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "Controller-0",
+        "Controller-1",
+        "Tracker-3",
+    ]
+    assert all(any(path.glob("*.jsonl")) for path in tmp_path.iterdir())
+
+
+def test_can_filters_accept_reports_from_any_sender():
+    status_filter, ext_filter, _, _ = BusMonitor(settings={}).can_filters
+    report = frame("Driver", 0x7, [0x10]).arbitration_id
+    assert report & status_filter["can_mask"] == status_filter["can_id"]
+    ext_report = frame(
+        "Driver", 0x7, [0x80], CONTROLLER_MESSAGE_TYPE["Device_Status_Report_Ext"]
+    ).arbitration_id
+    assert ext_report & ext_filter["can_mask"] == ext_filter["can_id"]
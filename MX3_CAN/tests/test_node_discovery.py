@@ -0,0 +1,58 @@
+import time
+
+import can
+import pytest
+
+from MX3_CAN.config_yaml import MODULE_TYPE
+from MX3_CAN.node_discovery import (
+    ConfigurationWrite,
+    configuration_write_arbitration_id,
+    receive_configuration_write,
+    wait_for_configuration_write,
+)
+
+UID = [0x45, 0x2F, 0xA7, 0xA2]
+
+
+def test_wait_for_configuration_write_ignores_other_frames(buses):
+    device_bus, controller_bus = buses
+    config_write_id = configuration_write_arbitration_id()
+    for arbitration_id, data in [
+        (0x1F783C05, [0x10, 0, 0, 0, 0, 0, 0, 0]),
+        (config_write_id, [0x00, 0x01, 0x02, 0x03, 0x04, 0x07, 0, 0]),
+        (config_write_id, [0x00, *UID, 0x05, 0, 0]),
+    ]:
+        controller_bus.send(
+            can.Message(arbitration_id=arbitration_id, data=data, is_extended_id=True)
+        )
+
+    assert wait_for_configuration_write(device_bus, UID, timeout=1.0) == 0x5
+
+
+def test_configuration_write_names_the_assigning_controller(buses):
+    device_bus, controller_bus = buses
+    controller_bus.send(
+        can.Message(
+            arbitration_id=configuration_write_arbitration_id(),
+            data=[0x00, *UID, 0x05, 0, 0],
+            is_extended_id=True,
+        )
+    )
+
+    assert receive_configuration_write(
+        device_bus, UID, timeout=1.0
+    ) == ConfigurationWrite(0x5, MODULE_TYPE["Controller"], 0x0)
+
+
+def test_wait_for_configuration_write_times_out_on_silent_bus(
+    buses, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    device_bus, _ = buses
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        wait_for_configuration_write(device_bus, UID, timeout=0.2)
+
+    assert 0.2 <= time.monotonic() - started < 0.5
+    assert list((tmp_path / "logs").glob("error_log_*.log"))
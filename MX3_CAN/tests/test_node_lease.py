@@ -0,0 +1,66 @@
+import time
+import uuid
+
+import can
+import pytest
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.controller_sim import ControllerSimulator, SimulatedNode
+from MX3_CAN.node_lease import NodeLeaseStore
+from MX3_CAN.status_listener import StatusListener
+from MX3_CAN.status_log import DailyRotatingLogger
+from MX3_CAN.status_request import request_controller_status
+
+UID = [0x45, 0x2F, 0xA7, 0xA2]
+
+
+def test_lease_round_trip_and_mismatches(tmp_path):
+    store = NodeLeaseStore(str(tmp_path / "state" / "lease.json"))
+    assert store.load(UID, "can0") is None
+
+    saved = store.save(UID, 0x5, "can0", MODULE_TYPE["Controller"], 0x0)
+    assert store.load(UID, "can0") == saved
+    assert [path.name for path in (tmp_path / "state").iterdir()] == ["lease.json"]
+    # Another device, interface or controller
+    assert store.load([0, 0, 0, 0], "can0") is None
+    assert store.load(UID, "can1") is None
+    assert store.load(UID, "can0", controller_node=0x1) is None
+    # Assigned by another controller node than the one we talk to
+    store.save(UID, 0x5, "can0", MODULE_TYPE["Controller"], 0x1)
+    assert store.load(UID, "can0") is None
+
+    (tmp_path / "state" / "lease.json").write_text('{"uid": [69')
+    assert store.load(UID, "can0") is None
+    store.clear()
+    store.clear()
+    assert store.load(UID, "can0") is None
+
+
+@pytest.mark.parametrize("known", [True, False])
+def test_leased_node_id_is_verified_by_a_reply(tmp_path, known):
+    channel = f"test-{uuid.uuid4().hex}"
+    with can.Bus(interface="virtual", channel=channel) as device, can.Bus(
+        interface="virtual", channel=channel
+    ) as controller:
+        simulator = ControllerSimulator(controller, rate=1)
+        if known:
+            # The controller still has the node from before the restart
+            simulator.nodes[0x5] = SimulatedNode(UID, MODULE_TYPE["Status_Screen"], 0x5)
+        listener = StatusListener(
+            node_id=0x5,
+            expected_reply=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"],
+            module_type=MODULE_TYPE["Status_Screen"],
+            source_module=MODULE_TYPE["Controller"],
+            logger=DailyRotatingLogger(str(tmp_path)),
+        )
+        simulator.start()
+        notifier = can.Notifier(device, [listener], timeout=0.1)
+        started = time.monotonic()
+        try:
+            accepted = request_controller_status(device, 0x5, listener, timeout=0.3)
+        finally:
+            notifier.stop()
+            simulator.stop()
+
+    assert accepted is known
+    assert time.monotonic() - started < 0.5
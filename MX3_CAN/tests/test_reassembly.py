@@ -0,0 +1,93 @@
+import can
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.reassembly import LAST_SEGMENT, Reassembler
+from MX3_CAN.status_listener import StatusListener
+from MX3_CAN.status_log import DailyRotatingLogger
+
+EXT = CONTROLLER_MESSAGE_TYPE["Device_Status_Report_Ext"]
+
+
+def segments(arbitration_id: int, payload: bytes) -> list[can.Message]:
+    chunks = [payload[n : n + 7] for n in range(0, len(payload), 7)]
+    return [
+        can.Message(
+            arbitration_id=arbitration_id,
+            data=bytes([index | (LAST_SEGMENT if index == len(chunks) - 1 else 0)])
+            + chunk,
+            is_extended_id=True,
+        )
+        for index, chunk in enumerate(chunks)
+    ]
+
+
+def test_interleaved_sequences_and_lost_segments():
+    reassembler = Reassembler(max_segments=4, max_sequences=2)
+    first = segments((EXT << 16) | 0x3000, bytes(range(20)))
+    second = segments((EXT << 16) | 0x3100, bytes(range(100, 110)))
+
+    results = [
+        reassembler.feed(msg) for msg in (first[0], second[0], first[1], second[1])
+    ]
+    assert results == [None, None, None, bytes(range(100, 110))]
+    assert reassembler.feed(first[2]) == bytes(range(20))
+
+    # A missing middle segment drops the sequence and frees its buffer
+    assert reassembler.feed(first[0]) is None
+    assert reassembler.feed(first[2]) is None
+    assert reassembler.lost == 1
+    assert reassembler.pending == 0
+
+    # Longer than max_segments
+    for msg in segments((EXT << 16) | 0x3000, bytes(40)):
+        assert reassembler.feed(msg) is None
+    assert reassembler.overflows == 1
+
+
+def test_memory_stays_bounded_and_sequences_time_out(monkeypatch):
+    reassembler = Reassembler(timeout=1.0, max_sequences=2)
+    now = [100.0]
+    monkeypatch.setattr("MX3_CAN.reassembly.time.monotonic", lambda: now[0])
+
+    for source in range(3):
+        reassembler.feed(segments((EXT << 16) | (source << 8), bytes(14))[0])
+    assert reassembler.pending == 2
+    assert reassembler.evicted == 1
+
+    now[0] += 2.0
+    reassembler.expire()
+    assert reassembler.pending == 0
+    assert reassembler.timeouts == 2
+
+
+def test_listener_parses_reassembled_status(tmp_path):
+    listener = StatusListener(
+        node_id=0x1,
+        expected_reply=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"],
+        module_type=MODULE_TYPE["Status_Screen"],
+        source_module=MODULE_TYPE["Controller"],
+        logger=DailyRotatingLogger(str(tmp_path)),
+    )
+    single = can.Message(
+        arbitration_id=listener.expected_arbitration_id,
+        data=[0x15, 0x00, 0x01],
+        is_extended_id=True,
+    )
+    listener.on_message_received(single)
+    expected = listener.status_store.snapshot()
+
+    listener = StatusListener(
+        node_id=0x1,
+        expected_reply=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"],
+        module_type=MODULE_TYPE["Status_Screen"],
+        source_module=MODULE_TYPE["Controller"],
+        logger=DailyRotatingLogger(str(tmp_path)),
+    )
+    for msg in segments(
+        listener.expected_ext_arbitration_id, bytes([0x15, 0x00, 0x01])
+    ):
+        listener.on_message_received(msg)
+    listener.close_logger()
+
+    assert listener.frames_received == 1
+    assert listener.status_store.snapshot() == expected
@@ -0,0 +1,45 @@
+import can
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE
+from MX3_CAN.replay import read_frames, replay, replay_listener
+
+STATUS_ID = CONTROLLER_MESSAGE_TYPE["Device_Status_Report"] << 16 | 0x3031
+
+
+def test_candump_output_is_parsed(tmp_path):
+    path = tmp_path / "capture.txt"
+    path.write_text(
+        f"(1700000000.000000)  can0  {STATUS_ID:08X}   [3]  15 00 01\n"
+        "(1700000000.500000)  can0  123   [0]  remote request\n"
+    )
+
+    frames = list(read_frames(str(path)))
+
+    assert [frame.arbitration_id for frame in frames] == [STATUS_ID, 0x123]
+    assert frames[0].is_extended_id and not frames[1].is_extended_id
+    assert bytes(frames[0].data) == bytes([0x15, 0x00, 0x01])
+    assert frames[1].is_remote_frame
+    assert frames[1].timestamp == 1700000000.5
+
+
+def test_replay_feeds_every_frame_to_the_listener(tmp_path):
+    frames = [
+        can.Message(
+            timestamp=n * 0.001,
+            arbitration_id=STATUS_ID,
+            data=[0x15, 0x00, n % 2],
+            is_extended_id=True,
+        )
+        for n in range(200)
+    ]
+    listener = replay_listener(str(tmp_path))
+    try:
+        stats = replay(frames, listener)
+    finally:
+        listener.close_logger()
+
+    assert stats.frames == 200
+    assert len(stats.latencies) == 200
+    assert listener.frames_received == 200
+    assert "Throughput" in stats.report()
+    assert listener.error_reports.directory == str(tmp_path / "errors")
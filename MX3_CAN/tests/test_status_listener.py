@@ -0,0 +1,120 @@
+import can
+import pytest
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN import status_listener
+from MX3_CAN.status_listener import StatusListener
+from MX3_CAN.status_store import render_changes
+
+
+@pytest.fixture
+def listener(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    status_listener = StatusListener(
+        node_id=0x1,
+        expected_reply=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"],
+        module_type=MODULE_TYPE["Status_Screen"],
+        source_module=MODULE_TYPE["Controller"],
+    )
+    yield status_listener
+    status_listener.close_logger()
+
+
+def status_report(listener: StatusListener, data: list[int]) -> can.Message:
+    return can.Message(
+        arbitration_id=listener.expected_arbitration_id,
+        data=data,
+        is_extended_id=True,
+    )
+
+
+def test_repeated_payload_skips_decoding(listener, monkeypatch):
+    logged = []
+    monkeypatch.setattr(
+        listener.logger,
+        "log_changes",
+        lambda changes, timestamp=None, monotonic=None: logged.append(
+            render_changes(changes)
+        ),
+    )
+
+    listener.on_message_received(status_report(listener, [0x15, 0x00, 0x01]))
+    listener.on_message_received(status_report(listener, [0x15, 0x00, 0x01]))
+
+    assert listener.frames_received == 2
+    assert listener.frames_unchanged == 1
+    assert len(logged) == 1
+    assert listener.received_event.is_set()
+
+
+def test_payload_is_cached_only_after_decoding(listener, monkeypatch):
+    decoder = status_listener.PARSERS[0x15]
+
+    class FailingOnceDecoder:
+        failed = False
+
+        def decode(self, payload):
+            if not self.failed:
+                self.failed = True
+                raise ValueError("corrupt payload")
+            return decoder.decode(payload)
+
+        def apply(self, codes, store):
+            return decoder.apply(codes, store)
+
+    monkeypatch.setitem(status_listener.PARSERS, 0x15, FailingOnceDecoder())
+
+    listener.on_message_received(status_report(listener, [0x15, 0x00, 0x01]))
+    listener.on_message_received(status_report(listener, [0x15, 0x00, 0x01]))
+
+    assert listener.frames_unchanged == 0
+    assert 0x15 in listener.last_payloads
+    assert listener.status_store.snapshot()
+
+
+def test_shared_section_codes_invalidate_each_other(listener, monkeypatch):
+    logged = []
+    monkeypatch.setattr(
+        listener.logger,
+        "log_changes",
+        lambda changes, timestamp=None, monotonic=None: logged.append(
+            render_changes(changes)
+        ),
+    )
+
+    listener.on_message_received(status_report(listener, [0x11, 0, 0x00, 0x01]))
+    listener.on_message_received(status_report(listener, [0x12, 0, 0x00, 0x02]))
+    listener.on_message_received(status_report(listener, [0x11, 0, 0x00, 0x01]))
+
+    assert listener.frames_unchanged == 0
+    assert logged[-1] == {"Operator_MNID": {"OperatorMNID_1": "0001"}}
+    assert listener.status_store["Operator_MNID"]["OperatorMNID_1"] == "0001"
+
+
+def test_first_change_is_followed_by_a_snapshot(listener, monkeypatch):
+    snapshots = []
+    monkeypatch.setattr(
+        listener.logger,
+        "log_snapshot",
+        lambda fields, timestamp=None, monotonic=None: snapshots.append(
+            render_changes(fields)
+        ),
+    )
+
+    listener.on_message_received(status_report(listener, [0x15, 0x00, 0x01]))
+    listener.on_message_received(status_report(listener, [0x16, 0x00]))
+
+    assert len(snapshots) == 1
+    assert snapshots[0] == {"CANBus_Status": listener.status_store["CANBus_Status"]}
+
+
+def test_clock_is_only_read_with_instrumentation(listener, monkeypatch):
+    def perf_counter():
+        raise AssertionError("perf_counter() called without instrumentation")
+
+    monkeypatch.setattr(status_listener.time, "perf_counter", perf_counter)
+
+    listener.on_message_received(status_report(listener, [0x15, 0x00, 0x01]))
+    listener.on_message_received(status_report(listener, [0x16, 0x00]))
+
+    assert listener.frames_received == 2
@@ -0,0 +1,129 @@
+import datetime
+import json
+import threading
+import time
+
+import pytest
+
+from MX3_CAN.status_log import AnchoredClock, BackgroundLogWriter, DailyRotatingLogger
+
+
+def read_entries(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_logger_rotates_on_entry_timestamp(tmp_path):
+    file_logger = DailyRotatingLogger(str(tmp_path))
+    midnight = file_logger.rotate_at
+
+    file_logger.log({"A": {"x": "1"}}, midnight - datetime.timedelta(microseconds=1))
+    file_logger.log({"A": {"x": "2"}}, midnight)
+    file_logger.close()
+
+    before = tmp_path / f"{(midnight - datetime.timedelta(days=1)).date()}.jsonl"
+    after = tmp_path / f"{midnight.date()}.jsonl"
+    assert [entry["changes"]["A"]["x"] for entry in read_entries(before)] == ["1"]
+    assert [entry["changes"]["A"]["x"] for entry in read_entries(after)] == ["2"]
+
+
+def test_background_writer_writes_everything_on_close(tmp_path):
+    writer = BackgroundLogWriter(
+        DailyRotatingLogger(str(tmp_path), buffering=-1),
+        batch_size=4,
+        fsync_interval=0,
+    )
+    timestamp = datetime.datetime(2025, 6, 11, 8, 41, 23)
+
+    for n in range(10):
+        writer.log({"Tracking_Status": {"Closest_Locator_ID": f"{n:06X}"}}, timestamp)
+    writer.close()
+
+    entries = read_entries(tmp_path / f"{datetime.date.today()}.jsonl")
+    assert len(entries) == 10
+    assert entries[0]["timestamp"] == "2025-06-11T08:41:23"
+    assert writer.written == 10
+    assert writer.dropped == 0
+
+
+class BlockingLogger:
+    def __init__(self):
+        self.release = threading.Event()
+        self.entries = []
+
+    def log(self, data, timestamp=None, monotonic=None):
+        self.release.wait()
+        self.entries.append(data)
+
+    def flush(self, fsync=False):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_background_writer_drops_when_queue_is_full():
+    file_logger = BlockingLogger()
+    writer = BackgroundLogWriter(file_logger, queue_size=2)
+
+    for n in range(10):
+        writer.log({"n": n})
+    dropped = writer.dropped
+    file_logger.release.set()
+    writer.close()
+
+    # One entry is held by the stalled writer, two fit in the queue
+    assert dropped >= 7
+    assert len(file_logger.entries) == 10 - dropped
+
+
+def test_entries_carry_monotonic_times_mapped_by_anchors(tmp_path):
+    clock = AnchoredClock(anchor_interval=1.0)
+    file_logger = DailyRotatingLogger(str(tmp_path), clock=clock)
+    received = clock.anchor[0] + 0.5
+
+    file_logger.log({"A": {"x": "1"}}, monotonic=received)
+    # Past the anchor interval: resampled, and a new anchor is written
+    file_logger.log({"A": {"x": "2"}}, monotonic=received + 1.0)
+    file_logger.log({"A": {"x": "3"}}, datetime.datetime(2025, 6, 11, 8, 41, 23))
+    file_logger.close()
+
+    first_anchor, first, second_anchor, second, replayed = read_entries(
+        tmp_path / f"{datetime.date.today()}.jsonl"
+    )
+    for anchor, entry in ((first_anchor, first), (second_anchor, second)):
+        wall = anchor["anchor"]["wall"] + entry["monotonic"]
+        wall -= anchor["anchor"]["monotonic"]
+        assert datetime.datetime.fromisoformat(
+            entry["timestamp"]
+        ).timestamp() == pytest.approx(wall, abs=1e-5)
+    assert second["monotonic"] - first["monotonic"] == pytest.approx(1.0)
+    assert "monotonic" not in replayed
+
+
+def test_receive_time_uses_the_kernel_timestamp():
+    clock = AnchoredClock()
+    assert time.monotonic() - clock.receive_time(time.time() - 2.0) == pytest.approx(
+        2.0, abs=0.05
+    )
+    # Missing, or from before a clock step: now
+    for kernel_timestamp in (0.0, time.time() - 3600):
+        assert time.monotonic() - clock.receive_time(kernel_timestamp) < 0.05
+
+
+class FailingLogger(BlockingLogger):
+    def log(self, data, timestamp=None, monotonic=None):
+        if data["n"] == 0:
+            raise RuntimeError("unexpected")
+        self.entries.append(data)
+
+
+def test_background_writer_survives_unexpected_errors():
+    file_logger = FailingLogger()
+    writer = BackgroundLogWriter(file_logger)
+
+    for n in range(3):
+        writer.log({"n": n})
+    writer.close()
+
+    assert writer.write_errors == 1
+    assert [entry["n"] for entry in file_logger.entries] == [1, 2]
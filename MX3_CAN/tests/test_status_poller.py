@@ -0,0 +1,102 @@
+import pytest
+
+from MX3_CAN.config_yaml import CONTROLLER_MESSAGE_TYPE, MODULE_TYPE
+from MX3_CAN.status_listener import StatusListener
+from MX3_CAN.status_log import DailyRotatingLogger
+from MX3_CAN.status_poller import StatusPoller
+
+
+def sent_payloads(receiver) -> list[int]:
+    payloads = []
+    while (msg := receiver.recv(timeout=0)) is not None:
+        payloads.append(msg.data[0])
+    return payloads
+
+
+def make_poller(bus, tmp_path, periods, **kwargs) -> StatusPoller:
+    listener = StatusListener(
+        node_id=0x1,
+        expected_reply=CONTROLLER_MESSAGE_TYPE["Device_Status_Report"],
+        module_type=MODULE_TYPE["Status_Screen"],
+        source_module=MODULE_TYPE["Controller"],
+        logger=DailyRotatingLogger(str(tmp_path)),
+    )
+    return StatusPoller(bus, 0x1, listener, periods, **kwargs)
+
+
+def test_polls_only_stale_codes_and_coalesces(buses, tmp_path):
+    sender, receiver = buses
+    poller = make_poller(sender, tmp_path, {0x10: 0.2, 0x17: 60.0, 0x18: 10.0})
+    reports = poller.listener.last_report_by_code
+
+    # Nothing reported yet: every code is due, so one request for all
+    poller.poll_once(now=100.0)
+    assert sent_payloads(receiver) == [0x00]
+    for code in (0x10, 0x17, 0x18):
+        reports[code] = 100.1
+
+    # 0x10 is stale after 0.2 s; the others stay fresh
+    poller.poll_once(now=100.35)
+    assert sent_payloads(receiver) == [0x10]
+    reports[0x10] = 100.4
+    # A push for 0x10 keeps it fresh without polling
+    assert poller.poll_once(now=100.5) == pytest.approx(0.1)
+    assert sent_payloads(receiver) == []
+
+    staleness = poller.staleness(now=101.0)
+    assert staleness["Tracking_Status"] == pytest.approx(0.6)
+    assert staleness["CANBus_Status"] is None
+
+
+def test_backs_off_late_replies_and_caps_the_rate(buses, tmp_path):
+    sender, receiver = buses
+    poller = make_poller(sender, tmp_path, {0x10: 1.0, 0x17: 60.0, 0x18: 60.0})
+    reports = poller.listener.last_report_by_code
+    reports[0x17] = reports[0x18] = 100.0
+
+    poller.poll_once(now=100.0)
+    assert sent_payloads(receiver) == [0x10]
+    # No reply within two periods: late, period doubles, and the code is
+    # only requested again one doubled period later
+    poller.poll_once(now=102.0)
+    assert poller.late_replies == 1
+    assert poller.targets[0].backoff == 2.0
+    poller.poll_once(now=102.1)
+    assert sent_payloads(receiver) == []
+    poller.poll_once(now=104.0)
+    assert sent_payloads(receiver) == [0x10]
+    reports[0x10] = 104.2
+    poller.poll_once(now=104.3)
+    assert poller.targets[0].backoff == 1.0
+
+    capped = make_poller(
+        sender, tmp_path, {code: 1.0 for code in range(0x10, 0x1A)}, max_rate=2.0
+    )
+    for code in range(0x10, 0x1A):
+        capped.listener.last_report_by_code[code] = 100.0
+    capped.listener.last_report_by_code[0x10] = 99.0
+    capped.listener.last_report_by_code[0x11] = 99.0
+    capped.listener.last_report_by_code[0x12] = 99.0
+    capped._tokens = 2.0
+    capped.poll_once(now=100.5)
+    assert sent_payloads(receiver) == [0x10, 0x11]
+    assert capped.requests_deferred == 1
+
+
+def test_backoff_reduces_requests_to_a_silent_node(buses, tmp_path):
+    sender, receiver = buses
+
+    def requests_in_a_minute(max_backoff):
+        poller = make_poller(sender, tmp_path, {0x10: 1.0}, max_backoff=max_backoff)
+        now = 100.0
+        while now < 160.0:
+            now += poller.poll_once(now=now)
+        return len(sent_payloads(receiver))
+
+    without_backoff = requests_in_a_minute(max_backoff=1.0)
+    with_backoff = requests_in_a_minute(max_backoff=8.0)
+
+    # Late after two periods and resent one period later: every 3 s without
+    # backoff; with it at 100, 104, 112, 128 and 152 s
+    assert without_backoff == 20
+    assert with_backoff == 5